@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+# Bump when chart rendering changes so cached artifacts are re-rendered
+RENDER_CACHE_VERSION = 1
+
+# Each artifact's key is kept next to it in "<artifact>.key"
+KEY_SUFFIX = ".key"
+
+def _update_hash(hasher, obj: Any) -> None:
+    """Feed a canonical encoding of nested chart inputs into a hasher"""
+    if isinstance(obj, dict):
+        hasher.update(b"{")
+        for key in sorted(obj, key=str):
+            _update_hash(hasher, key)
+            _update_hash(hasher, obj[key])
+        hasher.update(b"}")
+    elif isinstance(obj, (list, tuple)):
+        hasher.update(b"[")
+        for item in obj:
+            _update_hash(hasher, item)
+        hasher.update(b"]")
+    elif isinstance(obj, np.ndarray):
+        hasher.update(f"ndarray:{obj.dtype.str}:{obj.shape}".encode())
+        hasher.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (datetime, date)):
+        hasher.update(obj.isoformat().encode())
+    elif isinstance(obj, Path):
+        hasher.update(str(obj).encode())
+    else:
+        hasher.update(repr(obj).encode())
+    hasher.update(b";")
+
+def content_hash(method: str, args: Any, params: Dict[str, Any]) -> str:
+    """Hash a chart's input data and parameters"""
+    hasher = hashlib.sha256()
+    _update_hash(hasher, (RENDER_CACHE_VERSION, method, args, params))
+    return hasher.hexdigest()
+
+def key_path(artifact: Path) -> Path:
+    """Sidecar file holding the key an artifact was rendered from"""
+    artifact = Path(artifact)
+    return artifact.with_name(artifact.name + KEY_SUFFIX)
+
+class RenderCache:
+    """Skips re-rendering charts whose inputs have not changed.
+
+    Each artifact has a sidecar ``<artifact>.key`` holding the content hash
+    of the data slice and chart parameters it was rendered from, plus the
+    artifact's size and modification time when the hash was recorded. A
+    render job is skipped when the artifact and its sidecar match. Sidecars
+    are written atomically per artifact, so runs sharing an output directory
+    never overwrite each other's keys, and an artifact rewritten outside the
+    cache no longer matches its sidecar.
+    """
+
+    def job_key(self, job) -> str:
+        """Content hash of a render job, ignoring where it is saved"""
+        method, args, kwargs = job
+        params = {name: value for name, value in kwargs.items() if name != "save_path"}
+        return content_hash(method, args, params)
+
+    @staticmethod
+    def _stamp(artifact: Path) -> Dict[str, int]:
+        """Size and modification time identifying one rendering of an artifact"""
+        stat = Path(artifact).stat()
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def is_current(self, artifact: Path, key: str) -> bool:
+        """Check whether an artifact exists and was rendered from the same inputs"""
+        try:
+            with open(key_path(artifact)) as f:
+                recorded = json.load(f)
+            stamp = self._stamp(artifact)
+        except (OSError, ValueError):
+            return False
+        return recorded == {"key": key, **stamp}
+
+    def record(self, artifact: Path, key: str) -> None:
+        """Atomically write the key an artifact was just rendered from"""
+        path = key_path(artifact)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"key": key, **self._stamp(artifact)}, f)
+        os.replace(tmp_path, path)
+
+    def render(self, visualizer, jobs: List, max_workers: Optional[int] = None) -> List[str]:
+        """Render only the stale jobs and return the paths that were rendered"""
+        stale = []
+        for job in jobs:
+            key = self.job_key(job)
+            if not self.is_current(job[2]["save_path"], key):
+                stale.append((job, key))
+        if not stale:
+            return []
+        for job, _ in stale:
+            # Drop the old key first, so an interrupted render is never taken as current
+            key_path(job[2]["save_path"]).unlink(missing_ok=True)
+        rendered = visualizer.render_charts([job for job, _ in stale], max_workers=max_workers)
+        for job, key in stale:
+            self.record(job[2]["save_path"], key)
+        return rendered
@@ -1,198 +1,471 @@
+from matplotlib.figure import Figure
 import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
-from typing import Dict, List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 from pathlib import Path
+import json
 import folium
 from folium.plugins import HeatMap
+from branca.element import MacroElement
+from jinja2 import Template
+try:
+    from ..core.utils.results_store import ResultsStore
+except ImportError:  # analysis is a top-level package when main.py runs from this directory
+    from core.utils.results_store import ResultsStore
+
+# A render job is (visualizer method name, positional args, keyword args)
+RenderJob = Tuple[str, Sequence[Any], Dict[str, Any]]
+
+def _render_job(job: RenderJob) -> Optional[str]:
+    """Render one chart in a worker process with a headless visualizer"""
+    method, args, kwargs = job
+    getattr(SimulationVisualizer(headless=True), method)(*args, **kwargs)
+    save_path = kwargs.get("save_path")
+    return str(save_path) if save_path is not None else None
+
+# Pandas resampling frequencies for per-region aggregation
+AGGREGATION_FREQUENCIES = {
+    'weekly': 'W',
+    'monthly': 'MS'
+}
+
+def lttb_downsample(x: np.ndarray, y: np.ndarray, n_out: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Downsample a series with Largest-Triangle-Three-Buckets.
+    
+    Keeps the first and last points and, from each bucket in between, the
+    point forming the largest triangle with the previously kept point and
+    the mean of the next bucket, which preserves the visual shape.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return x, y
+    if np.issubdtype(x.dtype, np.datetime64):
+        xs = x.astype('datetime64[ns]').astype(np.int64).astype(float)
+    else:
+        xs = x.astype(float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = xs[end:next_end].mean() if next_end > end else xs[-1]
+        next_y = y[end:next_end].mean() if next_end > end else y[-1]
+        area = np.abs((xs[previous] - next_x) * (y[start:end] - y[previous])
+                      - (xs[previous] - xs[start:end]) * (next_y - y[previous]))
+        previous = start + int(area.argmax())
+        keep[i + 1] = previous
+    return x[keep], y[keep]
+
+def minmax_downsample(x: np.ndarray, y: np.ndarray, n_buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Downsample a series to the minimum and maximum point of each bucket"""
+    n = len(y)
+    if 2 * n_buckets >= n:
+        return x, y
+    edges = np.linspace(0, n, n_buckets + 1).astype(int)
+    keep = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        bucket = y[start:end]
+        keep.extend(sorted((start + int(bucket.argmin()), start + int(bucket.argmax()))))
+    keep = np.unique(keep)
+    return x[keep], y[keep]
+
+# Leaflet snippet that loads raw risk points tile by tile once zoomed in
+_LAZY_TILE_SCRIPT = """
+(function() {
+    var map = %(map)s;
+    var detail = L.layerGroup().addTo(map);
+    var loaded = {};
+    function loadTiles() {
+        if (map.getZoom() < %(detail_zoom)d) { detail.clearLayers(); loaded = {}; return; }
+        var b = map.getBounds();
+        for (var x = Math.floor(b.getWest() / %(tile_size)s); x <= Math.floor(b.getEast() / %(tile_size)s); x++) {
+            for (var y = Math.floor(b.getSouth() / %(tile_size)s); y <= Math.floor(b.getNorth() / %(tile_size)s); y++) {
+                var key = x + '_' + y;
+                if (loaded[key]) { continue; }
+                loaded[key] = true;
+                fetch('%(tile_dir)s/' + key + '.json').then(function(r) { return r.ok ? r.json() : []; })
+                    .then(function(points) {
+                        points.forEach(function(p) {
+                            L.circleMarker([p[0], p[1]], {radius: 3, weight: 0, fillOpacity: 0.7,
+                                fillColor: 'hsl(' + ((1 - p[2]) * 120) + ',90%%,45%%)'}).addTo(detail);
+                        });
+                    });
+            }
+        }
+    }
+    map.on('moveend', loadTiles);
+})();
+"""
+
+def _risk_arrays(locations: Dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return latitude, longitude and combined risk arrays from row- or column-wise input"""
+    if isinstance(locations.get('latitude'), (np.ndarray, list, tuple)):
+        columns = locations
+    else:
+        rows = list(locations.values())
+        columns = {key: [row[key] for row in rows]
+                   for key in ('latitude', 'longitude', 'drought_risk', 'flood_risk')}
+    latitude = np.asarray(columns['latitude'], dtype=float)
+    longitude = np.asarray(columns['longitude'], dtype=float)
+    risk = (np.asarray(columns['drought_risk'], dtype=float) + np.asarray(columns['flood_risk'], dtype=float)) / 2
+    return latitude, longitude, risk
+
+def _bin_risk(latitude: np.ndarray, longitude: np.ndarray, risk: np.ndarray,
+              cell_size: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Average risk onto a regular lat/lon grid, returning occupied cell centers"""
+    row = np.floor(latitude / cell_size).astype(np.int64)
+    col = np.floor(longitude / cell_size).astype(np.int64)
+    cells, index = np.unique(np.column_stack([row, col]), axis=0, return_inverse=True)
+    index = index.ravel()
+    mean_risk = np.bincount(index, weights=risk) / np.bincount(index)
+    return (cells[:, 0] + 0.5) * cell_size, (cells[:, 1] + 0.5) * cell_size, mean_risk
+
+def _write_risk_tiles(latitude: np.ndarray, longitude: np.ndarray, risk: np.ndarray,
+                      tile_size: float, save_path: Path) -> Path:
+    """Write raw risk points as per-tile JSON files next to the map"""
+    tile_dir = save_path.with_name(f"{save_path.stem}_tiles")
+    tile_dir.mkdir(parents=True, exist_ok=True)
+    tile_x = np.floor(longitude / tile_size).astype(np.int64)
+    tile_y = np.floor(latitude / tile_size).astype(np.int64)
+    order = np.lexsort((tile_y, tile_x))
+    keys = np.column_stack([tile_x, tile_y])[order]
+    starts = np.flatnonzero(np.r_[True, (keys[1:] != keys[:-1]).any(axis=1)])
+    points = np.column_stack([latitude, longitude, risk])[order].round(5)
+    for start, end in zip(starts, np.r_[starts[1:], len(order)]):
+        with open(tile_dir / f"{keys[start, 0]}_{keys[start, 1]}.json", "w") as f:
+            json.dump(points[start:end].tolist(), f, separators=(',', ':'))
+    return tile_dir
 
 class SimulationVisualizer:
     """Visualizes simulation results"""
     
-    def __init__(self):
-        """Initialize the visualizer"""
-        plt.style.use('default')  # Use default style instead of seaborn
+    def __init__(self, headless: bool = False):
+        """Initialize the visualizer.
+        
+        In headless mode figures are plain Agg-rendered Figure objects that
+        never touch pyplot's global state or open a window, so batch runs on
+        servers neither block nor leak figures.
+        """
+        self.headless = headless
+        if not headless:
+            plt.style.use('default')  # Use default style instead of seaborn
+    
+    def _new_figure(self, figsize: Tuple[float, float]) -> Figure:
+        """Create a figure, detached from pyplot when headless"""
+        if self.headless:
+            return Figure(figsize=figsize)
+        return plt.figure(figsize=figsize)
+    
+    def _finish(self, fig: Figure, save_path: Optional[str] = None) -> None:
+        """Save a figure, show it when interactive, and release it"""
+        fig.tight_layout()
+        if save_path:
+            fig.savefig(save_path)
+        if self.headless:
+            fig.clear()
+        else:
+            plt.show()
+            plt.close(fig)
+    
+    def render_charts(self, jobs: List[RenderJob], max_workers: Optional[int] = None) -> List[Optional[str]]:
+        """Render several charts concurrently in a process pool.
+        
+        Each job names a plotting method of this class with its arguments and
+        is rendered by a headless visualizer in a worker process. Returns the
+        save paths of the rendered charts in job order.
+        """
+        if max_workers == 1 or len(jobs) <= 1:
+            return [_render_job(job) for job in jobs]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_render_job, jobs))
     
-    def generate_comparison_plots(self, results: Dict, output_dir: Path):
-        """Generate comparison plots for different scenarios"""
+    def generate_comparison_plots(self, results: Dict, output_dir: Path,
+                                  regions: Union[str, Sequence[str]] = 'aggregate'):
+        """Generate comparison plots for different scenarios.
+        
+        ``results`` maps each scenario to a series source: a ResultsStore, a
+        DatabaseSeries, or a legacy ``{'results': [...]}`` run result, which is
+        converted to a ResultsStore first. ``regions`` is ``'aggregate'`` for
+        the mean over all regions, ``'all'`` for every region, or a list of
+        district names.
+        """
         # Create output directory if it doesn't exist
         output_dir.mkdir(parents=True, exist_ok=True)
+        sources = {
+            scenario: source if hasattr(source, 'iter_series')
+            else ResultsStore.from_step_results(source['results'])
+            for scenario, source in results.items()
+        }
         
         # Plot temperature trends
-        self._plot_temperature_trends(results, output_dir)
+        self._plot_temperature_trends(sources, output_dir, regions)
         
         # Plot rainfall patterns
-        self._plot_rainfall_patterns(results, output_dir)
+        self._plot_rainfall_patterns(sources, output_dir, regions)
         
         # Plot crop yields
-        self._plot_crop_yields(results, output_dir)
-        
-        plt.close('all')
+        self._plot_crop_yields(sources, output_dir, regions)
+    
+    def _plot_scenario_series(self, sources: Dict, metric: str, title: str, ylabel: str,
+                              save_path: Path, regions: Union[str, Sequence[str]] = 'aggregate'):
+        """Plot each scenario's series of a metric on a single chart.
+        
+        Series are streamed from each source one region at a time, so memory
+        is bounded by a single series plus the running aggregate.
+        """
+        fig = Figure(figsize=(12, 6))
+        ax = fig.add_subplot(1, 1, 1)
+        selected = None if isinstance(regions, str) else list(regions)
+        
+        for index, (scenario, source) in enumerate(sources.items()):
+            color = f"C{index}"
+            total = None
+            count = 0
+            for region, dates, values in source.iter_series(metric, selected):
+                if regions == 'aggregate':
+                    if total is None:
+                        total_dates = dates
+                        total = np.zeros(len(values))
+                    n = min(len(total), len(values))
+                    total = total[:n] + values[:n]
+                    count += 1
+                elif regions == 'all':
+                    ax.plot(dates, values, color=color, linewidth=0.5, alpha=0.5,
+                            label=scenario if count == 0 else None)
+                    count += 1
+                else:
+                    ax.plot(dates, values, label=f"{scenario}: {region}")
+            if total is not None:
+                ax.plot(total_dates[:len(total)], total / count, color=color, label=scenario)
+        
+        ax.set_title(title)
+        ax.set_xlabel('Date')
+        ax.set_ylabel(ylabel)
+        ax.legend()
+        ax.grid(True)
+        fig.savefig(save_path)
+        fig.clear()
     
-    def _plot_temperature_trends(self, results: Dict, output_dir: Path):
+    def _plot_temperature_trends(self, sources: Dict, output_dir: Path,
+                                 regions: Union[str, Sequence[str]] = 'aggregate'):
         """Plot temperature trends for different scenarios"""
-        plt.figure(figsize=(12, 6))
-        
-        for scenario, data in results.items():
-            dates = [pd.to_datetime(r['date']) for r in data['results']]
-            temps = [r['regions'][0]['temperature'] for r in data['results']]
-            plt.plot(dates, temps, label=scenario)
-        
-        plt.title('Temperature Trends Across Scenarios')
-        plt.xlabel('Date')
-        plt.ylabel('Temperature (°C)')
-        plt.legend()
-        plt.grid(True)
-        plt.savefig(output_dir / 'temperature_trends.png')
-        plt.close()
+        self._plot_scenario_series(sources, 'temperature', 'Temperature Trends Across Scenarios',
+                                   'Temperature (°C)', output_dir / 'temperature_trends.png', regions)
     
-    def _plot_rainfall_patterns(self, results: Dict, output_dir: Path):
+    def _plot_rainfall_patterns(self, sources: Dict, output_dir: Path,
+                                regions: Union[str, Sequence[str]] = 'aggregate'):
         """Plot rainfall patterns for different scenarios"""
-        plt.figure(figsize=(12, 6))
-        
-        for scenario, data in results.items():
-            dates = [pd.to_datetime(r['date']) for r in data['results']]
-            rainfall = [r['regions'][0]['rainfall'] for r in data['results']]
-            plt.plot(dates, rainfall, label=scenario)
-        
-        plt.title('Rainfall Patterns Across Scenarios')
-        plt.xlabel('Date')
-        plt.ylabel('Rainfall (mm)')
-        plt.legend()
-        plt.grid(True)
-        plt.savefig(output_dir / 'rainfall_patterns.png')
-        plt.close()
+        self._plot_scenario_series(sources, 'rainfall', 'Rainfall Patterns Across Scenarios',
+                                   'Rainfall (mm)', output_dir / 'rainfall_patterns.png', regions)
     
-    def _plot_crop_yields(self, results: Dict, output_dir: Path):
+    def _plot_crop_yields(self, sources: Dict, output_dir: Path,
+                          regions: Union[str, Sequence[str]] = 'aggregate'):
         """Plot crop yields for different scenarios"""
-        plt.figure(figsize=(12, 6))
-        
-        for scenario, data in results.items():
-            dates = [pd.to_datetime(r['date']) for r in data['results']]
-            yields = [r['regions'][0]['crop_yield'] for r in data['results']]
-            plt.plot(dates, yields, label=scenario)
-        
-        plt.title('Crop Yields Across Scenarios')
-        plt.xlabel('Date')
-        plt.ylabel('Yield (tons/hectare)')
-        plt.legend()
-        plt.grid(True)
-        plt.savefig(output_dir / 'crop_yields.png')
-        plt.close()
-        
-    def plot_climate_impact(self, climate_data: Dict[str, List[Dict[str, float]]], 
-                          save_path: str = None) -> None:
-        """Plot climate impact over time"""
-        plt.figure(figsize=(12, 6))
+        self._plot_scenario_series(sources, 'crop_yield', 'Crop Yields Across Scenarios',
+                                   'Yield (tons/hectare)', output_dir / 'crop_yields.png', regions)
+    
+    def _prepare_series(self, dates: Sequence, values: Sequence, aggregate: Optional[str],
+                        max_points: int, downsample: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Aggregate a series to a coarser period and downsample it for plotting"""
+        x = pd.DatetimeIndex(pd.to_datetime(list(dates)))
+        y = np.asarray(values, dtype=float)
+        if aggregate and aggregate != 'daily':
+            resampled = pd.Series(y, index=x).resample(AGGREGATION_FREQUENCIES[aggregate]).mean()
+            x, y = resampled.index, resampled.to_numpy()
+        x = x.to_numpy()
+        if downsample == 'minmax':
+            return minmax_downsample(x, y, max(1, max_points // 2))
+        return lttb_downsample(x, y, max_points)
+    
+    def _target_points(self, fig: Figure, max_points: Optional[int]) -> int:
+        """Number of points per series, defaulting to the figure width in pixels"""
+        return max_points or int(fig.get_figwidth() * fig.dpi)
+    
+    def plot_climate_impact(self, climate_data: Dict[str, List[Dict[str, float]]],
+                          save_path: str = None, aggregate: Optional[str] = None,
+                          max_points: Optional[int] = None, downsample: str = 'lttb') -> None:
+        """Plot climate impact over time.
+        
+        ``aggregate`` ('daily', 'weekly', 'monthly') averages each region's
+        series first; series are then downsampled ('lttb' or 'minmax') to at
+        most ``max_points`` points, the figure width in pixels by default.
+        """
+        fig = self._new_figure((12, 6))
+        temp_ax = fig.add_subplot(2, 1, 1)
+        rain_ax = fig.add_subplot(2, 1, 2)
+        points = self._target_points(fig, max_points)
         
         for region, data in climate_data.items():
-            dates = [d for d in data.keys()]
+            dates = list(data.keys())
             temp_changes = [d['climate_impact']['temperature_change'] for d in data.values()]
             rainfall_changes = [d['climate_impact']['rainfall_change'] for d in data.values()]
             
-            plt.subplot(2, 1, 1)
-            plt.plot(dates, temp_changes, label=region)
-            plt.title('Temperature Change Over Time')
-            plt.ylabel('Temperature Change (°C)')
-            plt.legend()
-            
-            plt.subplot(2, 1, 2)
-            plt.plot(dates, rainfall_changes, label=region)
-            plt.title('Rainfall Change Over Time')
-            plt.ylabel('Rainfall Change (mm)')
-            plt.legend()
-            
-        plt.tight_layout()
-        if save_path:
-            plt.savefig(save_path)
-        plt.show()
+            temp_ax.plot(*self._prepare_series(dates, temp_changes, aggregate, points, downsample), label=region)
+            rain_ax.plot(*self._prepare_series(dates, rainfall_changes, aggregate, points, downsample), label=region)
         
+        temp_ax.set_title('Temperature Change Over Time')
+        temp_ax.set_ylabel('Temperature Change (°C)')
+        temp_ax.legend()
+        rain_ax.set_title('Rainfall Change Over Time')
+        rain_ax.set_ylabel('Rainfall Change (mm)')
+        rain_ax.legend()
+        
+        self._finish(fig, save_path)
+    
     def plot_production_trends(self, production_data: Dict[str, List[Dict[str, float]]],
-                             save_path: str = None) -> None:
-        """Plot agricultural production trends"""
-        plt.figure(figsize=(12, 6))
+                             save_path: str = None, aggregate: Optional[str] = None,
+                             max_points: Optional[int] = None, downsample: str = 'lttb') -> None:
+        """Plot agricultural production trends (see plot_climate_impact for options)"""
+        fig = self._new_figure((12, 6))
+        production_ax = fig.add_subplot(2, 1, 1)
+        price_ax = fig.add_subplot(2, 1, 2)
+        points = self._target_points(fig, max_points)
         
         for region, data in production_data.items():
-            dates = [d for d in data.keys()]
+            dates = list(data.keys())
             production = [d['production'] for d in data.values()]
             prices = [d['market_price'] for d in data.values()]
             
-            plt.subplot(2, 1, 1)
-            plt.plot(dates, production, label=region)
-            plt.title('Agricultural Production Over Time')
-            plt.ylabel('Production (tons)')
-            plt.legend()
-            
-            plt.subplot(2, 1, 2)
-            plt.plot(dates, prices, label=region)
-            plt.title('Market Prices Over Time')
-            plt.ylabel('Price (BDT/ton)')
-            plt.legend()
-            
-        plt.tight_layout()
-        if save_path:
-            plt.savefig(save_path)
-        plt.show()
+            production_ax.plot(*self._prepare_series(dates, production, aggregate, points, downsample), label=region)
+            price_ax.plot(*self._prepare_series(dates, prices, aggregate, points, downsample), label=region)
         
-    def create_risk_map(self, locations: Dict[str, Dict[str, float]], 
-                       save_path: str = None) -> None:
-        """Create a heat map of climate risks"""
+        production_ax.set_title('Agricultural Production Over Time')
+        production_ax.set_ylabel('Production (tons)')
+        production_ax.legend()
+        price_ax.set_title('Market Prices Over Time')
+        price_ax.set_ylabel('Price (BDT/ton)')
+        price_ax.legend()
+        
+        self._finish(fig, save_path)
+    
+    def plot_scaling(self, rows: List[Dict], save_path: str = None) -> None:
+        """Plot throughput and wall time from a scaling sweep on log-log axes.
+        
+        Each row is one measured configuration with ``engine``, ``farmers``,
+        ``regions``, ``years``, ``status``, ``seconds`` and
+        ``farmer_steps_per_second``; rows that did not finish are ignored.
+        """
+        fig = self._new_figure((12, 10))
+        throughput_ax = fig.add_subplot(2, 1, 1)
+        time_ax = fig.add_subplot(2, 1, 2)
+        
+        series: Dict[Tuple, List[Dict]] = {}
+        for row in rows:
+            if row.get('status', 'ok') == 'ok':
+                series.setdefault((row['engine'], row['regions'], row['years']), []).append(row)
+        
+        for (engine, regions, years), points in sorted(series.items()):
+            points.sort(key=lambda row: row['farmers'])
+            farmers = [row['farmers'] for row in points]
+            label = f"{engine}, {regions} regions, {years}y"
+            throughput_ax.plot(farmers, [row['farmer_steps_per_second'] for row in points],
+                               marker='o', label=label)
+            time_ax.plot([row['farmers'] * row['steps'] for row in points],
+                         [row['seconds'] for row in points], marker='o', label=label)
+        
+        throughput_ax.set_xscale('log')
+        throughput_ax.set_yscale('log')
+        throughput_ax.set_title('Simulation Throughput')
+        throughput_ax.set_xlabel('Farmers')
+        throughput_ax.set_ylabel('Farmer-steps per second')
+        throughput_ax.grid(True, which='both', alpha=0.3)
+        time_ax.set_xscale('log')
+        time_ax.set_yscale('log')
+        time_ax.set_title('Wall Time')
+        time_ax.set_xlabel('Farmer-steps')
+        time_ax.set_ylabel('Seconds')
+        time_ax.grid(True, which='both', alpha=0.3)
+        if series:
+            throughput_ax.legend(fontsize='small')
+        
+        self._finish(fig, save_path)
+    
+    def create_risk_map(self, locations: Dict[str, Dict[str, float]],
+                       save_path: str = None, mode: str = 'points',
+                       cell_size: float = 0.1, tile_size: float = 1.0,
+                       detail_zoom: int = 10) -> folium.Map:
+        """Create a heat map of climate risks.
+        
+        ``mode='points'`` plots every location. ``mode='grid'`` is meant for
+        union- or farmer-level inputs: risk is averaged onto a ``cell_size``
+        degree grid so the map only inlines one point per occupied cell, and
+        the raw points are written as ``tile_size`` degree JSON tiles next to
+        the HTML file that are fetched once the user zooms in to
+        ``detail_zoom``. Tiles are loaded over HTTP, so serve the output
+        directory rather than opening the file directly. ``locations`` may
+        also be given column-wise as arrays under 'latitude', 'longitude',
+        'drought_risk' and 'flood_risk'.
+        """
         # Create a map centered on Bangladesh
         m = folium.Map(location=[23.6850, 90.3563], zoom_start=7)
-        
-        # Add risk heatmap
-        risk_data = []
-        for location, data in locations.items():
-            risk = (data['drought_risk'] + data['flood_risk']) / 2
-            risk_data.append([data['latitude'], data['longitude'], risk])
-            
-        HeatMap(risk_data).add_to(m)
+        latitude, longitude, risk = _risk_arrays(locations)
+        
+        if mode == 'grid':
+            cell_lat, cell_lon, cell_risk = _bin_risk(latitude, longitude, risk, cell_size)
+            HeatMap(np.column_stack([cell_lat, cell_lon, cell_risk]).round(5).tolist(),
+                    name='Aggregated risk').add_to(m)
+            if save_path:
+                tile_dir = _write_risk_tiles(latitude, longitude, risk, tile_size, Path(save_path))
+                lazy_tiles = MacroElement()
+                lazy_tiles._template = Template(
+                    "{% macro script(this, kwargs) %}" + _LAZY_TILE_SCRIPT % {
+                        'map': m.get_name(),
+                        'tile_dir': tile_dir.name,
+                        'tile_size': tile_size,
+                        'detail_zoom': detail_zoom
+                    } + "{% endmacro %}"
+                )
+                m.add_child(lazy_tiles)
+        else:
+            HeatMap(np.column_stack([latitude, longitude, risk]).tolist()).add_to(m)
         
         if save_path:
             m.save(save_path)
         return m
-        
+    
     def plot_farmer_distribution(self, farmers: List[Dict], save_path: str = None) -> None:
         """Plot distribution of farmer characteristics"""
-        plt.figure(figsize=(15, 10))
+        fig = self._new_figure((15, 10))
         
         # Land holding size distribution
-        plt.subplot(2, 2, 1)
+        ax = fig.add_subplot(2, 2, 1)
         land_sizes = [f['land_holding_size'] for f in farmers]
-        plt.hist(land_sizes, bins=30)
-        plt.title('Distribution of Land Holding Sizes')
-        plt.xlabel('Land Size (hectares)')
+        ax.hist(land_sizes, bins=30)
+        ax.set_title('Distribution of Land Holding Sizes')
+        ax.set_xlabel('Land Size (hectares)')
         
         # Technology adoption level
-        plt.subplot(2, 2, 2)
+        ax = fig.add_subplot(2, 2, 2)
         tech_levels = [f['technology_adoption_level'] for f in farmers]
-        plt.hist(tech_levels, bins=30)
-        plt.title('Distribution of Technology Adoption Levels')
-        plt.xlabel('Adoption Level')
+        ax.hist(tech_levels, bins=30)
+        ax.set_title('Distribution of Technology Adoption Levels')
+        ax.set_xlabel('Adoption Level')
         
         # Farming experience
-        plt.subplot(2, 2, 3)
+        ax = fig.add_subplot(2, 2, 3)
         experience = [f['farming_experience'] for f in farmers]
-        plt.hist(experience, bins=30)
-        plt.title('Distribution of Farming Experience')
-        plt.xlabel('Years of Experience')
+        ax.hist(experience, bins=30)
+        ax.set_title('Distribution of Farming Experience')
+        ax.set_xlabel('Years of Experience')
         
         # Risk tolerance
-        plt.subplot(2, 2, 4)
+        ax = fig.add_subplot(2, 2, 4)
         risk_tolerance = [f['risk_tolerance'] for f in farmers]
-        plt.hist(risk_tolerance, bins=30)
-        plt.title('Distribution of Risk Tolerance')
-        plt.xlabel('Risk Tolerance Level')
+        ax.hist(risk_tolerance, bins=30)
+        ax.set_title('Distribution of Risk Tolerance')
+        ax.set_xlabel('Risk Tolerance Level')
         
-        plt.tight_layout()
-        if save_path:
-            plt.savefig(save_path)
-        plt.show()
-        
-    def plot_policy_impact(self, policy_data: Dict[str, Dict[str, float]], 
+        self._finish(fig, save_path)
+    
+    def plot_policy_impact(self, policy_data: Dict[str, Dict[str, float]],
                           save_path: str = None) -> None:
         """Plot impact of different policies"""
-        plt.figure(figsize=(12, 6))
+        fig = self._new_figure((12, 6))
+        ax = fig.add_subplot(1, 1, 1)
         
         metrics = ['adoption_rate', 'cost_effectiveness', 'farmer_satisfaction']
         policy_types = list(policy_data.keys())
@@ -202,78 +475,67 @@ class SimulationVisualizer:
         
         for i, metric in enumerate(metrics):
             values = [policy_data[policy][metric] for policy in policy_types]
-            plt.bar(x + i*width, values, width, label=metric)
-            
-        plt.xlabel('Policy Type')
-        plt.ylabel('Score')
-        plt.title('Policy Impact Analysis')
-        plt.xticks(x + width, policy_types, rotation=45)
-        plt.legend()
+            ax.bar(x + i*width, values, width, label=metric)
         
-        plt.tight_layout()
-        if save_path:
-            plt.savefig(save_path)
-        plt.show()
+        ax.set_xlabel('Policy Type')
+        ax.set_ylabel('Score')
+        ax.set_title('Policy Impact Analysis')
+        ax.set_xticks(x + width)
+        ax.set_xticklabels(policy_types, rotation=45)
+        ax.legend()
         
+        self._finish(fig, save_path)
+    
     def create_dashboard(self, simulation_results: Dict, save_path: str = None) -> None:
         """Create a comprehensive dashboard of simulation results"""
-        fig = plt.figure(figsize=(20, 15))
+        fig = self._new_figure((20, 15))
         
         # Climate Impact
-        plt.subplot(3, 2, 1)
-        self._plot_climate_summary(simulation_results['climate_data'])
+        self._plot_climate_summary(fig.add_subplot(3, 2, 1), simulation_results.get('climate_data'))
         
         # Production Trends
-        plt.subplot(3, 2, 2)
-        self._plot_production_summary(simulation_results['production_data'])
+        self._plot_production_summary(fig.add_subplot(3, 2, 2), simulation_results.get('production_data'))
         
         # Market Prices
-        plt.subplot(3, 2, 3)
-        self._plot_market_summary(simulation_results['market_data'])
+        self._plot_market_summary(fig.add_subplot(3, 2, 3), simulation_results.get('market_data'))
         
         # Policy Impact
-        plt.subplot(3, 2, 4)
-        self._plot_policy_summary(simulation_results['policy_data'])
+        self._plot_policy_summary(fig.add_subplot(3, 2, 4), simulation_results.get('policy_data'))
         
         # Farmer Distribution
-        plt.subplot(3, 2, 5)
-        self._plot_farmer_summary(simulation_results['farmer_data'])
+        self._plot_farmer_summary(fig.add_subplot(3, 2, 5), simulation_results.get('farmer_data'))
         
         # Risk Assessment
-        plt.subplot(3, 2, 6)
-        self._plot_risk_summary(simulation_results['risk_data'])
+        self._plot_risk_summary(fig.add_subplot(3, 2, 6), simulation_results.get('risk_data'))
         
-        plt.tight_layout()
-        if save_path:
-            plt.savefig(save_path)
-        plt.show()
-        
-    def _plot_climate_summary(self, climate_data: Dict) -> None:
+        self._finish(fig, save_path)
+    
+    def _plot_climate_summary(self, ax, climate_data: Dict) -> None:
         """Helper method to plot climate summary"""
         # Implementation details for climate summary plot
         pass
-        
-    def _plot_production_summary(self, production_data: Dict) -> None:
+    
+    def _plot_production_summary(self, ax, production_data: Dict) -> None:
         """Helper method to plot production summary"""
         # Implementation details for production summary plot
         pass
-        
-    def _plot_market_summary(self, market_data: Dict) -> None:
+    
+    def _plot_market_summary(self, ax, market_data: Dict) -> None:
         """Helper method to plot market summary"""
         # Implementation details for market summary plot
         pass
-        
-    def _plot_policy_summary(self, policy_data: Dict) -> None:
+    
+    def _plot_policy_summary(self, ax, policy_data: Dict) -> None:
         """Helper method to plot policy summary"""
         # Implementation details for policy summary plot
         pass
-        
-    def _plot_farmer_summary(self, farmer_data: Dict) -> None:
+    
+    def _plot_farmer_summary(self, ax, farmer_data: Dict) -> None:
         """Helper method to plot farmer summary"""
         # Implementation details for farmer summary plot
         pass
-        
-    def _plot_risk_summary(self, risk_data: Dict) -> None:
+    
+    def _plot_risk_summary(self, ax, risk_data: Dict) -> None:
         """Helper method to plot risk summary"""
         # Implementation details for risk summary plot
-        pass 
\ No newline at end of file
+        pass
@@ -0,0 +1,156 @@
+import zlib
+from typing import Dict, List, Optional
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; responses fall back to gzip
+    brotli = None
+
+# Content types worth compressing
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "image/svg+xml")
+
+GZIP_LEVEL = 6
+# Brotli quality suited to dynamic responses (11 is far slower for little gain)
+BROTLI_QUALITY = 4
+
+def supported_encodings() -> List[str]:
+    """Encodings this server can produce, in order of preference"""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the preferred supported encoding an Accept-Encoding header allows"""
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+    candidates = [
+        (weights.get(encoding, weights.get("*", 0.0)), -rank, encoding)
+        for rank, encoding in enumerate(supported_encodings())
+    ]
+    weight, _, encoding = max(candidates)
+    return encoding if weight > 0 else None
+
+def add_vary(start_message: Dict) -> Dict:
+    """Add Accept-Encoding to a response start message's Vary header"""
+    headers = [(name, value) for name, value in start_message.get("headers", []) if name.lower() != b"vary"]
+    vary = [value for name, value in start_message.get("headers", []) if name.lower() == b"vary"]
+    if not any(b"accept-encoding" in value.lower() or value.strip() == b"*" for value in vary):
+        vary.append(b"Accept-Encoding")
+    headers.append((b"vary", b", ".join(vary)))
+    return {**start_message, "headers": headers}
+
+class _Compressor:
+    """Incremental gzip or brotli compressor"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk and flush it so streamed chunks reach the client promptly"""
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        """Compress the last chunk and end the stream"""
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.finish()
+        return self._compressor.compress(data) + self._compressor.flush()
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with brotli or gzip.
+
+    The encoding is negotiated from Accept-Encoding. Complete responses
+    smaller than ``minimum_size`` are sent as they are. Streamed (chunked)
+    responses are compressed chunk by chunk, never buffered whole. Every
+    response gets ``Vary: Accept-Encoding`` so caches keep the variants apart.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        encoding = negotiate_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            async def send_with_vary(message):
+                if message["type"] == "http.response.start":
+                    message = add_vary(message)
+                await send(message)
+            await self.app(scope, receive, send_with_vary)
+            return
+        await _CompressedResponse(send, encoding, self.minimum_size).run(self.app, scope, receive)
+
+class _CompressedResponse:
+    """Compresses one response as its messages pass through"""
+
+    def __init__(self, send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def run(self, app, scope, receive):
+        await app(scope, receive, self.handle)
+
+    async def handle(self, message):
+        if message["type"] == "http.response.start":
+            # Hold the headers until the first body chunk shows whether to compress
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+        if self.passthrough:
+            await self.send(message)
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            if not self._should_compress(body, more_body):
+                self.passthrough = True
+                await self.send(add_vary(self.start_message))
+                await self.send(message)
+                return
+            self.compressor = _Compressor(self.encoding)
+            await self.send(self._compressed_start())
+        data = self.compressor.compress(body) if more_body else self.compressor.finish(body)
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    def _should_compress(self, body: bytes, more_body: bool) -> bool:
+        headers = {name.lower(): value for name, value in self.start_message.get("headers", [])}
+        if b"content-encoding" in headers:
+            return False
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return False
+        # A complete response below the threshold is not worth compressing
+        return more_body or len(body) >= self.minimum_size
+
+    def _compressed_start(self) -> Dict:
+        headers = [
+            (name, value) for name, value in self.start_message.get("headers", [])
+            if name.lower() != b"content-length"
+        ]
+        headers.append((b"content-encoding", self.encoding.encode()))
+        return add_vary({**self.start_message, "headers": headers})
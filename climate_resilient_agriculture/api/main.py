@@ -1,9 +1,11 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Dict, List, Optional
-from datetime import datetime
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta
 import json
+import math
 from pathlib import Path
 import sys
 import os
@@ -12,18 +14,48 @@ import logging
 # Add the project root to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from core.simulation.engine import SimulationEngine
-from core.utils.data_generator import DataGenerator
-from analysis.visualization import SimulationVisualizer
+from core.simulation_engine import SimulationEngine as DatabaseSimulationEngine
+from core.simulation.scenarios import SCENARIOS
+from analysis.render_cache import RenderCache
 from config.simulation_config import *
 from core.database.session import get_session
-from core.database.repository import SimulationRepository
-from core.database.init_db import init_db
+from core.database.repository import FARMER_FIELDS, SERIES_COLUMNS, SimulationRepository
+from core.utils.checkpoint import prune_checkpoints
+from core.utils.profiling import Profiler
+from core.utils.result_cache import request_key
+from core.utils.results_store import RESAMPLE_AGGREGATIONS, RESAMPLE_FREQUENCIES, resample_series
+from api.compression import CompressionMiddleware
+from api.streaming import ARROW_MEDIA_TYPE, NDJSON_MEDIA_TYPE, arrow_available, stream_arrow, stream_json, stream_ndjson
+
+if TYPE_CHECKING:
+    # Plotting pulls in matplotlib, pandas and folium; keep them out of worker start-up
+    from analysis.visualization import SimulationVisualizer
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Per-phase simulation metrics are collected when SIMULATION_PROFILING is set
+PROFILING_ENABLED = os.getenv('SIMULATION_PROFILING', '').lower() in ('1', 'true', 'yes')
+METRICS = Profiler()
+# With several worker processes each one exports its metrics here, and /metrics reports their sum
+METRICS_DIRECTORY = os.getenv('METRICS_DIRECTORY')
+
+RESULT_CACHE_MAX_AGE = timedelta(days=RESULT_CACHE_MAX_AGE_DAYS)
+CHECKPOINT_MAX_AGE = timedelta(days=CHECKPOINT_MAX_AGE_DAYS)
+
+# Responses of at least this many bytes are compressed for clients accepting br or gzip
+COMPRESSION_MINIMUM_SIZE = int(os.getenv('COMPRESSION_MINIMUM_SIZE', '1024'))
+
+# Farmers per page of the JSON farmer listing, and the largest page a client may request
+FARMER_PAGE_SIZE = 100
+MAX_FARMER_PAGE_SIZE = 10000
+FARMER_FORMATS = ("json", "ndjson", "arrow")
+
+# Sweeps run inside the request, so the API allows far smaller ones than the CLI
+MAX_API_SWEEP_RUNS = 200
+MAX_API_SWEEP_FARMERS = 10 * FARMER_COUNT
+
 app = FastAPI(
     title="Climate-Resilient Agriculture Simulation API",
     description="API for simulating climate-resilient agriculture scenarios in Bangladesh",
@@ -38,9 +70,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-# Initialize database
-init_db()
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MINIMUM_SIZE)
 
 class SimulationRequest(BaseModel):
     """Request model for simulation parameters"""
@@ -48,12 +78,39 @@ class SimulationRequest(BaseModel):
     end_date: datetime
     scenario_type: str
     parameters: Optional[Dict] = None
+    seed: Optional[int] = None
+    # Seeded requests reuse an identical stored run unless this is false
+    use_cache: bool = True
+    # Steps between checkpoints, which make the run resumable and forkable; null disables them
+    checkpoint_every: Optional[int] = CHECKPOINT_INTERVAL_DAYS
+
+class ForkRequest(BaseModel):
+    """Request model for forking a stored simulation"""
+    fork_date: datetime
+    scenario_type: Optional[str] = None
+    parameters: Optional[Dict] = None
+
+class SweepRequest(BaseModel):
+    """Request model for a parameter sweep: either a grid or Latin-hypercube bounds"""
+    scenario_type: str = "baseline"
+    start_date: datetime = SIMULATION_START_DATE
+    end_date: datetime = SIMULATION_END_DATE
+    farmer_count: int = Field(FARMER_COUNT, ge=1, le=MAX_API_SWEEP_FARMERS)
+    # Parameter name -> values; every combination is run
+    grid: Optional[Dict[str, List[float]]] = None
+    # Parameter name -> [low, high] for Latin-hypercube sampling
+    bounds: Optional[Dict[str, List[float]]] = None
+    samples: int = Field(20, ge=1, le=MAX_API_SWEEP_RUNS)
+    seed: Optional[int] = None
+    # Capped at the server's core count
+    workers: Optional[int] = Field(None, ge=1)
 
 class SimulationResponse(BaseModel):
     """Response model for simulation results"""
     simulation_id: int
-    results: Dict
-    visualizations: Dict
+    results: List[Dict]
+    visualizations: Dict = {}
+    cached: bool = False
 
 @app.get("/")
 async def read_main():
@@ -68,17 +125,13 @@ async def read_main():
 async def get_scenarios():
     """Get available simulation scenarios"""
     return {
-        "scenarios": [
-            "baseline",
-            "climate_change",
-            "technology_adoption"
-        ]
+        "scenarios": list(SCENARIOS)
     }
 
 @app.get("/simulations")
 async def get_simulations():
     """Get all simulations"""
-    session = get_session()
+    session = next(get_session())
     repository = SimulationRepository(session)
     try:
         simulations = repository.get_all_simulations()
@@ -89,7 +142,9 @@ async def get_simulations():
                     "scenario_type": sim.scenario_type,
                     "start_date": sim.start_date,
                     "end_date": sim.end_date,
-                    "parameters": sim.parameters
+                    "parameters": sim.parameters,
+                    "parent_id": sim.parent_id,
+                    "fork_date": sim.fork_date
                 }
                 for sim in simulations
             ]
@@ -97,59 +152,220 @@ async def get_simulations():
     finally:
         session.close()
 
+def _split(value: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated query parameter"""
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+def _stream_farmer_batches(simulation_id: int, limit: Optional[int], filters: Dict) -> Iterator[Tuple[int, List[Dict]]]:
+    """Farmer batches of a stream, read on a session that exists only while the stream is consumed.
+    
+    The session is opened when the first batch is requested, so a client that
+    disconnects before the body starts leaves no session or connection behind.
+    """
+    session = next(get_session())
+    try:
+        yield from SimulationRepository(session).iter_farmer_batches(simulation_id, limit=limit, **filters)
+    finally:
+        session.close()
+
 @app.get("/simulations/{simulation_id}")
-async def get_simulation(simulation_id: int):
-    """Get a specific simulation"""
-    session = get_session()
+async def get_simulation(
+    simulation_id: int,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    regions: Optional[str] = Query(None, description="Comma-separated districts"),
+    metrics: Optional[str] = Query(None, description="Comma-separated metrics"),
+    resample: Optional[str] = Query(None, description="daily, weekly or monthly"),
+    aggregation: str = Query("mean", description="mean or sum within each resampled period")
+):
+    """Get a specific simulation, optionally sliced by dates, regions and metrics.
+    
+    Without slicing parameters the stored results are returned as they are.
+    Otherwise the results are read from the per-step tables for the selected
+    districts and simulated days (both bounds inclusive) and can be resampled.
+    """
+    session = next(get_session())
     repository = SimulationRepository(session)
     try:
         simulation = repository.get_simulation(simulation_id)
         if not simulation:
             raise HTTPException(status_code=404, detail="Simulation not found")
         
-        return {
+        response = {
             "id": simulation.id,
             "scenario_type": simulation.scenario_type,
             "start_date": simulation.start_date,
             "end_date": simulation.end_date,
             "parameters": simulation.parameters,
-            "results": simulation.results
+            "parent_id": simulation.parent_id,
+            "fork_date": simulation.fork_date
+        }
+        if all(value is None for value in (start_date, end_date, regions, metrics, resample)):
+            # Stream full results step by step, so large runs are compressed and sent as they serialize
+            return StreamingResponse(stream_json(response, "results", simulation.results),
+                                     media_type="application/json")
+        
+        metric_names = _split(metrics) or list(SERIES_COLUMNS)
+        unknown = [metric for metric in metric_names if metric not in SERIES_COLUMNS]
+        if unknown:
+            raise HTTPException(status_code=422, detail=f"Unknown metrics: {', '.join(unknown)}")
+        if resample is not None and resample not in RESAMPLE_FREQUENCIES:
+            raise HTTPException(status_code=422, detail=f"resample must be one of {', '.join(RESAMPLE_FREQUENCIES)}")
+        if aggregation not in RESAMPLE_AGGREGATIONS:
+            raise HTTPException(status_code=422, detail=f"aggregation must be one of {', '.join(RESAMPLE_AGGREGATIONS)}")
+        
+        # date -> district -> region values
+        steps: Dict[datetime, Dict[str, Dict]] = {}
+        for metric in metric_names:
+            for region, timestamps, values in repository.iter_region_series(
+                    simulation_id, metric, _split(regions), start_date, end_date):
+                if resample is not None:
+                    timestamps, values = resample_series(timestamps, values, resample, aggregation)
+                for timestamp, value in zip(timestamps.astype('datetime64[s]').tolist(), values.tolist()):
+                    region_values = steps.setdefault(timestamp, {}).setdefault(
+                        region.district, {"id": region.id, "district": region.district}
+                    )
+                    region_values[metric] = None if math.isnan(value) else value
+        return {
+            **response,
+            "resample": resample,
+            "results": [
+                {"date": date.isoformat(), "regions": list(steps[date].values())}
+                for date in sorted(steps)
+            ]
         }
     finally:
         session.close()
 
 @app.post("/simulate", response_model=SimulationResponse)
 async def run_simulation(request: SimulationRequest):
-    """Run a new simulation"""
+    """Run a new simulation, or return the stored run of an identical seeded request"""
+    if request.scenario_type not in SCENARIOS:
+        raise HTTPException(status_code=422, detail=f"Unknown scenario: {request.scenario_type}")
+    if request.checkpoint_every is not None and request.checkpoint_every < 1:
+        raise HTTPException(status_code=422, detail="checkpoint_every must be positive")
+    parameters = dict(request.parameters or {})
+    if request.seed is not None:
+        parameters['seed'] = request.seed
+    key = request_key(request.scenario_type, request.start_date, request.end_date, parameters)
+    if key is not None and request.use_cache:
+        session = next(get_session())
+        try:
+            simulation = SimulationRepository(session).get_cached_simulation(key, RESULT_CACHE_MAX_AGE)
+            if simulation is not None:
+                return {"simulation_id": simulation.id, "results": simulation.results, "cached": True}
+        finally:
+            session.close()
+    engine = None
     try:
         # Initialize simulation engine
-        engine = SimulationEngine(
+        profiler = Profiler() if PROFILING_ENABLED else None
+        engine = DatabaseSimulationEngine(
             start_date=request.start_date,
             end_date=request.end_date,
             scenario_type=request.scenario_type,
-            parameters=request.parameters
+            parameters=parameters,
+            profiler=profiler
         )
+        if request.checkpoint_every is not None:
+            engine.enable_checkpoints(CHECKPOINT_DIRECTORY, request.checkpoint_every)
         
         # Run simulation
         result = engine.run()
-        
-        # Clean up
-        engine.cleanup()
+        evicted = set()
+        if key is not None:
+            cached = engine.repository.get_cached_simulation_ids()
+            engine.repository.cache_simulation(key, result['simulation_id'])
+            engine.repository.evict_result_cache(RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_MAX_AGE)
+            evicted = cached - engine.repository.get_cached_simulation_ids()
+        # Runs evicted from the cache, and runs idle for CHECKPOINT_MAX_AGE, lose their checkpoints
+        prune_checkpoints(CHECKPOINT_DIRECTORY, evicted, CHECKPOINT_MAX_AGE)
+        if profiler is not None:
+            _record_metrics(profiler)
         
         return result
     except Exception as e:
         logger.error(f"Error running simulation: {str(e)}")
+        detail = str(e)
+        if engine is not None and engine.checkpoint_dir is not None:
+            # A checkpointed run can be continued with `cli.py resume <id> --engine database`
+            detail = f"{detail} (simulation {engine.simulation.id} can be resumed from its checkpoints)"
+        raise HTTPException(status_code=500, detail=detail)
+    finally:
+        # Closing the session also rolls back the steps of an interrupted run that were not committed
+        if engine is not None:
+            engine.cleanup()
+
+@app.post("/sweeps")
+def run_sweep_request(request: SweepRequest):
+    """Run a scenario over a parameter grid or Latin-hypercube sample on a process pool.
+    
+    Returns the results as one columnar table: a ``sample`` column, one
+    column per swept parameter and one per metric, plus each parameter's
+    correlation with total production.
+    """
+    from scripts.run_sweep import grid_samples, latin_hypercube_samples, parameter_correlations, run_sweep
+    
+    if request.scenario_type not in SCENARIOS:
+        raise HTTPException(status_code=422, detail=f"Unknown scenario: {request.scenario_type}")
+    if (request.grid is None) == (request.bounds is None):
+        raise HTTPException(status_code=422, detail="Pass either grid or bounds")
+    try:
+        config = SimulationConfig().with_overrides(start_date=request.start_date, end_date=request.end_date,
+                                                   farmer_count=request.farmer_count, seed=request.seed)
+        if request.grid is not None:
+            samples = grid_samples(request.grid)
+        else:
+            if any(len(bound) != 2 for bound in request.bounds.values()):
+                raise ValueError("Bounds must be [low, high] pairs")
+            samples = latin_hypercube_samples(request.bounds, request.samples, seed=config.seed)
+        if len(samples) > MAX_API_SWEEP_RUNS:
+            raise ValueError(f"An API sweep may run at most {MAX_API_SWEEP_RUNS} samples; use the CLI for larger sweeps")
+        table = run_sweep(samples, request.scenario_type, config, workers=request.workers, progress=False)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {
+        "scenario_type": request.scenario_type,
+        "runs": len(samples),
+        "table": table,
+        "correlations": parameter_correlations(table)
+    }
+
+@app.post("/simulations/{simulation_id}/fork")
+async def fork_simulation(simulation_id: int, request: ForkRequest):
+    """Fork a stored simulation at a date, re-simulating only the steps after it"""
+    try:
+        engine = DatabaseSimulationEngine.fork(
+            simulation_id,
+            request.fork_date,
+            scenario_type=request.scenario_type,
+            parameters=request.parameters,
+            directory=CHECKPOINT_DIRECTORY
+        )
+    except (ValueError, FileNotFoundError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        result = engine.run()
+        return {**result, "parent_id": simulation_id}
+    except Exception as e:
+        logger.error(f"Error running forked simulation: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        engine.cleanup()
 
 @app.delete("/simulations/{simulation_id}")
 async def delete_simulation(simulation_id: int):
     """Delete a simulation"""
-    session = get_session()
+    session = next(get_session())
     repository = SimulationRepository(session)
     try:
         success = repository.delete_simulation(simulation_id)
         if not success:
             raise HTTPException(status_code=404, detail="Simulation not found")
+        # A later simulation may reuse the id, so its checkpoints must not outlive it
+        prune_checkpoints(CHECKPOINT_DIRECTORY, [simulation_id])
         return {"message": "Simulation deleted successfully"}
     finally:
         session.close()
@@ -157,7 +373,7 @@ async def delete_simulation(simulation_id: int):
 @app.get("/simulations/{simulation_id}/regions")
 async def get_simulation_regions(simulation_id: int):
     """Get regions for a simulation"""
-    session = get_session()
+    session = next(get_session())
     repository = SimulationRepository(session)
     try:
         regions = repository.get_simulation_regions(simulation_id)
@@ -168,22 +384,67 @@ async def get_simulation_regions(simulation_id: int):
         session.close()
 
 @app.get("/simulations/{simulation_id}/farmers")
-async def get_simulation_farmers(simulation_id: int):
-    """Get farmers for a simulation"""
-    session = get_session()
+async def get_simulation_farmers(
+    simulation_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    district: Optional[str] = None,
+    irrigation_type: Optional[str] = None,
+    min_adoption: Optional[float] = Query(None, description="Minimum technology adoption level"),
+    max_adoption: Optional[float] = Query(None, description="Maximum technology adoption level"),
+    after: Optional[int] = Query(None, description="Farmer id to continue after (from next_after)"),
+    limit: Optional[int] = Query(None, ge=1, description="Farmers per page, or in total for streams"),
+    format: str = Query("json", description="json (one page), ndjson or arrow (streams)")
+):
+    """Get a simulation's farmers with projection, filters and keyset pagination.
+    
+    JSON returns one page and the ``next_after`` id of the following page;
+    ndjson and arrow stream every matching farmer in batches.
+    """
+    field_names = _split(fields) or list(FARMER_FIELDS)
+    unknown = [field for field in field_names if field not in FARMER_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown fields: {', '.join(unknown)}")
+    if format not in FARMER_FORMATS:
+        raise HTTPException(status_code=422, detail=f"format must be one of {', '.join(FARMER_FORMATS)}")
+    if format == "arrow" and not arrow_available():
+        raise HTTPException(status_code=406, detail="Arrow output requires the pyarrow package")
+    
+    filters = {
+        "fields": field_names,
+        "district": district,
+        "irrigation_type": irrigation_type,
+        "min_adoption": min_adoption,
+        "max_adoption": max_adoption,
+        "after_id": after
+    }
+    session = next(get_session())
     repository = SimulationRepository(session)
     try:
-        farmers = repository.get_simulation_farmers(simulation_id)
-        if not farmers:
-            raise HTTPException(status_code=404, detail="No farmers found")
-        return {"farmers": farmers}
+        if not repository.get_simulation(simulation_id):
+            raise HTTPException(status_code=404, detail="Simulation not found")
+        if format == "json":
+            page_size = min(limit or FARMER_PAGE_SIZE, MAX_FARMER_PAGE_SIZE)
+            last_id, farmers = next(
+                repository.iter_farmer_batches(simulation_id, limit=page_size, batch_size=page_size, **filters),
+                (None, [])
+            )
+            return {
+                "farmers": farmers,
+                "next_after": last_id if len(farmers) == page_size else None
+            }
     finally:
         session.close()
+    
+    batches = _stream_farmer_batches(simulation_id, limit, filters)
+    if format == "ndjson":
+        return StreamingResponse(stream_ndjson(batches), media_type=NDJSON_MEDIA_TYPE)
+    columns = {field: FARMER_FIELDS[field] for field in field_names}
+    return StreamingResponse(stream_arrow(batches, columns), media_type=ARROW_MEDIA_TYPE)
 
 @app.get("/simulations/{simulation_id}/policies")
 async def get_simulation_policies(simulation_id: int):
     """Get policies for a simulation"""
-    session = get_session()
+    session = next(get_session())
     repository = SimulationRepository(session)
     try:
         policies = repository.get_simulation_policies(simulation_id)
@@ -193,6 +454,68 @@ async def get_simulation_policies(simulation_id: int):
     finally:
         session.close()
 
+@app.get("/simulations/{simulation_id}/summary")
+async def get_simulation_summary(simulation_id: int, monthly: bool = False):
+    """Get per-region (and optionally monthly) metrics of a simulation from its summary table"""
+    session = next(get_session())
+    repository = SimulationRepository(session)
+    try:
+        simulation = repository.get_simulation(simulation_id)
+        if not simulation:
+            raise HTTPException(status_code=404, detail="Simulation not found")
+        return {
+            "simulation_id": simulation.id,
+            "scenario_type": simulation.scenario_type,
+            **repository.get_simulation_summary(simulation_id, monthly=monthly)
+        }
+    finally:
+        session.close()
+
+@app.get("/compare")
+async def compare_simulations(ids: str = Query(..., description="Comma-separated simulation ids")):
+    """Compare whole-simulation metrics of several simulations from their summary tables"""
+    try:
+        simulation_ids = [int(item) for item in ids.split(',') if item.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be comma-separated integers")
+    session = next(get_session())
+    repository = SimulationRepository(session)
+    try:
+        comparison = repository.compare_simulations(simulation_ids)
+        simulations = []
+        for simulation_id in simulation_ids:
+            simulation = repository.get_simulation(simulation_id)
+            if not simulation:
+                raise HTTPException(status_code=404, detail=f"Simulation {simulation_id} not found")
+            simulations.append({
+                "simulation_id": simulation_id,
+                "scenario_type": simulation.scenario_type,
+                **(comparison.get(simulation_id) or {})
+            })
+        return {"simulations": simulations}
+    finally:
+        session.close()
+
+def _record_metrics(profiler: Profiler) -> None:
+    """Add a run's profile to this worker's metrics and export them for the other workers"""
+    METRICS.merge(profiler)
+    if METRICS_DIRECTORY:
+        METRICS.save(Path(METRICS_DIRECTORY) / f"{os.getpid()}.json")
+
+def _collected_metrics() -> Profiler:
+    """Metrics of every worker process"""
+    if not METRICS_DIRECTORY:
+        return METRICS
+    combined = Profiler()
+    for path in Path(METRICS_DIRECTORY).glob("*.json"):
+        combined.merge(Profiler.load(path))
+    return combined
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Get simulation phase timings and counters in Prometheus text format"""
+    return PlainTextResponse(_collected_metrics().to_prometheus(), media_type="text/plain; version=0.0.4")
+
 @app.get("/regions")
 async def get_regions():
     """Get available regions"""
@@ -216,40 +539,42 @@ async def get_policies():
         "policy_types": POLICY_TYPES
     }
 
-def generate_visualizations(results: dict, output_dir: Path, visualizer: SimulationVisualizer):
+def generate_visualizations(results: dict, output_dir: Path, visualizer: "SimulationVisualizer",
+                            regions: Dict):
     """Generate all visualizations for the simulation results"""
     # Climate impact visualization
-    climate_data = {region: {date: data['climate_impact'] 
+    climate_data = {region: {date: data[region]
                            for date, data in results.items()}
-                   for region in DISTRICTS}
-    visualizer.plot_climate_impact(climate_data, 
-                                 save_path=output_dir / "climate_impact.png")
+                   for region in regions}
     
     # Production trends visualization
-    production_data = {region: {date: {'production': data['production'],
-                                     'market_price': data['market_price']}
+    production_data = {region: {date: {'production': data[region]['production'],
+                                     'market_price': data[region]['market_price']}
                               for date, data in results.items()}
-                      for region in DISTRICTS}
-    visualizer.plot_production_trends(production_data,
-                                    save_path=output_dir / "production_trends.png")
+                      for region in regions}
     
     # Risk map
-    locations = {region: {'latitude': results[SIMULATION_START_DATE][region]['latitude'],
-                         'longitude': results[SIMULATION_START_DATE][region]['longitude'],
-                         'drought_risk': results[SIMULATION_END_DATE][region]['climate_impact']['drought_risk'],
-                         'flood_risk': results[SIMULATION_END_DATE][region]['climate_impact']['flood_risk']}
-                for region in DISTRICTS}
-    visualizer.create_risk_map(locations,
-                              save_path=output_dir / "risk_map.html")
+    final_results = results[max(results)]
+    locations = {region: {'latitude': regions[region].latitude,
+                         'longitude': regions[region].longitude,
+                         'drought_risk': final_results[region]['climate_impact']['drought_risk'],
+                         'flood_risk': final_results[region]['climate_impact']['flood_risk']}
+                for region in regions}
     
     # Create comprehensive dashboard
     dashboard_data = {
         'climate_data': climate_data,
         'production_data': production_data,
-        'market_data': {region: {date: data['market_price']
+        'market_data': {region: {date: data[region]['market_price']
                                for date, data in results.items()}
-                       for region in DISTRICTS},
+                       for region in regions},
         'risk_data': locations
     }
-    visualizer.create_dashboard(dashboard_data,
-                              save_path=output_dir / "dashboard.png") 
\ No newline at end of file
+    
+    # Render stale charts concurrently with headless workers; unchanged ones are skipped
+    RenderCache().render(visualizer, [
+        ('plot_climate_impact', (climate_data,), {'save_path': output_dir / "climate_impact.png"}),
+        ('plot_production_trends', (production_data,), {'save_path': output_dir / "production_trends.png"}),
+        ('create_risk_map', (locations,), {'save_path': output_dir / "risk_map.html"}),
+        ('create_dashboard', (dashboard_data,), {'save_path': output_dir / "dashboard.png"})
+    ])
@@ -0,0 +1,98 @@
+import importlib.util
+import io
+import json
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import JSON, Boolean, Column, DateTime, Float, Integer
+
+# Target size of the chunks of streamed responses
+STREAM_CHUNK_SIZE = 64 * 1024
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def stream_json(fields: Dict, key: str, items: Optional[Iterable]) -> Iterator[bytes]:
+    """Serialize ``{**fields, key: list(items)}`` incrementally in chunks of about STREAM_CHUNK_SIZE bytes"""
+    head = json.dumps({**jsonable_encoder(fields), key: None})
+    if items is None:
+        yield head.encode()
+        return
+    # Replace the trailing "null}" with the streamed list
+    chunk = [head[:-len("null}")], "["]
+    size = 0
+    for i, item in enumerate(items):
+        part = (", " if i else "") + json.dumps(item, default=str)
+        chunk.append(part)
+        size += len(part)
+        if size >= STREAM_CHUNK_SIZE:
+            yield "".join(chunk).encode()
+            chunk, size = [], 0
+    chunk.append("]}")
+    yield "".join(chunk).encode()
+
+def stream_ndjson(batches: Iterable[Tuple[int, List[Dict]]],
+                  on_close: Optional[Callable[[], None]] = None) -> Iterator[bytes]:
+    """Serialize row batches as newline-delimited JSON, one chunk per batch"""
+    try:
+        for _, rows in batches:
+            yield "".join(json.dumps(row, default=str) + "\n" for row in rows).encode()
+    finally:
+        if on_close is not None:
+            on_close()
+
+def arrow_available() -> bool:
+    """Whether the optional pyarrow package is installed, without importing it"""
+    return importlib.util.find_spec("pyarrow") is not None
+
+def _arrow_type(pa, column: Column):
+    """Arrow type of a SQLAlchemy column"""
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column.type, JSON):
+        # JSON columns of listed rows hold lists of names (e.g. crops grown)
+        return pa.list_(pa.string())
+    return pa.string()
+
+class _ChunkSink(io.RawIOBase):
+    """File-like sink collecting written bytes until they are taken"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+def stream_arrow(batches: Iterable[Tuple[int, List[Dict]]], columns: Dict[str, Column],
+                 on_close: Optional[Callable[[], None]] = None) -> Iterator[bytes]:
+    """Serialize row batches as an Arrow IPC stream, one record batch per row batch"""
+    if not arrow_available():
+        raise RuntimeError("Arrow streams require the pyarrow package")
+    # Imported on first use; pyarrow is large and most listings are JSON
+    import pyarrow as pa
+    schema = pa.schema([(name, _arrow_type(pa, column)) for name, column in columns.items()])
+    sink = _ChunkSink()
+    try:
+        with pa.ipc.new_stream(sink, schema) as writer:
+            for _, rows in batches:
+                writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+                yield sink.take()
+        yield sink.take()
+    finally:
+        if on_close is not None:
+            on_close()
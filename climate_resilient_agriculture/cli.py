@@ -1,7 +1,8 @@
 import click
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
+import subprocess
 import sys
 import os
 
@@ -10,13 +11,11 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.simulation.engine import SimulationEngine
 from core.utils.data_generator import DataGenerator
-from analysis.visualization import SimulationVisualizer
 from config.simulation_config import *
-from scripts.run_scenarios import (
-    run_baseline_scenario,
-    run_climate_change_scenario,
-    run_technology_adoption_scenario
-)
+from core.utils.profiling import Profiler
+from core.utils.result_cache import prune_artifacts, request_key, restore_artifacts, store_artifacts
+from core.simulation.scenarios import SCENARIOS
+from scripts.run_scenarios import SCENARIO_ARTIFACTS, summarize_results, run_scenario, run_scenarios
 
 @click.group()
 def cli():
@@ -24,7 +23,7 @@ def cli():
     pass
 
 @cli.command()
-@click.option('--scenario', type=click.Choice(['baseline', 'climate_change', 'technology_adoption']),
+@click.option('--scenario', type=click.Choice(list(SCENARIOS)),
               default='baseline', help='Scenario to run')
 @click.option('--start-date', type=click.DateTime(), default=SIMULATION_START_DATE,
               help='Simulation start date')
@@ -34,52 +33,45 @@ def cli():
               help='Number of farmers to simulate')
 @click.option('--output-dir', type=click.Path(), default=OUTPUT_DIRECTORY,
               help='Output directory for results')
-def run_simulation(scenario, start_date, end_date, farmer_count, output_dir):
+@click.option('--profile', is_flag=True, help='Time simulation phases and print a summary')
+@click.option('--checkpoint-every', type=int, default=None,
+              help='Write a resumable checkpoint every N steps (database runs default to CHECKPOINT_INTERVAL_DAYS)')
+@click.option('--no-cache', is_flag=True,
+              help='Run even if an identical run is cached (profiled runs always run)')
+@click.option('--engine', type=click.Choice(['memory', 'database']), default='memory',
+              help='Engine to run: in memory, or stored step by step in the database')
+@click.option('--checkpoint-dir', type=click.Path(), default=CHECKPOINT_DIRECTORY,
+              help='Directory for the checkpoints')
+def run_simulation(scenario, start_date, end_date, farmer_count, output_dir, profile, checkpoint_every, no_cache,
+                   engine, checkpoint_dir):
     """Run a simulation scenario"""
-    click.echo(f"Running {scenario} scenario...")
-    
-    # Update configuration
-    global SIMULATION_START_DATE, SIMULATION_END_DATE, FARMER_COUNT, OUTPUT_DIRECTORY
-    SIMULATION_START_DATE = start_date
-    SIMULATION_END_DATE = end_date
-    FARMER_COUNT = farmer_count
-    OUTPUT_DIRECTORY = output_dir
-    
-    # Run selected scenario
-    if scenario == 'baseline':
-        results = run_baseline_scenario()
-    elif scenario == 'climate_change':
-        results = run_climate_change_scenario()
-    else:
-        results = run_technology_adoption_scenario()
+    config = _run_config(start_date, end_date, farmer_count, output_dir, checkpoint_dir)
+    if engine == 'database':
+        _run_database_simulation(scenario, config, profile, checkpoint_every)
+        return
     
-    # Calculate and display summary
-    total_production = sum(results[SIMULATION_END_DATE][region]['production']
-                          for region in DISTRICTS)
-    average_price = sum(results[SIMULATION_END_DATE][region]['market_price']
-                       for region in DISTRICTS) / len(DISTRICTS)
-    average_risk = sum((results[SIMULATION_END_DATE][region]['climate_impact']['drought_risk'] +
-                       results[SIMULATION_END_DATE][region]['climate_impact']['flood_risk']) / 2
-                      for region in DISTRICTS) / len(DISTRICTS)
+    # Identical runs are served from the result cache, which keeps their output files too
+    parameters = {'farmer_count': config.farmer_count, 'seed': config.seed}
+    key = request_key(scenario, start_date, end_date, parameters, engine='memory')
+    run_dir = Path(output_dir) / scenario
+    use_cache = not (no_cache or profile)
+    summary = _cached_summary(key) if use_cache else None
+    if summary is not None and restore_artifacts(RESULT_CACHE_DIRECTORY, key, run_dir):
+        click.echo(f"Using cached {scenario} run")
+    else:
+        click.echo(f"Running {scenario} scenario...")
+        summary = _run_scenario(scenario, config, profile, checkpoint_every)
+        store_artifacts(RESULT_CACHE_DIRECTORY, key, run_dir, SCENARIO_ARTIFACTS)
+        _cache_summary(key, summary)
     
     click.echo("\nSimulation Results:")
     click.echo("==================")
-    click.echo(f"Total Production: {total_production:.2f} tons")
-    click.echo(f"Average Price: {average_price:.2f} BDT/ton")
-    click.echo(f"Average Risk: {average_risk:.2%}")
+    click.echo(f"Total Production: {summary['total_production']:.2f} tons")
+    click.echo(f"Average Price: {summary['average_price']:.2f} BDT/ton")
+    click.echo(f"Average Risk: {summary['average_risk']:.2%}")
     
     # Save summary to file
-    summary = {
-        'scenario': scenario,
-        'start_date': start_date.isoformat(),
-        'end_date': end_date.isoformat(),
-        'farmer_count': farmer_count,
-        'total_production': total_production,
-        'average_price': average_price,
-        'average_risk': average_risk
-    }
-    
-    output_path = Path(output_dir) / scenario / 'summary.json'
+    output_path = run_dir / 'summary.json'
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
     with open(output_path, 'w') as f:
@@ -87,6 +79,76 @@ def run_simulation(scenario, start_date, end_date, farmer_count, output_dir):
     
     click.echo(f"\nResults saved to: {output_path}")
 
+def _run_database_simulation(scenario, config, profile, checkpoint_every):
+    """Run a scenario on the database engine, stored and checkpointed step by step"""
+    from core.database.session import init_db
+    from core.simulation_engine import SimulationEngine as DatabaseSimulationEngine
+    init_db()
+    profiler = Profiler() if profile else None
+    simulation = DatabaseSimulationEngine(config.start_date, config.end_date, scenario_type=scenario,
+                                          parameters={'seed': config.seed, 'farmer_count': config.farmer_count},
+                                          profiler=profiler)
+    try:
+        # Database runs are always checkpointed, so they can be resumed and forked
+        simulation.enable_checkpoints(config.checkpoint_directory, checkpoint_every or CHECKPOINT_INTERVAL_DAYS)
+        click.echo(f"Checkpointing as simulation {simulation.simulation.id}")
+        click.echo(f"Running {scenario} scenario on the database engine...")
+        results = simulation.run()
+    finally:
+        simulation.cleanup()
+    click.echo(f"\nStored {len(results['results'])} steps for simulation {results['simulation_id']}")
+    
+    if profiler is not None:
+        click.echo("\nProfile:")
+        click.echo(profiler.format_table())
+
+def _run_config(start_date, end_date, farmer_count, output_dir, checkpoint_dir=None):
+    """Settings of a run from the command-line options"""
+    return SimulationConfig().with_overrides(start_date=start_date, end_date=end_date, farmer_count=farmer_count,
+                                             output_directory=output_dir, checkpoint_directory=checkpoint_dir)
+
+def _run_scenario(scenario, config, profile, checkpoint_every):
+    """Run one scenario and return its summary"""
+    profiler = Profiler() if profile else None
+    results = run_scenario(scenario, config, profiler=profiler, checkpoint_every=checkpoint_every)
+    
+    if profiler is not None:
+        click.echo("\nProfile:")
+        click.echo(profiler.format_table())
+    
+    return {
+        'scenario': scenario,
+        'start_date': config.start_date.isoformat(),
+        'end_date': config.end_date.isoformat(),
+        'farmer_count': config.farmer_count,
+        **summarize_results(results)
+    }
+
+def _cached_summary(key):
+    """Summary of the cached run for a request key, if any"""
+    from core.database.session import get_session, init_db
+    from core.database.repository import SimulationRepository
+    init_db()
+    session = next(get_session())
+    try:
+        return SimulationRepository(session).get_cached_summary(key, timedelta(days=RESULT_CACHE_MAX_AGE_DAYS))
+    finally:
+        session.close()
+
+def _cache_summary(key, summary):
+    """Cache a run's summary under the request key; in-memory runs are not stored as simulations"""
+    from core.database.session import get_session, init_db
+    from core.database.repository import SimulationRepository
+    init_db()
+    session = next(get_session())
+    try:
+        repository = SimulationRepository(session)
+        repository.cache_summary(key, summary)
+        repository.evict_result_cache(RESULT_CACHE_MAX_ENTRIES, timedelta(days=RESULT_CACHE_MAX_AGE_DAYS))
+        prune_artifacts(RESULT_CACHE_DIRECTORY, repository.get_cache_keys())
+    finally:
+        session.close()
+
 @cli.command()
 @click.option('--start-date', type=click.DateTime(), default=SIMULATION_START_DATE,
               help='Simulation start date')
@@ -96,52 +158,20 @@ def run_simulation(scenario, start_date, end_date, farmer_count, output_dir):
               help='Number of farmers to simulate')
 @click.option('--output-dir', type=click.Path(), default=OUTPUT_DIRECTORY,
               help='Output directory for results')
-def run_all_scenarios(start_date, end_date, farmer_count, output_dir):
+@click.option('--profile', is_flag=True, help='Time simulation phases and print a summary')
+@click.option('--checkpoint-every', type=int, default=None,
+              help='Write a resumable checkpoint every N steps')
+def run_all_scenarios(start_date, end_date, farmer_count, output_dir, profile, checkpoint_every):
     """Run all simulation scenarios and compare results"""
     click.echo("Running all scenarios...")
     
-    # Update configuration
-    global SIMULATION_START_DATE, SIMULATION_END_DATE, FARMER_COUNT, OUTPUT_DIRECTORY
-    SIMULATION_START_DATE = start_date
-    SIMULATION_END_DATE = end_date
-    FARMER_COUNT = farmer_count
-    OUTPUT_DIRECTORY = output_dir
-    
-    # Run all scenarios
-    baseline_results = run_baseline_scenario()
-    climate_change_results = run_climate_change_scenario()
-    technology_adoption_results = run_technology_adoption_scenario()
+    # Run all scenarios on one shared generation pass
+    profiler = Profiler() if profile else None
+    results = run_scenarios(config=_run_config(start_date, end_date, farmer_count, output_dir),
+                            profiler=profiler, checkpoint_every=checkpoint_every)
     
     # Compare results
-    comparison = {
-        'baseline': {
-            'total_production': sum(baseline_results[SIMULATION_END_DATE][region]['production']
-                                  for region in DISTRICTS),
-            'average_price': sum(baseline_results[SIMULATION_END_DATE][region]['market_price']
-                               for region in DISTRICTS) / len(DISTRICTS),
-            'average_risk': sum((baseline_results[SIMULATION_END_DATE][region]['climate_impact']['drought_risk'] +
-                               baseline_results[SIMULATION_END_DATE][region]['climate_impact']['flood_risk']) / 2
-                              for region in DISTRICTS) / len(DISTRICTS)
-        },
-        'climate_change': {
-            'total_production': sum(climate_change_results[SIMULATION_END_DATE][region]['production']
-                                  for region in DISTRICTS),
-            'average_price': sum(climate_change_results[SIMULATION_END_DATE][region]['market_price']
-                               for region in DISTRICTS) / len(DISTRICTS),
-            'average_risk': sum((climate_change_results[SIMULATION_END_DATE][region]['climate_impact']['drought_risk'] +
-                               climate_change_results[SIMULATION_END_DATE][region]['climate_impact']['flood_risk']) / 2
-                              for region in DISTRICTS) / len(DISTRICTS)
-        },
-        'technology_adoption': {
-            'total_production': sum(technology_adoption_results[SIMULATION_END_DATE][region]['production']
-                                  for region in DISTRICTS),
-            'average_price': sum(technology_adoption_results[SIMULATION_END_DATE][region]['market_price']
-                               for region in DISTRICTS) / len(DISTRICTS),
-            'average_risk': sum((technology_adoption_results[SIMULATION_END_DATE][region]['climate_impact']['drought_risk'] +
-                               technology_adoption_results[SIMULATION_END_DATE][region]['climate_impact']['flood_risk']) / 2
-                              for region in DISTRICTS) / len(DISTRICTS)
-        }
-    }
+    comparison = {scenario: summarize_results(scenario_results) for scenario, scenario_results in results.items()}
     
     # Display comparison
     click.echo("\nScenario Comparison Results:")
@@ -160,12 +190,151 @@ def run_all_scenarios(start_date, end_date, farmer_count, output_dir):
         json.dump(comparison, f, indent=4)
     
     click.echo(f"\nComparison results saved to: {output_path}")
+    
+    if profiler is not None:
+        click.echo("\nProfile:")
+        click.echo(profiler.format_table())
+
+@cli.command()
+@click.argument('simulation_id')
+@click.option('--engine', type=click.Choice(['memory', 'database']), default='memory',
+              help='Engine that wrote the checkpoints')
+@click.option('--checkpoint-dir', type=click.Path(), default=CHECKPOINT_DIRECTORY,
+              help='Directory holding the checkpoints')
+@click.option('--output-dir', type=click.Path(), default=OUTPUT_DIRECTORY,
+              help='Output directory for results')
+def resume(simulation_id, engine, checkpoint_dir, output_dir):
+    """Resume an interrupted simulation from its latest checkpoint"""
+    if engine == 'memory':
+        simulation = SimulationEngine.resume(simulation_id, checkpoint_dir)
+    else:
+        from core.simulation_engine import SimulationEngine as DatabaseSimulationEngine
+        simulation = DatabaseSimulationEngine.resume(int(simulation_id), checkpoint_dir)
+    click.echo(f"Resuming simulation {simulation_id} at {simulation.current_date.date()}...")
+    
+    if engine == 'memory':
+        results = simulation.run_full_simulation()
+        output_path = Path(output_dir) / 'resumed' / simulation_id / 'simulation_results.json'
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w') as f:
+            json.dump({date.isoformat(): data for date, data in results.items()}, f, default=str)
+        click.echo(f"\nResults saved to: {output_path}")
+    else:
+        results = simulation.run()
+        simulation.cleanup()
+        click.echo(f"\nStored {len(results['results'])} steps for simulation {results['simulation_id']}")
+
+@cli.command()
+@click.argument('simulation_id', type=int)
+@click.option('--date', 'fork_date', type=click.DateTime(formats=['%Y-%m-%d']), required=True,
+              help='Date from which the fork follows the new scenario (YYYY-MM-DD)')
+@click.option('--scenario', type=click.Choice(list(SCENARIOS)),
+              help='Scenario of the fork (defaults to the parent\'s)')
+@click.option('--checkpoint-dir', type=click.Path(), default=CHECKPOINT_DIRECTORY,
+              help='Directory holding the checkpoints')
+def fork(simulation_id, fork_date, scenario, checkpoint_dir):
+    """Fork a stored simulation at a date, re-simulating only the remaining steps"""
+    from core.simulation_engine import SimulationEngine as DatabaseSimulationEngine
+    simulation = DatabaseSimulationEngine.fork(simulation_id, fork_date, scenario_type=scenario,
+                                               directory=checkpoint_dir)
+    click.echo(f"Forked simulation {simulation_id} into {simulation.simulation.id}, "
+               f"continuing from {simulation.current_date.date()}...")
+    results = simulation.run()
+    simulation.cleanup()
+    click.echo(f"\nStored {len(results['results'])} steps for simulation {results['simulation_id']}")
+
+def _int_list(ctx, param, value):
+    """Parse a comma-separated list of integers"""
+    try:
+        return [int(item) for item in value.split(',') if item]
+    except ValueError:
+        raise click.BadParameter('expected comma-separated integers')
+
+@cli.command()
+@click.option('--engine', 'engines', type=click.Choice(['memory', 'database']), multiple=True,
+              default=['memory', 'database'], help='Engine(s) to measure')
+@click.option('--farmers', default='1000,10000,100000,1000000', callback=_int_list,
+              help='Comma-separated farmer counts')
+@click.option('--regions', default='10,50,500', callback=_int_list,
+              help='Comma-separated region counts')
+@click.option('--years', default='1,5,30', callback=_int_list,
+              help='Comma-separated horizons in years')
+@click.option('--timeout', type=float, default=600,
+              help='Seconds before a single configuration is stopped')
+@click.option('--output-dir', type=click.Path(), default=OUTPUT_DIRECTORY,
+              help='Output directory for results')
+def bench_scale(engines, farmers, regions, years, timeout, output_dir):
+    """Measure engine throughput, peak memory and DB size across scales"""
+    from scripts.bench_scale import run_scaling
+    from analysis.visualization import SimulationVisualizer
+    
+    output_path = Path(output_dir) / 'scaling'
+    output_path.mkdir(parents=True, exist_ok=True)
+    
+    click.echo("Running scaling sweep...")
+    rows = run_scaling(engines, farmers, regions, years, timeout=timeout,
+                       output_path=output_path / 'scaling.csv', progress=click.echo)
+    SimulationVisualizer(headless=True).plot_scaling(rows, save_path=output_path / 'scaling.png')
+    
+    click.echo(f"\nScaling results saved to: {output_path}")
+
+@cli.command()
+@click.option('--scenario', type=click.Choice(list(SCENARIOS)), default='baseline',
+              help='Scenario whose parameters are varied')
+@click.option('--grid', multiple=True, metavar='NAME=V1,V2,...',
+              help='Values of a parameter; every combination of the grids is run')
+@click.option('--lhs', multiple=True, metavar='NAME=LOW:HIGH',
+              help='Bounds of a parameter for Latin-hypercube sampling')
+@click.option('--samples', type=int, default=20, help='Number of Latin-hypercube samples')
+@click.option('--start-date', type=click.DateTime(), default=SIMULATION_START_DATE,
+              help='Simulation start date')
+@click.option('--end-date', type=click.DateTime(), default=SIMULATION_END_DATE,
+              help='Simulation end date')
+@click.option('--farmer-count', type=int, default=FARMER_COUNT,
+              help='Number of farmers to simulate')
+@click.option('--workers', type=int, default=None, help='Worker processes (default: number of cores)')
+@click.option('--output-dir', type=click.Path(), default=OUTPUT_DIRECTORY,
+              help='Output directory for results')
+def sweep(scenario, grid, lhs, samples, start_date, end_date, farmer_count, workers, output_dir):
+    """Run a scenario over a parameter grid or Latin-hypercube sample"""
+    from scripts.run_sweep import (
+        SWEEP_PARAMETERS, grid_samples, latin_hypercube_samples, parameter_correlations,
+        parse_bounds, parse_grid, run_sweep, write_table
+    )
+    
+    config = _run_config(start_date, end_date, farmer_count, output_dir)
+    if bool(grid) == bool(lhs):
+        raise click.UsageError(f"Pass either --grid or --lhs options (parameters: {', '.join(SWEEP_PARAMETERS)})")
+    try:
+        if grid:
+            sweep_samples = grid_samples(parse_grid(grid))
+        else:
+            sweep_samples = latin_hypercube_samples(parse_bounds(lhs), samples, seed=config.seed)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    
+    click.echo(f"Running {len(sweep_samples)} {scenario} runs...")
+    table = run_sweep(sweep_samples, scenario, config, workers=workers)
+    output_path = write_table(table, Path(output_dir) / 'sweep' / f'{scenario}.csv')
+    
+    click.echo("\nCorrelation with total production:")
+    for name, correlation in parameter_correlations(table).items():
+        click.echo(f"{name:<28}{correlation:>8.3f}")
+    click.echo(f"\nSweep results saved to: {output_path}")
 
 @cli.command()
-def start_api():
+@click.option('--workers', type=int, default=None,
+              help='Worker processes (default: WEB_CONCURRENCY or the number of cores)')
+@click.option('--reload', is_flag=True, help='Development mode: one worker restarted on code changes')
+def start_api(workers, reload):
     """Start the FastAPI server"""
     click.echo("Starting API server...")
-    os.system("python scripts/run_api.py")
+    command = [sys.executable, str(Path(__file__).parent / 'scripts' / 'run_api.py')]
+    if workers is not None:
+        command += ['--workers', str(workers)]
+    if reload:
+        command.append('--reload')
+    sys.exit(subprocess.call(command))
 
 if __name__ == '__main__':
     cli() 
\ No newline at end of file
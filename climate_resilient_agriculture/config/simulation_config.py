@@ -1,11 +1,16 @@
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Tuple
+import dataclasses
+import os
 
 # Simulation time parameters
 SIMULATION_START_DATE = datetime(2024, 1, 1)
 SIMULATION_END_DATE = datetime(2024, 12, 31)
 SIMULATION_TIME_STEP = timedelta(days=1)
 
+# Seed of generated inputs and weather draws, which makes runs reproducible
+SIMULATION_SEED = 42
+
 # Region parameters
 DISTRICTS = [
     "Dhaka", "Chittagong", "Khulna", "Rajshahi", "Barishal",
@@ -81,4 +86,50 @@ SALINITY_RISK_THRESHOLD = 0.6
 
 # Output parameters
 OUTPUT_DIRECTORY = "output"
-VISUALIZATION_FORMATS = ["png", "html", "json"] 
\ No newline at end of file
+VISUALIZATION_FORMATS = ["png", "html", "json"] 
+
+# Checkpoint parameters
+# Absolute root of the checkpoints, so every process finds them wherever it was started
+CHECKPOINT_DIRECTORY = os.path.abspath(os.getenv(
+    'CHECKPOINT_DIRECTORY', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'checkpoints')
+))
+CHECKPOINT_INTERVAL_DAYS = 365  # simulation steps between checkpoints
+CHECKPOINT_MAX_AGE_DAYS = 30  # database runs without a newer checkpoint lose theirs after this long
+
+# Result cache parameters
+RESULT_CACHE_MAX_ENTRIES = 1000  # cached runs kept, least recently used evicted first
+RESULT_CACHE_MAX_AGE_DAYS = 30
+RESULT_CACHE_DIRECTORY = "result_cache"  # output files of cached CLI runs, by request key
+
+@dataclasses.dataclass(frozen=True)
+class SimulationConfig:
+    """Settings of one run: the defaults above plus per-run overrides.
+
+    Runs receive a config explicitly instead of reading or rebinding the
+    module globals, so runs with different settings can share a process.
+    """
+
+    start_date: datetime = SIMULATION_START_DATE
+    end_date: datetime = SIMULATION_END_DATE
+    time_step: timedelta = SIMULATION_TIME_STEP
+    seed: int = SIMULATION_SEED
+    districts: Tuple[str, ...] = tuple(DISTRICTS)
+    farmer_count: int = FARMER_COUNT
+    infrastructure_per_district: int = INFRASTRUCTURE_PER_DISTRICT
+    policy_count: int = POLICY_COUNT
+    output_directory: str = OUTPUT_DIRECTORY
+    checkpoint_directory: str = CHECKPOINT_DIRECTORY
+
+    def __post_init__(self):
+        if self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        if self.time_step <= timedelta(0):
+            raise ValueError("time_step must be positive")
+        if self.farmer_count < 0:
+            raise ValueError("farmer_count must not be negative")
+        # Accept any sequence of districts but keep the config hashable
+        object.__setattr__(self, "districts", tuple(self.districts))
+
+    def with_overrides(self, **overrides) -> "SimulationConfig":
+        """Return a copy with some settings changed; None leaves a setting as it is"""
+        return dataclasses.replace(self, **{name: value for name, value in overrides.items() if value is not None})
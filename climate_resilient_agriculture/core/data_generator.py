@@ -1,13 +1,20 @@
 import random
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
-from climate_resilient_agriculture.config.simulation_config import DISTRICTS, AGRO_ECOLOGICAL_ZONES
+from typing import Dict, List, Any, Optional
+import numpy as np
+from .settings import (
+    DISTRICTS, AGRO_ECOLOGICAL_ZONES
+)
+from .simulation.scenarios import BASELINE, SCENARIOS
+from .utils.profiling import NULL_PROFILER, Profiler
 
 class DataGenerator:
     """Generates data for climate-resilient agriculture simulation."""
     
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None):
         """Initialize the data generator."""
+        self.random = random.Random(seed)
+        self.rng = np.random.default_rng(seed)
         self.districts = [
             "Dhaka", "Chittagong", "Rajshahi", "Khulna", "Barishal",
             "Sylhet", "Rangpur", "Mymensingh", "Comilla", "Noakhali"
@@ -29,10 +36,10 @@ class DataGenerator:
     def generate_climate_data(self, start_date: datetime, end_date: datetime) -> list:
         """Generate climate data records for a region and time period, matching ClimateData model fields."""
         # Pre-generate random values for efficiency
-        temp_value = round(random.uniform(20.0, 35.0), 2)
-        temp_ci = [round(random.uniform(-0.5, 0.5), 2), round(random.uniform(-0.5, 0.5), 2)]
-        rain_value = round(random.uniform(0, 50), 2)
-        rain_ci = [round(random.uniform(-5, 5), 2), round(random.uniform(-5, 5), 2)]
+        temp_value = round(self.random.uniform(20.0, 35.0), 2)
+        temp_ci = [round(self.random.uniform(-0.5, 0.5), 2), round(self.random.uniform(-0.5, 0.5), 2)]
+        rain_value = round(self.random.uniform(0, 50), 2)
+        rain_ci = [round(self.random.uniform(-5, 5), 2), round(self.random.uniform(-5, 5), 2)]
         
         records = [
             {
@@ -62,14 +69,14 @@ class DataGenerator:
         for i in range(num_farmers):
             farmer = {
                 "farmer_id": f"F{i+1:04d}",
-                "land_holding_size": round(random.uniform(0.5, 5.0), 2),  # hectares
-                "farming_experience": random.randint(1, 40),
-                "crops_grown": [random.choice(self.crops)],
-                "irrigation_type": random.choice(["canal", "tube_well", "rainfed"]),
-                "technology_adoption_level": round(random.uniform(0.0, 1.0), 2),
-                "risk_tolerance": round(random.uniform(0.0, 1.0), 2),
-                "access_to_credit": random.random() < 0.6,
-                "access_to_insurance": random.random() < 0.5
+                "land_holding_size": round(self.random.uniform(0.5, 5.0), 2),  # hectares
+                "farming_experience": self.random.randint(1, 40),
+                "crops_grown": [self.random.choice(self.crops)],
+                "irrigation_type": self.random.choice(["canal", "tube_well", "rainfed"]),
+                "technology_adoption_level": round(self.random.uniform(0.0, 1.0), 2),
+                "risk_tolerance": round(self.random.uniform(0.0, 1.0), 2),
+                "access_to_credit": self.random.random() < 0.6,
+                "access_to_insurance": self.random.random() < 0.5
             }
             farmers.append(farmer)
         return farmers
@@ -79,12 +86,12 @@ class DataGenerator:
         crop_data = {}
         for crop in self.crops:
             crop_data[crop] = {
-                "base_yield": round(random.uniform(2.0, 5.0), 2),  # tons/hectare
-                "price": round(random.uniform(20000, 50000), 2),  # BDT/ton
-                "water_requirement": round(random.uniform(500, 2000), 2),  # mm/season
-                "temperature_sensitivity": round(random.uniform(0.1, 0.3), 2),
-                "flood_sensitivity": round(random.uniform(0.2, 0.5), 2),
-                "drought_sensitivity": round(random.uniform(0.2, 0.5), 2)
+                "base_yield": round(self.random.uniform(2.0, 5.0), 2),  # tons/hectare
+                "price": round(self.random.uniform(20000, 50000), 2),  # BDT/ton
+                "water_requirement": round(self.random.uniform(500, 2000), 2),  # mm/season
+                "temperature_sensitivity": round(self.random.uniform(0.1, 0.3), 2),
+                "flood_sensitivity": round(self.random.uniform(0.2, 0.5), 2),
+                "drought_sensitivity": round(self.random.uniform(0.2, 0.5), 2)
             }
         return crop_data
     
@@ -98,17 +105,25 @@ class DataGenerator:
                 "description": f"Policy for {policy.replace('_', ' ')}.",
                 "start_date": datetime(2020, 1, 1),
                 "end_date": datetime(2025, 12, 31),
-                "target_sector": random.choice(["crop", "infrastructure", "market", "technology"]),
-                "budget_allocation": round(random.uniform(1000000, 5000000), 2),
-                "implementation_status": random.choice(["planned", "ongoing", "completed"]),
-                "success_metrics": {"effectiveness": round(random.uniform(0.3, 0.8), 2)}
+                "target_sector": self.random.choice(["crop", "infrastructure", "market", "technology"]),
+                "budget_allocation": round(self.random.uniform(1000000, 5000000), 2),
+                "implementation_status": self.random.choice(["planned", "ongoing", "completed"]),
+                "success_metrics": {"effectiveness": round(self.random.uniform(0.3, 0.8), 2)}
             }
         return list(policy_data.values())
     
-    def generate_regions(self) -> list:
-        """Generate region data using DISTRICTS and AGRO_ECOLOGICAL_ZONES, matching Region model fields."""
+    def generate_regions(self, count: Optional[int] = None) -> list:
+        """Generate region data using DISTRICTS and AGRO_ECOLOGICAL_ZONES, matching Region model fields.
+        
+        With ``count`` larger than the number of districts, districts are
+        reused with a numeric suffix to build synthetic regions.
+        """
         regions = []
-        for i, district in enumerate(DISTRICTS):
+        count = len(DISTRICTS) if count is None else count
+        for i in range(count):
+            district = DISTRICTS[i % len(DISTRICTS)]
+            if i >= len(DISTRICTS):
+                district = f"{district}-{i // len(DISTRICTS)}"
             region = {
                 'district': district,
                 'upazila': f'Upazila-{i+1}',
@@ -137,12 +152,12 @@ class DataGenerator:
     
     def calculate_production(self, region, current_date, scenario_type) -> dict:
         """Calculate production data for a region and date, matching ProductionData model fields."""
-        crop = random.choice(self.crops)
-        area = round(random.uniform(1.0, 10.0), 2)
-        yield_per_hectare = round(random.uniform(2.0, 5.0), 2)
+        crop = self.random.choice(self.crops)
+        area = round(self.random.uniform(1.0, 10.0), 2)
+        yield_per_hectare = round(self.random.uniform(2.0, 5.0), 2)
         total_production = round(area * yield_per_hectare, 2)
-        production_cost = round(random.uniform(10000, 50000), 2)
-        market_price = round(random.uniform(20000, 50000), 2)
+        production_cost = round(self.random.uniform(10000, 50000), 2)
+        market_price = round(self.random.uniform(20000, 50000), 2)
         return {
             'timestamp': current_date,
             'crop_type': crop,
@@ -151,4 +166,96 @@ class DataGenerator:
             'total_production': total_production,
             'production_cost': production_cost,
             'market_price': market_price
-        } 
\ No newline at end of file
+        } 
+    
+    def farmers_to_arrays(self, farmers: List[Dict[str, Any]],
+                          region_ids: Optional[List[int]] = None,
+                          num_regions: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Convert farmer records from generate_farmer_data into columnar arrays.
+        
+        Farmers are mapped to region indices through their ``region_id`` when
+        ``region_ids`` is given, otherwise they are spread round-robin over
+        ``num_regions`` regions.
+        """
+        crop_index = {crop: i for i, crop in enumerate(self.crops)}
+        count = len(farmers)
+        if region_ids is not None:
+            region_index = {region_id: i for i, region_id in enumerate(region_ids)}
+            regions = np.fromiter((region_index[f['region_id']] for f in farmers), dtype=np.int64, count=count)
+        else:
+            regions = np.arange(count, dtype=np.int64) % max(1, num_regions or 1)
+        return {
+            'region': regions,
+            'crop': np.fromiter((crop_index[f['crops_grown'][0]] for f in farmers), dtype=np.int64, count=count),
+            'land_holding_size': np.fromiter((f['land_holding_size'] for f in farmers), dtype=np.float64, count=count),
+            'technology_adoption_level': np.fromiter((f['technology_adoption_level'] for f in farmers), dtype=np.float64, count=count)
+        }
+    
+    def crops_to_arrays(self, crop_data: Dict[str, Dict[str, float]]) -> Dict[str, np.ndarray]:
+        """Convert crop parameters from generate_crop_data into arrays indexed like self.crops."""
+        keys = next(iter(crop_data.values())).keys()
+        return {
+            key: np.array([crop_data[crop][key] for crop in self.crops], dtype=np.float64)
+            for key in keys
+        }
+    
+    def calculate_production_batch(
+        self,
+        farmer_arrays: Dict[str, np.ndarray],
+        crop_arrays: Dict[str, np.ndarray],
+        num_regions: int,
+        num_days: int,
+        scenario_type: str = "baseline",
+        rng: Optional[np.random.Generator] = None,
+        profiler: Optional[Profiler] = None
+    ) -> Dict[str, Any]:
+        """Calculate production for all regions x days from the farmer population.
+        
+        Area, crop mix and potential yield come from the farmers assigned to each
+        region and the crop parameters; the scenario adjusts technology adoption
+        and temperature stress. Returns arrays of shape (num_regions, num_days)
+        plus the dominant crop of each region.
+        """
+        rng = rng if rng is not None else self.rng
+        profiler = profiler if profiler is not None else NULL_PROFILER
+        with profiler.phase("yield"):
+            num_crops = len(crop_arrays['base_yield'])
+            regions = farmer_arrays['region']
+            crops = farmer_arrays['crop']
+            land = farmer_arrays['land_holding_size']
+            # Unregistered scenario names keep baseline conditions
+            scenario = SCENARIOS.get(scenario_type, BASELINE)
+            adoption = np.minimum(1.0, scenario.adjust_adoption(farmer_arrays['technology_adoption_level']))
+            temperature_shift = scenario.temperature_stress_shift
+            
+            # Per-farmer potential yield: crop base yield scaled by technology and heat stress
+            stress = np.clip(1.0 - crop_arrays['temperature_sensitivity'][crops] * temperature_shift, 0.0, None)
+            farmer_yield = crop_arrays['base_yield'][crops] * (0.8 + 0.4 * adoption) * stress
+            
+            # Aggregate per region (and per region x crop for the crop mix)
+            area = np.bincount(regions, weights=land, minlength=num_regions)
+            potential = np.bincount(regions, weights=land * farmer_yield, minlength=num_regions)
+            crop_area = np.bincount(regions * num_crops + crops, weights=land,
+                                    minlength=num_regions * num_crops).reshape(num_regions, num_crops)
+            dominant_crop = crop_area.argmax(axis=1)
+            
+            with np.errstate(invalid='ignore', divide='ignore'):
+                region_yield = np.where(area > 0, potential / area, 0.0)
+            
+            # Daily weather and market noise for every region at once
+            yield_per_hectare = region_yield[:, None] * rng.uniform(0.9, 1.1, (num_regions, num_days))
+            area_hectares = np.broadcast_to(area[:, None], (num_regions, num_days))
+            total_production = area_hectares * yield_per_hectare
+            production_cost = area_hectares * rng.uniform(2000, 5000, (num_regions, num_days))
+        
+        with profiler.phase("market_price"):
+            market_price = crop_arrays['price'][dominant_crop][:, None] * rng.uniform(0.9, 1.1, (num_regions, num_days))
+        
+        return {
+            'crop_type': [self.crops[i] for i in dominant_crop],
+            'area_hectares': np.round(area_hectares, 2),
+            'yield_per_hectare': np.round(yield_per_hectare, 2),
+            'total_production': np.round(total_production, 2),
+            'production_cost': np.round(production_cost, 2),
+            'market_price': np.round(market_price, 2)
+        }
\ No newline at end of file
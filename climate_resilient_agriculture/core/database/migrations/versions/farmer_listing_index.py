@@ -0,0 +1,21 @@
+"""Index farmers by simulation for keyset pagination
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Farmers are listed per simulation in id order
+    op.create_index('ix_farmers_simulation_id_id', 'farmers', ['simulation_id', 'id'])
+
+def downgrade():
+    op.drop_index('ix_farmers_simulation_id_id', table_name='farmers')
@@ -0,0 +1,33 @@
+"""Add simulation result cache
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Create result_cache table
+    op.create_table(
+        'result_cache',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('simulation_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('last_used_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('hits', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['simulation_id'], ['simulations.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index('ix_result_cache_last_used_at', 'result_cache', ['last_used_at'])
+
+def downgrade():
+    op.drop_index('ix_result_cache_last_used_at', table_name='result_cache')
+    op.drop_table('result_cache')
@@ -0,0 +1,49 @@
+"""Keep CLI run summaries in the result cache instead of placeholder simulations
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+simulations = sa.table(
+    'simulations',
+    sa.column('id', sa.Integer()),
+    sa.column('parameters', sa.JSON()),
+    sa.column('results', sa.JSON())
+)
+result_cache = sa.table(
+    'result_cache',
+    sa.column('simulation_id', sa.Integer()),
+    sa.column('summary', sa.JSON())
+)
+
+def upgrade():
+    # Runs kept only in the cache have a summary instead of a simulation
+    op.add_column('result_cache', sa.Column('summary', sa.JSON(), nullable=True))
+    op.alter_column('result_cache', 'simulation_id', existing_type=sa.Integer(), nullable=True)
+
+    # Move the summaries of in-memory CLI runs out of their placeholder simulations
+    connection = op.get_bind()
+    for simulation_id, parameters, results in connection.execute(
+            sa.select(simulations.c.id, simulations.c.parameters, simulations.c.results)).all():
+        if (parameters or {}).get('engine') != 'memory':
+            continue
+        connection.execute(
+            result_cache.update().where(result_cache.c.simulation_id == simulation_id)
+            .values(simulation_id=None, summary=results)
+        )
+        connection.execute(simulations.delete().where(simulations.c.id == simulation_id))
+
+def downgrade():
+    op.execute(result_cache.delete().where(result_cache.c.simulation_id.is_(None)))
+    op.alter_column('result_cache', 'simulation_id', existing_type=sa.Integer(), nullable=False)
+    op.drop_column('result_cache', 'summary')
@@ -0,0 +1,25 @@
+"""Index climate and production rows by region and time
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Per-region series are read by type over a time range
+    op.create_index('ix_climate_data_region_type_timestamp', 'climate_data',
+                    ['region_id', 'data_type', 'timestamp'])
+    op.create_index('ix_production_data_region_timestamp', 'production_data',
+                    ['region_id', 'timestamp'])
+
+def downgrade():
+    op.drop_index('ix_production_data_region_timestamp', table_name='production_data')
+    op.drop_index('ix_climate_data_region_type_timestamp', table_name='climate_data')
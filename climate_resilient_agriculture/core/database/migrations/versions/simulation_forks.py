@@ -0,0 +1,31 @@
+"""Add simulation fork columns
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Forked simulations reference their parent and the date they diverge from it
+    op.add_column('simulations', sa.Column('parent_id', sa.Integer(), nullable=True))
+    op.add_column('simulations', sa.Column('fork_date', sa.DateTime(), nullable=True))
+    op.create_foreign_key(
+        'fk_simulations_parent_id', 'simulations', 'simulations',
+        ['parent_id'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index('ix_simulations_parent_id', 'simulations', ['parent_id'])
+
+def downgrade():
+    op.drop_index('ix_simulations_parent_id', table_name='simulations')
+    op.drop_constraint('fk_simulations_parent_id', 'simulations', type_='foreignkey')
+    op.drop_column('simulations', 'fork_date')
+    op.drop_column('simulations', 'parent_id')
@@ -0,0 +1,39 @@
+"""Add per-region monthly simulation summaries
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Create simulation_summaries table
+    op.create_table(
+        'simulation_summaries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('simulation_id', sa.Integer(), nullable=False),
+        sa.Column('region_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.DateTime(), nullable=False),
+        sa.Column('days', sa.Integer(), nullable=False),
+        sa.Column('total_production', sa.Float(), nullable=True),
+        sa.Column('yield_sum', sa.Float(), nullable=True),
+        sa.Column('market_price_sum', sa.Float(), nullable=True),
+        sa.Column('temperature_sum', sa.Float(), nullable=True),
+        sa.Column('rainfall_sum', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['simulation_id'], ['simulations.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['region_id'], ['regions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_simulation_summaries_simulation_id', 'simulation_summaries', ['simulation_id'])
+
+def downgrade():
+    op.drop_index('ix_simulation_summaries_simulation_id', table_name='simulation_summaries')
+    op.drop_table('simulation_summaries')
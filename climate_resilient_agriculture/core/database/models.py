@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -16,12 +16,45 @@ class Simulation(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     parameters = Column(JSON)
     results = Column(JSON)
+    # Set on simulations forked from another simulation at fork_date
+    parent_id = Column(Integer, ForeignKey('simulations.id'), index=True)
+    fork_date = Column(DateTime)
     
     # Relationships
+    parent = relationship("Simulation", remote_side=[id], backref="children")
     regions = relationship("Region", back_populates="simulation")
     farmers = relationship("Farmer", back_populates="simulation")
     policies = relationship("Policy", back_populates="simulation")
 
+class ResultCacheEntry(Base):
+    """Model mapping a canonical simulation request to its stored run or, for runs not stored, their summary"""
+    __tablename__ = 'result_cache'
+    
+    key = Column(String(64), primary_key=True)
+    simulation_id = Column(Integer, ForeignKey('simulations.id'))
+    summary = Column(JSON)  # summary of a run kept only in the cache (CLI in-memory runs)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+    hits = Column(Integer, default=0)
+    
+    # Relationships
+    simulation = relationship("Simulation")
+
+class SimulationSummary(Base):
+    """Model for per-region monthly aggregates of a simulation's steps"""
+    __tablename__ = 'simulation_summaries'
+    
+    id = Column(Integer, primary_key=True)
+    simulation_id = Column(Integer, ForeignKey('simulations.id'), nullable=False, index=True)
+    region_id = Column(Integer, ForeignKey('regions.id'), nullable=False)
+    month = Column(DateTime, nullable=False)  # first day of the month
+    days = Column(Integer, nullable=False)
+    total_production = Column(Float)
+    yield_sum = Column(Float)
+    market_price_sum = Column(Float)
+    temperature_sum = Column(Float)
+    rainfall_sum = Column(Float)
+
 class Region(Base):
     """Model for storing region data"""
     __tablename__ = 'regions'
@@ -61,6 +94,9 @@ class Farmer(Base):
     # Relationships
     simulation = relationship("Simulation", back_populates="farmers")
     region = relationship("Region")
+    
+    # Farmers are listed per simulation in id order
+    __table_args__ = (Index('ix_farmers_simulation_id_id', 'simulation_id', 'id'),)
 
 class Policy(Base):
     """Model for storing policy data"""
@@ -97,6 +133,9 @@ class ClimateData(Base):
     
     # Relationships
     region = relationship("Region", back_populates="climate_data")
+    
+    # Per-region series are read by type over a time range
+    __table_args__ = (Index('ix_climate_data_region_type_timestamp', 'region_id', 'data_type', 'timestamp'),)
 
 class ProductionData(Base):
     """Model for storing production data"""
@@ -113,4 +152,7 @@ class ProductionData(Base):
     market_price = Column(Float)
     
     # Relationships
-    region = relationship("Region", back_populates="production_data") 
\ No newline at end of file
+    region = relationship("Region", back_populates="production_data")
+    
+    # Per-region series are read over a time range
+    __table_args__ = (Index('ix_production_data_region_timestamp', 'region_id', 'timestamp'),) 
\ No newline at end of file
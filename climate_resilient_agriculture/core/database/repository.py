@@ -1,11 +1,53 @@
-from typing import List, Dict, Optional
-from datetime import datetime
+from typing import Callable, List, Dict, Iterator, Optional, Sequence, Set, Tuple
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from .models import (
     Simulation, Region, Farmer, Policy,
-    ClimateData, ProductionData
+    ClimateData, ProductionData, ResultCacheEntry, SimulationSummary
 )
 
+# Per-region series metric -> (value column, climate data type or None)
+SERIES_COLUMNS = {
+    'temperature': (ClimateData.value, 'temperature'),
+    'rainfall': (ClimateData.value, 'rainfall'),
+    'crop_yield': (ProductionData.yield_per_hectare, None),
+    'total_production': (ProductionData.total_production, None),
+    'market_price': (ProductionData.market_price, None)
+}
+
+# Farmer listing fields -> columns; district comes from the farmer's region
+FARMER_FIELDS = {
+    **{column.name: column for column in Farmer.__table__.columns if column.name != 'simulation_id'},
+    'district': Region.__table__.c.district
+}
+
+# Summed columns of the monthly summaries, in the order engines accumulate them
+SUMMARY_COLUMNS = ('total_production', 'yield_sum', 'market_price_sum', 'temperature_sum', 'rainfall_sum')
+
+def month_start(date: datetime) -> datetime:
+    """First instant of a date's month"""
+    return date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def _summary_metrics(days: int, total_production: float, yield_sum: float, market_price_sum: float,
+                     temperature_sum: float, rainfall_sum: float) -> Dict:
+    """Comparison metrics from summed summary columns"""
+    days = days or 0
+    
+    def average(total):
+        return total / days if days else None
+    
+    return {
+        'days': days,
+        'total_production': total_production or 0.0,
+        'average_yield': average(yield_sum),
+        'average_price': average(market_price_sum),
+        'average_temperature': average(temperature_sum),
+        'average_rainfall': average(rainfall_sum)
+    }
+
 class SimulationRepository:
     """Repository for handling simulation data operations"""
     
@@ -13,13 +55,17 @@ class SimulationRepository:
         self.session = session
     
     def create_simulation(self, scenario_type: str, start_date: datetime,
-                         end_date: datetime, parameters: Dict) -> Simulation:
-        """Create a new simulation record"""
+                         end_date: datetime, parameters: Dict,
+                         parent_id: Optional[int] = None,
+                         fork_date: Optional[datetime] = None) -> Simulation:
+        """Create a new simulation record, optionally as a fork of a parent simulation"""
         simulation = Simulation(
             scenario_type=scenario_type,
             start_date=start_date,
             end_date=end_date,
-            parameters=parameters
+            parameters=parameters,
+            parent_id=parent_id,
+            fork_date=fork_date
         )
         self.session.add(simulation)
         self.session.commit()
@@ -62,6 +108,13 @@ class SimulationRepository:
         self.session.commit()
         return farmer
     
+    def batch_create_farmers(self, simulation_id: int, farmers: List[Dict]) -> None:
+        """Batch create farmer records in one transaction"""
+        self.session.bulk_insert_mappings(
+            Farmer, [dict(farmer, simulation_id=simulation_id) for farmer in farmers]
+        )
+        self.session.commit()
+    
     def create_policy(self, simulation_id: int, policy_data: Dict) -> Policy:
         """Create a new policy record"""
         policy = Policy(
@@ -94,11 +147,59 @@ class SimulationRepository:
     
     def get_simulation_regions(self, simulation_id: int) -> List[Region]:
         """Get all regions for a simulation"""
-        return self.session.query(Region).filter_by(simulation_id=simulation_id).all()
+        return self.session.query(Region).filter_by(simulation_id=simulation_id).order_by(Region.id).all()
     
     def get_simulation_farmers(self, simulation_id: int) -> List[Farmer]:
         """Get all farmers for a simulation"""
-        return self.session.query(Farmer).filter_by(simulation_id=simulation_id).all()
+        return self.session.query(Farmer).filter_by(simulation_id=simulation_id).order_by(Farmer.id).all()
+    
+    def iter_farmer_batches(self, simulation_id: int, fields: Optional[Sequence[str]] = None,
+                            district: Optional[str] = None, irrigation_type: Optional[str] = None,
+                            min_adoption: Optional[float] = None, max_adoption: Optional[float] = None,
+                            after_id: Optional[int] = None, limit: Optional[int] = None,
+                            batch_size: int = 10000) -> Iterator[Tuple[int, List[Dict]]]:
+        """Yield (last farmer id, rows) batches of a simulation's farmers in id order.
+        
+        Rows are dicts of the selected fields.
+        
+        Uses Core selects with keyset pagination on the farmer id, so each
+        batch is one indexed range query and no ORM objects are built.
+        ``after_id`` resumes after a previous page and ``limit`` caps the
+        total number of farmers.
+        """
+        fields = list(fields or FARMER_FIELDS)
+        unknown = [field for field in fields if field not in FARMER_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown farmer fields: {', '.join(unknown)}")
+        farmers = Farmer.__table__
+        # The id is always selected to continue the keyset
+        columns = [farmers.c.id] + [FARMER_FIELDS[field].label(field) for field in fields if field != 'id']
+        query = select(*columns).where(farmers.c.simulation_id == simulation_id)
+        if district is not None or 'district' in fields:
+            query = query.select_from(farmers.outerjoin(Region.__table__, farmers.c.region_id == Region.__table__.c.id))
+        if district is not None:
+            query = query.where(Region.__table__.c.district == district)
+        if irrigation_type is not None:
+            query = query.where(farmers.c.irrigation_type == irrigation_type)
+        if min_adoption is not None:
+            query = query.where(farmers.c.technology_adoption_level >= min_adoption)
+        if max_adoption is not None:
+            query = query.where(farmers.c.technology_adoption_level <= max_adoption)
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            page = query.order_by(farmers.c.id).limit(size)
+            if after_id is not None:
+                page = page.where(farmers.c.id > after_id)
+            rows = self.session.execute(page).mappings().all()
+            if not rows:
+                return
+            after_id = rows[-1]['id']
+            yield after_id, [{field: row[field] for field in fields} for row in rows]
+            if remaining is not None:
+                remaining -= len(rows)
+            if len(rows) < size:
+                return
     
     def get_simulation_policies(self, simulation_id: int) -> List[Policy]:
         """Get all policies for a simulation"""
@@ -124,29 +225,291 @@ class SimulationRepository:
             ProductionData.timestamp <= end_date
         ).all()
     
+    def delete_region_data_since(self, simulation_id: int, since: datetime) -> int:
+        """Delete a simulation's climate and production rows from a date onward"""
+        region_ids = select(Region.id).where(Region.simulation_id == simulation_id)
+        deleted = 0
+        for table in (ClimateData, ProductionData):
+            result = self.session.execute(
+                delete(table).where(table.region_id.in_(region_ids), table.timestamp >= since)
+            )
+            deleted += result.rowcount
+        # Summaries of the month containing ``since`` no longer match the remaining rows
+        self.session.execute(delete(SimulationSummary).where(
+            SimulationSummary.simulation_id == simulation_id, SimulationSummary.month >= month_start(since)
+        ))
+        self.session.commit()
+        return deleted
+    
+    def copy_region_data(self, region_ids: Dict[int, int], until: datetime) -> int:
+        """Copy climate and production rows before a date from source to target regions"""
+        copied = 0
+        for table in (ClimateData, ProductionData):
+            columns = [column for column in table.__table__.columns if column.name not in ("id", "region_id")]
+            for source_id, target_id in region_ids.items():
+                rows = select(literal(target_id).label("region_id"), *columns).where(
+                    table.region_id == source_id, table.timestamp < until
+                )
+                result = self.session.execute(
+                    insert(table).from_select(["region_id", *(column.name for column in columns)], rows)
+                )
+                copied += result.rowcount
+        self.session.commit()
+        return copied
+    
+    def replace_month_summary(self, simulation_id: int, month: datetime, days: int,
+                              region_ids: List[int], sums: np.ndarray, commit: bool = True) -> None:
+        """Write a month's per-region summary rows, replacing earlier rows of that month.
+        
+        ``sums`` has one row per region and one column per SUMMARY_COLUMNS entry.
+        """
+        self.session.execute(delete(SimulationSummary).where(
+            SimulationSummary.simulation_id == simulation_id, SimulationSummary.month == month
+        ))
+        self.session.bulk_insert_mappings(SimulationSummary, [
+            {'simulation_id': simulation_id, 'region_id': region_id, 'month': month, 'days': days,
+             **dict(zip(SUMMARY_COLUMNS, map(float, region_sums)))}
+            for region_id, region_sums in zip(region_ids, sums)
+        ])
+        if commit:
+            self.session.commit()
+    
+    def aggregate_region_data(self, region_ids: List[int], since: datetime,
+                              until: datetime) -> Tuple[int, np.ndarray]:
+        """Days and per-region SUMMARY_COLUMNS sums of stored rows in [since, until)"""
+        index = {region_id: i for i, region_id in enumerate(region_ids)}
+        sums = np.zeros((len(region_ids), len(SUMMARY_COLUMNS)))
+        days = 0
+        production = self.session.execute(
+            select(ProductionData.region_id, func.count(), func.sum(ProductionData.total_production),
+                   func.sum(ProductionData.yield_per_hectare), func.sum(ProductionData.market_price))
+            .where(ProductionData.region_id.in_(region_ids),
+                   ProductionData.timestamp >= since, ProductionData.timestamp < until)
+            .group_by(ProductionData.region_id)
+        )
+        for region_id, count, *totals in production:
+            days = max(days, count)
+            sums[index[region_id], :3] = totals
+        climate = self.session.execute(
+            select(ClimateData.region_id, ClimateData.data_type, func.sum(ClimateData.value))
+            .where(ClimateData.region_id.in_(region_ids), ClimateData.data_type.in_(('temperature', 'rainfall')),
+                   ClimateData.timestamp >= since, ClimateData.timestamp < until)
+            .group_by(ClimateData.region_id, ClimateData.data_type)
+        )
+        for region_id, data_type, total in climate:
+            sums[index[region_id], 3 if data_type == 'temperature' else 4] = total
+        return days, sums
+    
+    def copy_summaries(self, source_id: int, target_id: int, region_ids: Dict[int, int],
+                       before: datetime) -> None:
+        """Copy summary rows of months before a date from one simulation to another"""
+        for source_region_id, target_region_id in region_ids.items():
+            rows = select(
+                literal(target_id).label('simulation_id'), literal(target_region_id).label('region_id'),
+                SimulationSummary.month, SimulationSummary.days,
+                *(getattr(SimulationSummary, column) for column in SUMMARY_COLUMNS)
+            ).where(
+                SimulationSummary.simulation_id == source_id,
+                SimulationSummary.region_id == source_region_id,
+                SimulationSummary.month < before
+            )
+            self.session.execute(insert(SimulationSummary).from_select(
+                ['simulation_id', 'region_id', 'month', 'days', *SUMMARY_COLUMNS], rows
+            ))
+        self.session.commit()
+    
+    def get_simulation_summary(self, simulation_id: int, monthly: bool = False) -> Dict:
+        """Per-region (and optionally per-month) metrics of a simulation from its summary rows"""
+        sums = [func.sum(getattr(SimulationSummary, column)) for column in SUMMARY_COLUMNS]
+        region_rows = self.session.execute(
+            select(Region.id, Region.district, func.sum(SimulationSummary.days), *sums)
+            .join(Region, Region.id == SimulationSummary.region_id)
+            .where(SimulationSummary.simulation_id == simulation_id)
+            .group_by(Region.id, Region.district)
+            .order_by(Region.id)
+        ).all()
+        summary = {
+            'regions': [
+                {'region_id': region_id, 'district': district, **_summary_metrics(*totals)}
+                for region_id, district, *totals in region_rows
+            ],
+            'totals': self.compare_simulations([simulation_id]).get(simulation_id)
+        }
+        if monthly:
+            month_rows = self.session.execute(
+                select(SimulationSummary.month, SimulationSummary.region_id, SimulationSummary.days,
+                       *(getattr(SimulationSummary, column) for column in SUMMARY_COLUMNS))
+                .where(SimulationSummary.simulation_id == simulation_id)
+                .order_by(SimulationSummary.month, SimulationSummary.region_id)
+            ).all()
+            summary['months'] = [
+                {'month': month, 'region_id': region_id, **_summary_metrics(*totals)}
+                for month, region_id, *totals in month_rows
+            ]
+        return summary
+    
+    def compare_simulations(self, simulation_ids: List[int]) -> Dict[int, Dict]:
+        """Whole-simulation metrics of several simulations from their summary rows.
+        
+        Averages are per region-day; ``days`` is the number of simulated days.
+        """
+        rows = self.session.execute(
+            select(SimulationSummary.simulation_id,
+                   func.count(func.distinct(SimulationSummary.region_id)),
+                   func.sum(SimulationSummary.days),
+                   *(func.sum(getattr(SimulationSummary, column)) for column in SUMMARY_COLUMNS))
+            .where(SimulationSummary.simulation_id.in_(simulation_ids))
+            .group_by(SimulationSummary.simulation_id)
+        ).all()
+        comparison = {}
+        for simulation_id, region_count, region_days, *totals in rows:
+            metrics = _summary_metrics(region_days, *totals)
+            metrics['days'] = region_days // region_count if region_count else 0
+            comparison[simulation_id] = metrics
+        return comparison
+    
+    def _get_cache_entry(self, key: str, max_age: Optional[timedelta],
+                         valid: Callable[[ResultCacheEntry], bool]) -> Optional[ResultCacheEntry]:
+        """Get a cache entry and count the hit, dropping it when stale or ``valid(entry)`` is false"""
+        entry = self.session.get(ResultCacheEntry, key)
+        if entry is None:
+            return None
+        expired = max_age is not None and entry.created_at < datetime.utcnow() - max_age
+        if expired or not valid(entry):
+            self.session.delete(entry)
+            self.session.commit()
+            return None
+        entry.last_used_at = datetime.utcnow()
+        entry.hits = (entry.hits or 0) + 1
+        self.session.commit()
+        return entry
+    
+    def get_cached_simulation(self, key: str, max_age: Optional[timedelta] = None) -> Optional[Simulation]:
+        """Get the stored run cached under a request key, dropping stale entries"""
+        entry = self._get_cache_entry(
+            key, max_age, lambda entry: entry.simulation is not None and entry.simulation.results is not None
+        )
+        return entry.simulation if entry is not None else None
+    
+    def get_cached_summary(self, key: str, max_age: Optional[timedelta] = None) -> Optional[Dict]:
+        """Get the run summary cached under a request key, dropping stale entries"""
+        entry = self._get_cache_entry(key, max_age, lambda entry: entry.summary is not None)
+        return entry.summary if entry is not None else None
+    
+    def _store_cache_entry(self, entry: ResultCacheEntry) -> ResultCacheEntry:
+        """Insert or replace a cache entry"""
+        try:
+            entry = self.session.merge(entry)
+            self.session.commit()
+        except IntegrityError:
+            # Another worker cached the same request in between; overwrite its entry
+            self.session.rollback()
+            entry = self.session.merge(entry)
+            self.session.commit()
+        return entry
+    
+    def cache_simulation(self, key: str, simulation_id: int) -> ResultCacheEntry:
+        """Cache a stored run under a request key, replacing any previous run"""
+        now = datetime.utcnow()
+        return self._store_cache_entry(
+            ResultCacheEntry(key=key, simulation_id=simulation_id, created_at=now, last_used_at=now, hits=0)
+        )
+    
+    def cache_summary(self, key: str, summary: Dict) -> ResultCacheEntry:
+        """Cache the summary of a run that is not stored as a simulation"""
+        now = datetime.utcnow()
+        return self._store_cache_entry(
+            ResultCacheEntry(key=key, summary=summary, created_at=now, last_used_at=now, hits=0)
+        )
+    
+    def get_cache_keys(self) -> List[str]:
+        """Request keys currently in the result cache"""
+        return list(self.session.scalars(select(ResultCacheEntry.key)))
+    
+    def get_cached_simulation_ids(self) -> Set[int]:
+        """Ids of the stored runs currently in the result cache"""
+        return set(self.session.scalars(
+            select(ResultCacheEntry.simulation_id).where(ResultCacheEntry.simulation_id.is_not(None))
+        ))
+    
+    def evict_result_cache(self, max_entries: int, max_age: Optional[timedelta] = None) -> int:
+        """Drop cache entries older than max_age, then the least recently used beyond max_entries.
+        
+        Only the cache entries are removed; the simulations stay stored.
+        """
+        evicted = 0
+        if max_age is not None:
+            result = self.session.execute(
+                delete(ResultCacheEntry).where(ResultCacheEntry.created_at < datetime.utcnow() - max_age)
+            )
+            evicted += result.rowcount
+        surplus = select(ResultCacheEntry.key).order_by(
+            ResultCacheEntry.last_used_at.desc()
+        ).offset(max_entries)
+        result = self.session.execute(
+            delete(ResultCacheEntry).where(ResultCacheEntry.key.in_(surplus.scalar_subquery()))
+        )
+        evicted += result.rowcount
+        self.session.commit()
+        return evicted
+    
     def delete_simulation(self, simulation_id: int) -> bool:
         """Delete a simulation and all related data"""
         simulation = self.get_simulation(simulation_id)
         if simulation:
+            self.session.execute(delete(ResultCacheEntry).where(ResultCacheEntry.simulation_id == simulation_id))
+            self.session.execute(delete(SimulationSummary).where(SimulationSummary.simulation_id == simulation_id))
             self.session.delete(simulation)
             self.session.commit()
             return True
         return False
     
-    def batch_create_climate_data(self, climate_data_list: List[Dict]) -> List[ClimateData]:
-        """Batch create climate data records"""
+    def batch_create_climate_data(self, climate_data_list: List[Dict], commit: bool = True) -> List[ClimateData]:
+        """Batch create climate data records, optionally leaving the commit to the caller"""
         data_objects = [
             ClimateData(**data) for data in climate_data_list
         ]
         self.session.bulk_save_objects(data_objects)
-        self.session.commit()
+        if commit:
+            self.session.commit()
         return data_objects
     
-    def batch_create_production_data(self, production_data_list: List[Dict]) -> List[ProductionData]:
-        """Batch create production data records"""
+    def batch_create_production_data(self, production_data_list: List[Dict], commit: bool = True) -> List[ProductionData]:
+        """Batch create production data records, optionally leaving the commit to the caller"""
         data_objects = [
             ProductionData(**data) for data in production_data_list
         ]
         self.session.bulk_save_objects(data_objects)
-        self.session.commit()
-        return data_objects 
\ No newline at end of file
+        if commit:
+            self.session.commit()
+        return data_objects 
+    
+    def iter_region_series(self, simulation_id: int, metric: str,
+                           regions: Optional[Sequence[str]] = None,
+                           start: Optional[datetime] = None,
+                           end: Optional[datetime] = None) -> Iterator[Tuple[Region, np.ndarray, np.ndarray]]:
+        """Yield each region's time series of a metric as arrays, one region at a time.
+        
+        ``regions`` selects districts and ``start``/``end`` bound the
+        timestamps (inclusive); the filters run in the database against the
+        (region, timestamp) indexes.
+        """
+        if metric not in SERIES_COLUMNS:
+            raise ValueError(f"Unknown series metric: {metric}")
+        column, data_type = SERIES_COLUMNS[metric]
+        table = column.class_
+        region_query = self.session.query(Region).filter_by(simulation_id=simulation_id)
+        if regions is not None:
+            region_query = region_query.filter(Region.district.in_(regions))
+        for region in region_query.order_by(Region.id):
+            query = select(table.timestamp, column).where(table.region_id == region.id)
+            if data_type is not None:
+                query = query.where(table.data_type == data_type)
+            if start is not None:
+                query = query.where(table.timestamp >= start)
+            if end is not None:
+                query = query.where(table.timestamp <= end)
+            rows = self.session.execute(query.order_by(table.timestamp)).all()
+            timestamps = np.array([row[0] for row in rows], dtype='datetime64[s]')
+            values = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+            yield region, timestamps, values
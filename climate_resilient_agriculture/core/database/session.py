@@ -1,25 +1,53 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.pool import QueuePool
+from typing import Dict
 import os
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+def get_db_url() -> str:
+    """Get the database URL from the environment, defaulting to a local SQLite file"""
+    return os.getenv('DATABASE_URL', 'sqlite:///climate_agriculture.db')
+
 # Get database URL from environment variable or use SQLite as default
-DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///climate_agriculture.db')
+DATABASE_URL = get_db_url()
+
+# Connections the database server accepts in total, shared by all API worker processes
+DB_MAX_CONNECTIONS = int(os.getenv('DB_MAX_CONNECTIONS', '100'))
+# Connections left over for migrations, the CLI and administrative sessions
+DB_RESERVED_CONNECTIONS = int(os.getenv('DB_RESERVED_CONNECTIONS', '5'))
+# Upper bounds of each process's pool, reached when the connection budget allows
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+
+def worker_count() -> int:
+    """Number of API worker processes sharing the database (WEB_CONCURRENCY)"""
+    return max(1, int(os.getenv('WEB_CONCURRENCY', '1')))
+
+def pool_settings(workers: int, max_connections: int = DB_MAX_CONNECTIONS,
+                  reserved: int = DB_RESERVED_CONNECTIONS) -> Dict[str, int]:
+    """Size one process's pool so that all workers together stay within the connection budget"""
+    budget = max(1, (max_connections - reserved) // workers)
+    pool_size = min(DB_POOL_SIZE, budget)
+    return {'pool_size': pool_size, 'max_overflow': min(DB_MAX_OVERFLOW, budget - pool_size)}
 
 # Create engine with connection pooling
 engine = create_engine(
     DATABASE_URL,
     poolclass=QueuePool,
-    pool_size=5,
-    max_overflow=10,
     pool_timeout=30,
-    pool_recycle=1800
+    pool_recycle=1800,
+    pool_pre_ping=True,
+    **pool_settings(worker_count())
 )
 
+# Connections inherited by a forked worker (e.g. gunicorn --preload) belong to the parent
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
+
 # Create session factory
 session_factory = sessionmaker(bind=engine)
 
@@ -42,4 +70,4 @@ def init_db():
 def close_db():
     """Close database connections"""
     Session.remove()
-    engine.dispose() 
\ No newline at end of file
+    engine.dispose()
@@ -0,0 +1,166 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from .base import (
+    Location,
+    TimeSeriesData,
+    ClimateData,
+    AgriculturalProduction,
+    FarmerProfile,
+    MarketData,
+    Policy,
+    Infrastructure
+)
+
+# Slotted, validation-free counterparts of the pydantic models in base.py.
+# They carry the same fields and are meant for internal hot loops (data
+# generation, simulation steps); call ``to_model()`` to get a validated
+# pydantic object at I/O boundaries such as API responses or file loads.
+
+class _Record:
+    """Common helpers shared by all record types"""
+    __slots__ = ()
+    _model = None
+    _nested: Dict[str, type] = {}
+    _local: tuple = ()  # record-only fields that have no model counterpart
+
+    def dict(self) -> Dict[str, Any]:
+        """Return the record as a plain dictionary (mirrors BaseModel.dict)"""
+        data = {}
+        for name in self.__slots__:
+            if name in self._local:
+                continue
+            value = getattr(self, name)
+            data[name] = value.dict() if isinstance(value, _Record) else value
+        return data
+
+    def to_model(self):
+        """Validate the record and return the equivalent pydantic model"""
+        return self._model(**self.dict())
+
+    @classmethod
+    def from_model(cls, model):
+        """Build a record from an already validated pydantic model"""
+        values = {}
+        for name in cls.__slots__:
+            if name in cls._local:
+                continue
+            value = getattr(model, name)
+            if name in cls._nested:
+                value = cls._nested[name].from_model(value)
+            values[name] = value
+        return cls(**values)
+
+@dataclass(slots=True)
+class LocationRecord(_Record):
+    """Unvalidated counterpart of Location"""
+    district: str
+    upazila: str
+    union: Optional[str]
+    latitude: float
+    longitude: float
+    elevation: float
+    agro_ecological_zone: str
+    district_code: int = -1  # assigned by LocationRegistry when interned
+    zone_code: int = -1
+
+    _model = Location
+    _local = ("district_code", "zone_code")
+
+@dataclass(slots=True)
+class TimeSeriesRecord(_Record):
+    """Unvalidated counterpart of TimeSeriesData"""
+    timestamp: datetime
+    value: float
+    unit: str
+    confidence_interval: Optional[Dict[str, float]]
+
+    _model = TimeSeriesData
+
+@dataclass(slots=True)
+class ClimateRecord(_Record):
+    """Unvalidated counterpart of ClimateData"""
+    timestamp: datetime
+    value: float
+    unit: str
+    confidence_interval: Optional[Dict[str, float]]
+    data_type: str
+    source: str
+    quality_score: float
+
+    _model = ClimateData
+
+@dataclass(slots=True)
+class ProductionRecord(_Record):
+    """Unvalidated counterpart of AgriculturalProduction"""
+    crop_type: str
+    area_hectares: float
+    yield_per_hectare: float
+    total_production: float
+    production_cost: float
+    market_price: float
+    season: str
+    year: int
+
+    _model = AgriculturalProduction
+
+@dataclass(slots=True)
+class FarmerRecord(_Record):
+    """Unvalidated counterpart of FarmerProfile"""
+    farmer_id: str
+    location: LocationRecord
+    land_holding_size: float
+    farming_experience: int
+    crops_grown: List[str]
+    irrigation_type: str
+    technology_adoption_level: float
+    risk_tolerance: float
+    access_to_credit: bool
+    access_to_insurance: bool
+
+    _model = FarmerProfile
+    _nested = {"location": LocationRecord}
+
+@dataclass(slots=True)
+class MarketRecord(_Record):
+    """Unvalidated counterpart of MarketData"""
+    market_id: str
+    location: LocationRecord
+    commodity_type: str
+    price: float
+    volume: float
+    timestamp: datetime
+    source: str
+
+    _model = MarketData
+    _nested = {"location": LocationRecord}
+
+@dataclass(slots=True)
+class PolicyRecord(_Record):
+    """Unvalidated counterpart of Policy"""
+    policy_id: str
+    name: str
+    description: str
+    start_date: datetime
+    end_date: Optional[datetime]
+    target_sector: str
+    budget_allocation: float
+    implementation_status: str
+    success_metrics: Dict[str, float]
+
+    _model = Policy
+
+@dataclass(slots=True)
+class InfrastructureRecord(_Record):
+    """Unvalidated counterpart of Infrastructure"""
+    infrastructure_id: str
+    type: str
+    location: LocationRecord
+    capacity: float
+    operational_status: str
+    maintenance_status: str
+    last_inspection_date: datetime
+    next_maintenance_date: datetime
+
+    _model = Infrastructure
+    _nested = {"location": LocationRecord}
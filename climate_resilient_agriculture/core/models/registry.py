@@ -0,0 +1,80 @@
+from typing import Dict, List, Optional, Tuple
+from .records import LocationRecord
+
+class LocationRegistry:
+    """Interns location names into integer codes and shares location entries.
+
+    Farmers generated in the same district, upazila, union and agro-ecological
+    zone reference one shared LocationRecord instead of carrying their own
+    copy, and each shared entry carries integer district and zone codes so
+    that grouping by district is an integer comparison.
+    """
+
+    def __init__(self):
+        self.districts: List[str] = []
+        self.upazilas: List[str] = []
+        self.unions: List[str] = []
+        self.zones: List[str] = []
+        self._codes: Dict[str, Dict[str, int]] = {
+            "district": {},
+            "upazila": {},
+            "union": {},
+            "zone": {}
+        }
+        self._names: Dict[str, List[str]] = {
+            "district": self.districts,
+            "upazila": self.upazilas,
+            "union": self.unions,
+            "zone": self.zones
+        }
+        self._entries: Dict[Tuple[int, int, int, int], LocationRecord] = {}
+
+    def code(self, kind: str, name: Optional[str]) -> int:
+        """Return the integer code for a name, interning it on first use"""
+        codes = self._codes[kind]
+        code = codes.get(name)
+        if code is None:
+            code = len(codes)
+            codes[name] = code
+            self._names[kind].append(name)
+        return code
+
+    def district_code(self, district: str) -> int:
+        """Return the integer code for a district"""
+        return self.code("district", district)
+
+    def zone_code(self, zone: str) -> int:
+        """Return the integer code for an agro-ecological zone"""
+        return self.code("zone", zone)
+
+    def get(self, district: str, upazila: str, union: Optional[str], agro_ecological_zone: str,
+            latitude: float, longitude: float, elevation: float) -> LocationRecord:
+        """Return the shared entry for a location, creating it on first use.
+
+        Coordinates and elevation are only used when the entry is created;
+        later lookups of the same location reuse the stored values.
+        """
+        key = (
+            self.code("district", district),
+            self.code("upazila", upazila),
+            self.code("union", union),
+            self.code("zone", agro_ecological_zone)
+        )
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = LocationRecord(
+                district=self.districts[key[0]],
+                upazila=self.upazilas[key[1]],
+                union=self.unions[key[2]],
+                latitude=float(latitude),
+                longitude=float(longitude),
+                elevation=float(elevation),
+                agro_ecological_zone=self.zones[key[3]],
+                district_code=key[0],
+                zone_code=key[3]
+            )
+            self._entries[key] = entry
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,7 @@
+# Simulation settings for the core modules, which import them relatively from here.
+# ``core`` is a subpackage of climate_resilient_agriculture for the API, the scripts and
+# the tests, but a top-level package for main.py run from this directory.
+try:
+    from ..config.simulation_config import *
+except ImportError:
+    from config.simulation_config import *
@@ -1,6 +1,15 @@
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+import json
+import logging
+import uuid
 import numpy as np
+from ..settings import (
+    CHECKPOINT_DIRECTORY,
+    CHECKPOINT_INTERVAL_DAYS,
+    SimulationConfig
+)
 from ..models.base import (
     Location,
     ClimateData,
@@ -10,11 +19,52 @@ from ..models.base import (
     Policy,
     Infrastructure
 )
+from ..models.registry import LocationRegistry
+from .scenarios import BASELINE, ScenarioInputs, ScenarioSpec
+from ..utils.climatology import get_climatology
+from ..utils.population import FarmerPopulation
+from ..utils.profiling import NULL_PROFILER, Profiler
+from ..utils.checkpoint import (
+    RESULTS_PREFIX,
+    checkpoint_directory,
+    dump_json,
+    load_history,
+    numpy_random_state,
+    restore_numpy_random_state,
+    save_checkpoint
+)
+
+logger = logging.getLogger(__name__)
+
+# Yield model weights shared by the per-farmer and population code paths
+BASE_YIELD = 4.0  # tons per hectare
+TECHNOLOGY_WEIGHT = 0.4
+EXPERIENCE_WEIGHT = 0.3
+CLIMATE_WEIGHT = 0.3
+
+# Per-region step result fields stored column-wise in checkpoints
+RESULT_FIELDS = ("production", "market_price")
+CLIMATE_IMPACT_FIELDS = (
+    "temperature_change", "rainfall_change", "drought_risk", "flood_risk",
+    "seasonal_temperature", "seasonal_rainfall"
+)
+
+# Static inputs written once next to the checkpoints
+INPUTS_FILE = "inputs.json"
+POPULATION_DIRECTORY = "population"
 
 class SimulationEngine:
-    """Core simulation engine for climate-resilient agriculture system"""
+    """Core simulation engine for climate-resilient agriculture system.
+    
+    Farmers are grouped by interned district code. Unvalidated location
+    records carry the code of the registry that interned them; other
+    locations are interned into ``registry``, so pass the generator's
+    registry when mixing both kinds.
+    """
     
-    def __init__(self, start_date: datetime, end_date: datetime, time_step: timedelta):
+    def __init__(self, start_date: datetime, end_date: datetime, time_step: timedelta,
+                 profiler: Optional[Profiler] = None, scenario: Optional[ScenarioSpec] = None,
+                 seed: Optional[int] = None, registry: Optional[LocationRegistry] = None):
         self.start_date = start_date
         self.end_date = end_date
         self.time_step = time_step
@@ -26,55 +76,127 @@ class SimulationEngine:
         self.climate_data: Dict[str, List[ClimateData]] = {}
         self.market_data: Dict[str, List[MarketData]] = {}
         self.production_data: Dict[str, List[AgriculturalProduction]] = {}
-        
+        self.registry = registry if registry is not None else LocationRegistry()
+        self._farmers_by_region: Optional[Dict[int, List[FarmerProfile]]] = None
+        self.population: Optional[FarmerPopulation] = None
+        self._population_yield: Optional[Dict[str, Tuple[float, float]]] = None
+        self.climatology = get_climatology()
+        self.scenario = scenario if scenario is not None else BASELINE
+        # Weather draws come from the engine's own stream, so engines in one process do not interfere
+        self.rng = np.random.RandomState(seed)
+        self.profiler = profiler if profiler is not None else NULL_PROFILER
+        self.simulation_id = uuid.uuid4().hex[:12]
+        self.checkpoint_dir: Optional[Path] = None
+        self.checkpoint_every = CHECKPOINT_INTERVAL_DAYS
+        self._checkpoint_step = 0
+        self._restored_results: Dict[datetime, Dict[str, Dict[str, float]]] = {}
+    
+    @classmethod
+    def from_config(cls, config: SimulationConfig, profiler: Optional[Profiler] = None,
+                    scenario: Optional[ScenarioSpec] = None) -> "SimulationEngine":
+        """Build an empty engine for a run's dates, time step and seed"""
+        return cls(config.start_date, config.end_date, config.time_step, profiler=profiler,
+                   scenario=scenario, seed=config.seed)
+    
+    @classmethod
+    def for_scenario(cls, scenario: ScenarioSpec, inputs: ScenarioInputs, config: SimulationConfig,
+                     profiler: Optional[Profiler] = None) -> "SimulationEngine":
+        """Build an engine running a scenario on shared inputs, which are left unmodified"""
+        engine = cls.from_config(config, profiler=profiler, scenario=scenario)
+        for location in inputs.regions:
+            engine.add_region(location)
+        engine.set_population(scenario.apply_to_population(inputs.population))
+        for infrastructure in inputs.infrastructure:
+            engine.add_infrastructure(infrastructure)
+        for policy in scenario.apply_to_policies(inputs.policies):
+            engine.add_policy(policy)
+        return engine
+    
     def add_region(self, location: Location) -> None:
         """Add a region to the simulation"""
         self.regions[location.district] = location
-        
+    
     def add_farmer(self, farmer: FarmerProfile) -> None:
         """Add a farmer to the simulation"""
         self.farmers[farmer.farmer_id] = farmer
-        
+        self._farmers_by_region = None
+    
     def add_infrastructure(self, infrastructure: Infrastructure) -> None:
         """Add infrastructure to the simulation"""
         self.infrastructure[infrastructure.infrastructure_id] = infrastructure
-        
+    
     def add_policy(self, policy: Policy) -> None:
         """Add a policy to the simulation"""
         self.policies[policy.policy_id] = policy
+    
+    def set_population(self, population: FarmerPopulation) -> None:
+        """Use a columnar farmer population instead of individual farmers.
         
+        Per-region sums of the climate-independent yield terms are computed
+        once, so each step costs O(regions) rather than O(farmers).
+        """
+        land = population.land_holding_size
+        experience_factor = np.minimum(1.0, population.farming_experience / 20)
+        fixed = land * (population.technology_adoption_level * TECHNOLOGY_WEIGHT
+                        + experience_factor * EXPERIENCE_WEIGHT)
+        districts = len(population.districts)
+        fixed_sums = np.bincount(population.district_code, weights=fixed, minlength=districts)
+        land_sums = np.bincount(population.district_code, weights=land, minlength=districts)
+        self.population = population
+        self._population_yield = {
+            district: (float(fixed_sums[code]), float(land_sums[code]))
+            for code, district in enumerate(population.districts)
+        }
+    
+    def district_code(self, location: Location) -> int:
+        """Interned district code of a location"""
+        code = getattr(location, "district_code", -1)
+        return code if code >= 0 else self.registry.district_code(location.district)
+    
+    def group_farmers_by_region(self) -> Dict[int, List[FarmerProfile]]:
+        """Group farmers by district code, cached until the farmer set changes"""
+        if self._farmers_by_region is None:
+            groups: Dict[int, List[FarmerProfile]] = {}
+            for farmer in self.farmers.values():
+                groups.setdefault(self.district_code(farmer.location), []).append(farmer)
+            self._farmers_by_region = groups
+        return self._farmers_by_region
+    
     def simulate_climate_impact(self, region: str) -> Dict[str, float]:
         """Simulate climate impact on a region"""
         # This is a simplified model - in reality, this would use complex climate models
-        base_temp = 25.0  # Base temperature in Celsius
-        base_rainfall = 2000.0  # Base annual rainfall in mm
+        location = self.regions.get(region)
+        zone = location.agro_ecological_zone if location is not None else None
+        seasonal = self.climatology.lookup(self.current_date, zone)
         
-        # Simulate temperature increase
-        temp_increase = np.random.normal(0.5, 0.2)  # Mean increase of 0.5°C with some variation
-        rainfall_change = np.random.normal(-100, 50)  # Mean decrease of 100mm with variation
+        # Simulate temperature and rainfall change around the scenario's trend
+        scenario = self.scenario
+        temp_increase = self.rng.normal(scenario.temperature_change_mean, scenario.temperature_change_std)
+        rainfall_change = self.rng.normal(scenario.rainfall_change_mean, scenario.rainfall_change_std)
         
         return {
             "temperature_change": temp_increase,
             "rainfall_change": rainfall_change,
             "drought_risk": max(0, min(1, (rainfall_change + 100) / 200)),
-            "flood_risk": max(0, min(1, (-rainfall_change + 100) / 200))
+            "flood_risk": max(0, min(1, (-rainfall_change + 100) / 200)),
+            "seasonal_temperature": seasonal["temperature"],
+            "seasonal_rainfall": seasonal["rainfall_mean"]
         }
-        
+    
     def simulate_crop_yield(self, farmer: FarmerProfile, climate_impact: Dict[str, float]) -> float:
         """Simulate crop yield based on farmer profile and climate impact"""
-        base_yield = 4.0  # Base yield in tons per hectare
-        
         # Factors affecting yield
         technology_factor = farmer.technology_adoption_level
         experience_factor = min(1.0, farmer.farming_experience / 20)  # Normalize experience
         climate_factor = 1.0 - (climate_impact["drought_risk"] + climate_impact["flood_risk"]) / 2
         
         # Calculate final yield
-        yield_factor = (technology_factor * 0.4 + experience_factor * 0.3 + climate_factor * 0.3)
-        final_yield = base_yield * yield_factor
+        yield_factor = (technology_factor * TECHNOLOGY_WEIGHT + experience_factor * EXPERIENCE_WEIGHT
+                        + climate_factor * CLIMATE_WEIGHT)
+        final_yield = BASE_YIELD * yield_factor
         
         return max(0, final_yield)  # Ensure non-negative yield
-        
+    
     def simulate_market_prices(self, production: float, demand: float) -> float:
         """Simulate market prices based on supply and demand"""
         base_price = 1000  # Base price in BDT per ton
@@ -85,26 +207,35 @@ class SimulationEngine:
         final_price = base_price * price_adjustment
         
         return final_price
-        
+    
     def run_simulation_step(self) -> Dict[str, Dict[str, float]]:
         """Run one step of the simulation"""
         results = {}
+        profiler = self.profiler
+        farmers_by_region = self.group_farmers_by_region() if self.population is None else {}
         
         for region_id, region in self.regions.items():
             # Simulate climate impact
-            climate_impact = self.simulate_climate_impact(region_id)
+            with profiler.phase("climate_draw"):
+                climate_impact = self.simulate_climate_impact(region_id)
             
             # Simulate agricultural production
-            region_production = 0
-            for farmer_id, farmer in self.farmers.items():
-                if farmer.location.district == region_id:
-                    yield_per_hectare = self.simulate_crop_yield(farmer, climate_impact)
-                    production = yield_per_hectare * farmer.land_holding_size
-                    region_production += production
+            with profiler.phase("yield"):
+                if self._population_yield is not None:
+                    fixed, land = self._population_yield.get(region_id, (0.0, 0.0))
+                    climate_factor = 1.0 - (climate_impact["drought_risk"] + climate_impact["flood_risk"]) / 2
+                    region_production = BASE_YIELD * (fixed + climate_factor * CLIMATE_WEIGHT * land)
+                else:
+                    region_production = 0
+                    for farmer in farmers_by_region.get(self.district_code(region), ()):
+                        yield_per_hectare = self.simulate_crop_yield(farmer, climate_impact)
+                        production = yield_per_hectare * farmer.land_holding_size
+                        region_production += production
             
             # Simulate market prices
-            demand = region_production * 1.1  # Assume 10% more demand than production
-            market_price = self.simulate_market_prices(region_production, demand)
+            with profiler.phase("market_price"):
+                demand = region_production * 1.1  # Assume 10% more demand than production
+                market_price = self.simulate_market_prices(region_production, demand)
             
             results[region_id] = {
                 "production": region_production,
@@ -112,15 +243,138 @@ class SimulationEngine:
                 "climate_impact": climate_impact
             }
         
+        # One result dict per region plus its climate impact dict
+        profiler.count("objects_allocated", 2 * len(results))
         self.current_date += self.time_step
         return results
+    
+    def enable_checkpoints(self, directory: Union[str, Path] = CHECKPOINT_DIRECTORY,
+                           every: int = CHECKPOINT_INTERVAL_DAYS) -> Path:
+        """Checkpoint every ``every`` steps under ``directory/<simulation_id>``"""
+        self.checkpoint_dir = checkpoint_directory(directory, self.simulation_id)
+        self.checkpoint_every = every
+        return self.checkpoint_dir
+    
+    def _results_to_arrays(self, results: Dict[datetime, Dict[str, Dict[str, float]]]) -> Dict[str, np.ndarray]:
+        """Convert step results to (steps x regions) arrays in region order"""
+        regions = list(self.regions)
+        arrays = {RESULTS_PREFIX + "dates": np.array(list(results), dtype="datetime64[us]")}
+        for field in RESULT_FIELDS:
+            arrays[RESULTS_PREFIX + field] = np.array(
+                [[step[region][field] for region in regions] for step in results.values()], dtype=np.float64
+            ).reshape(len(results), len(regions))
+        for field in CLIMATE_IMPACT_FIELDS:
+            arrays[RESULTS_PREFIX + field] = np.array(
+                [[step[region]["climate_impact"][field] for region in regions] for step in results.values()],
+                dtype=np.float64
+            ).reshape(len(results), len(regions))
+        return arrays
+    
+    def _arrays_to_results(self, arrays: Dict[str, np.ndarray]) -> Dict[datetime, Dict[str, Dict[str, float]]]:
+        """Rebuild step results from the arrays written by _results_to_arrays"""
+        regions = list(self.regions)
+        dates = arrays[RESULTS_PREFIX + "dates"].astype("datetime64[us]").tolist()
+        fields = {field: arrays[RESULTS_PREFIX + field].tolist() for field in RESULT_FIELDS + CLIMATE_IMPACT_FIELDS}
+        return {
+            date: {
+                region: {
+                    **{field: fields[field][i][j] for field in RESULT_FIELDS},
+                    "climate_impact": {field: fields[field][i][j] for field in CLIMATE_IMPACT_FIELDS}
+                }
+                for j, region in enumerate(regions)
+            }
+            for i, date in enumerate(dates)
+        }
+    
+    def _save_inputs(self) -> None:
+        """Write the static simulation inputs once, before the first checkpoint"""
+        path = self.checkpoint_dir / INPUTS_FILE
+        if path.exists():
+            return
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        if self.population is not None:
+            self.population.save(self.checkpoint_dir / POPULATION_DIRECTORY)
+        dump_json(path, {
+            "simulation_id": self.simulation_id,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "time_step": self.time_step.total_seconds(),
+            "checkpoint_every": self.checkpoint_every,
+            "scenario": self.scenario.to_dict(),
+            "regions": [region.dict() for region in self.regions.values()],
+            "farmers": [farmer.dict() for farmer in self.farmers.values()],
+            "infrastructure": [item.dict() for item in self.infrastructure.values()],
+            "policies": [policy.dict() for policy in self.policies.values()],
+            "population": self.population is not None
+        })
+    
+    def save_checkpoint(self, segment: Dict[datetime, Dict[str, Dict[str, float]]]) -> Path:
+        """Checkpoint the engine state and the results of the steps since the last checkpoint"""
+        self._save_inputs()
+        self._checkpoint_step += len(segment)
+        rng_state, rng_arrays = numpy_random_state(self.rng)
+        state = {
+            "engine": "in_memory",
+            "simulation_id": self.simulation_id,
+            "step": self._checkpoint_step,
+            "current_date": self.current_date,
+            "rng": rng_state
+        }
+        with self.profiler.phase("checkpoint"):
+            return save_checkpoint(self.checkpoint_dir, self._checkpoint_step, state,
+                                   {**rng_arrays, **self._results_to_arrays(segment)})
+    
+    @classmethod
+    def resume(cls, simulation_id: str, directory: Union[str, Path] = CHECKPOINT_DIRECTORY,
+               profiler: Optional[Profiler] = None) -> "SimulationEngine":
+        """Rebuild an engine from its latest checkpoint.
+        
+        The restored engine continues from the checkpointed date and RNG
+        state; run_full_simulation then returns the checkpointed results
+        followed by the newly simulated steps.
+        """
+        checkpoint_dir = checkpoint_directory(directory, simulation_id)
+        with open(checkpoint_dir / INPUTS_FILE) as f:
+            inputs = json.load(f)
+        scenario = ScenarioSpec(**inputs["scenario"]) if "scenario" in inputs else None
+        engine = cls(datetime.fromisoformat(inputs["start_date"]), datetime.fromisoformat(inputs["end_date"]),
+                     timedelta(seconds=inputs["time_step"]), profiler=profiler, scenario=scenario)
+        engine.simulation_id = inputs["simulation_id"]
+        for region in inputs["regions"]:
+            engine.add_region(Location(**region))
+        for farmer in inputs["farmers"]:
+            engine.add_farmer(FarmerProfile(**farmer))
+        for item in inputs["infrastructure"]:
+            engine.add_infrastructure(Infrastructure(**item))
+        for policy in inputs["policies"]:
+            engine.add_policy(Policy(**policy))
+        if inputs["population"]:
+            engine.set_population(FarmerPopulation.attach(checkpoint_dir / POPULATION_DIRECTORY))
+        engine.enable_checkpoints(directory, inputs["checkpoint_every"])
         
+        state, arrays = load_history(checkpoint_dir)
+        engine.current_date = datetime.fromisoformat(state["current_date"])
+        engine._checkpoint_step = state["step"]
+        engine._restored_results = engine._arrays_to_results(arrays)
+        restore_numpy_random_state(state["rng"], arrays, engine.rng)
+        return engine
+    
     def run_full_simulation(self) -> Dict[datetime, Dict[str, Dict[str, float]]]:
-        """Run the full simulation from start to end date"""
-        results = {}
+        """Run the full simulation from start (or the resumed checkpoint) to end date"""
+        results = dict(self._restored_results)
+        segment = {}
         
         while self.current_date <= self.end_date:
             step_results = self.run_simulation_step()
             results[self.current_date] = step_results
-            
-        return results 
\ No newline at end of file
+            if self.checkpoint_dir is not None:
+                segment[self.current_date] = step_results
+                if len(segment) >= self.checkpoint_every:
+                    self.save_checkpoint(segment)
+                    segment = {}
+        
+        if self.checkpoint_dir is not None and segment:
+            self.save_checkpoint(segment)
+        if self.profiler.enabled:
+            self.profiler.log(logger, engine="in_memory", steps=len(results))
+        return results
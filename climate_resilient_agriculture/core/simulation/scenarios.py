@@ -0,0 +1,95 @@
+from dataclasses import asdict, dataclass, field, replace
+from typing import Dict, List, Optional
+import numpy as np
+from ..settings import (
+    TEMPERATURE_CHANGE_MEAN,
+    TEMPERATURE_CHANGE_STD,
+    RAINFALL_CHANGE_MEAN,
+    RAINFALL_CHANGE_STD
+)
+from ..models.base import Infrastructure, Location, Policy
+from ..utils.population import FarmerPopulation
+
+@dataclass(frozen=True)
+class ScenarioSpec:
+    """Declarative scenario: adjustments applied to inputs shared by every scenario.
+
+    Climate fields parameterize the in-memory engine's annual climate draws;
+    ``temperature_stress_shift`` is the extra warming the batch production
+    model applies to crop heat stress. Adoption and policy targeting are
+    applied to the shared population and policies as array-level transforms.
+    """
+
+    name: str
+    description: str = ""
+    temperature_change_mean: float = TEMPERATURE_CHANGE_MEAN
+    temperature_change_std: float = TEMPERATURE_CHANGE_STD
+    rainfall_change_mean: float = RAINFALL_CHANGE_MEAN
+    rainfall_change_std: float = RAINFALL_CHANGE_STD
+    temperature_stress_shift: float = 0.0
+    adoption_multiplier: float = 1.0
+    policy_target_sector: Optional[str] = None
+
+    def with_overrides(self, **changes) -> "ScenarioSpec":
+        """Return a copy with some fields changed, e.g. one point of a parameter sweep"""
+        return replace(self, **changes)
+
+    def to_dict(self) -> Dict:
+        """Plain dict of the spec, as stored with checkpoints"""
+        return asdict(self)
+
+    def adjust_adoption(self, levels: np.ndarray) -> np.ndarray:
+        """Scale technology adoption levels, capped at full adoption"""
+        if self.adoption_multiplier == 1.0:
+            return levels
+        return np.minimum(1.0, levels * self.adoption_multiplier)
+
+    def apply_to_population(self, population: FarmerPopulation) -> FarmerPopulation:
+        """Population under this scenario; unchanged columns are shared with the input"""
+        if self.adoption_multiplier == 1.0:
+            return population
+        return population.with_overrides(
+            technology_adoption_level=self.adjust_adoption(population.technology_adoption_level)
+        )
+
+    def apply_to_policies(self, policies: List[Policy]) -> List[Policy]:
+        """Policies under this scenario, retargeted when the scenario targets a sector"""
+        if self.policy_target_sector is None:
+            return list(policies)
+        return [Policy(**{**policy.dict(), "target_sector": self.policy_target_sector}) for policy in policies]
+
+BASELINE = ScenarioSpec("baseline", "Current climate trends and technology adoption")
+
+# Registered scenarios by name
+SCENARIOS: Dict[str, ScenarioSpec] = {
+    spec.name: spec for spec in (
+        BASELINE,
+        ScenarioSpec(
+            "climate_change", "Climate change impacts twice the current trend",
+            temperature_change_mean=TEMPERATURE_CHANGE_MEAN * 2,
+            rainfall_change_mean=RAINFALL_CHANGE_MEAN * 2,
+            temperature_stress_shift=TEMPERATURE_CHANGE_MEAN * 2
+        ),
+        ScenarioSpec(
+            "technology_adoption", "Technology adoption 50% higher, with policies targeting it",
+            adoption_multiplier=1.5,
+            policy_target_sector="technology_adoption"
+        )
+    )
+}
+
+def get_scenario(name: str) -> ScenarioSpec:
+    """Look up a registered scenario by name"""
+    try:
+        return SCENARIOS[name]
+    except KeyError:
+        raise ValueError(f"Unknown scenario: {name}. Choose from {', '.join(SCENARIOS)}") from None
+
+@dataclass
+class ScenarioInputs:
+    """Regions, farmers, infrastructure and policies generated once and shared by scenarios"""
+
+    regions: List[Location]
+    population: FarmerPopulation
+    infrastructure: List[Infrastructure] = field(default_factory=list)
+    policies: List[Policy] = field(default_factory=list)
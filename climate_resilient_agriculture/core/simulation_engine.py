@@ -1,27 +1,63 @@
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
 import logging
+import numpy as np
+from sqlalchemy.orm import Session
+from .settings import (
+    CHECKPOINT_DIRECTORY,
+    CHECKPOINT_INTERVAL_DAYS
+)
 from .database.session import get_session
-from .database.repository import SimulationRepository
+from .database.repository import SUMMARY_COLUMNS, SimulationRepository, month_start
 from .data_generator import DataGenerator
+from .simulation.scenarios import get_scenario
 from .utils.serialization import serialize_results
+from .utils.results_store import ResultsStore
+from .utils.profiling import NULL_PROFILER, Profiler
+from .utils.checkpoint import (
+    RESULTS_PREFIX,
+    checkpoint_directory,
+    list_checkpoints,
+    load_history,
+    python_random_state,
+    restore_python_random_state,
+    save_checkpoint
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Production is computed for all regions in blocks of this many days
+PRODUCTION_BLOCK_DAYS = 365
+
+# Per-region step result fields stored column-wise in checkpoints
+STEP_RESULT_FIELDS = ("temperature", "rainfall", "crop_yield")
+
+# Parameters fixing the generated population, which a fork cannot change
+STRUCTURAL_PARAMETERS = ("seed", "farmer_count", "region_count")
+
+def _row_to_dict(row, exclude=("id", "simulation_id")) -> Dict:
+    """Convert an ORM row to a dict of its column values"""
+    return {column.name: getattr(row, column.name)
+            for column in row.__table__.columns if column.name not in exclude}
+
 class SimulationEngine:
     """Engine for running climate-resilient agriculture simulations"""
     
     def __init__(self, start_date: datetime, end_date: datetime,
-                 scenario_type: str = "baseline", parameters: Optional[Dict] = None):
+                 scenario_type: str = "baseline", parameters: Optional[Dict] = None,
+                 profiler: Optional[Profiler] = None, session: Optional[Session] = None):
         self.start_date = start_date
         self.end_date = end_date
         self.scenario_type = scenario_type
         self.parameters = parameters or {}
         self.current_date = start_date
-        self.data_generator = DataGenerator()
-        self.session = next(get_session())
-        self.repository = SimulationRepository(self.session)
+        self.seed = self.parameters.get('seed')
+        if self.seed is None:
+            self.seed = np.random.SeedSequence().entropy
+        self.data_generator = DataGenerator(seed=self.seed)
+        self._attach(profiler, session)
         
         # Initialize simulation record
         self.simulation = self.repository.create_simulation(
@@ -35,12 +71,41 @@ class SimulationEngine:
         self.regions = self._generate_regions()
         self.farmers = self._generate_farmers()
         self.policies = self._generate_policies()
+        self.crop_data = self.data_generator.generate_crop_data()
+        self._prepare()
         
         logger.info(f"Initialized simulation engine for {scenario_type} scenario")
     
+    def _prepare(self) -> None:
+        """Build the columnar production inputs and reset run-time state"""
+        self._farmer_arrays = self.data_generator.farmers_to_arrays(
+            self.farmers, region_ids=[region.id for region in self.regions]
+        )
+        self._crop_arrays = self.data_generator.crops_to_arrays(self.crop_data)
+        self._production_block_key = None
+        self._production_block = None
+        self.checkpoint_dir: Optional[Path] = None
+        self.checkpoint_every = CHECKPOINT_INTERVAL_DAYS
+        self._checkpoint_step = 0
+        self._restored_results: List[Dict] = []
+        # Per-region SUMMARY_COLUMNS sums of the month being simulated
+        self._summary_month: Optional[datetime] = None
+        self._summary_days = 0
+        self._summary_sums = np.zeros((len(self.regions), len(SUMMARY_COLUMNS)))
+        # (fork date, scenario) pairs from this simulation up to its root simulation
+        self._lineage: List[Tuple[Optional[datetime], str]] = [(None, self.scenario_type)]
+    
+    def _attach(self, profiler: Optional[Profiler], session: Optional[Session]) -> None:
+        """Set up profiling and the database session"""
+        self.profiler = profiler if profiler is not None else NULL_PROFILER
+        # An injected session (e.g. bound to another database) is left open on cleanup
+        self._owns_session = session is None
+        self.session = next(get_session()) if session is None else session
+        self.repository = SimulationRepository(self.session)
+    
     def _generate_regions(self) -> List:
         """Generate regions and store in database, returning ORM objects."""
-        regions = self.data_generator.generate_regions()
+        regions = self.data_generator.generate_regions(self.parameters.get('region_count'))
         db_regions = []
         for region in regions:
             db_region = self.repository.create_region(self.simulation.id, region)
@@ -48,10 +113,11 @@ class SimulationEngine:
         return db_regions
     
     def _generate_farmers(self) -> List[Dict]:
-        """Generate farmers and store in database"""
-        farmers = self.data_generator.generate_farmer_data()
-        for farmer in farmers:
-            self.repository.create_farmer(self.simulation.id, farmer)
+        """Generate farmers, assign them to regions and store in database"""
+        farmers = self.data_generator.generate_farmer_data(self.parameters.get('farmer_count', 1000))
+        for i, farmer in enumerate(farmers):
+            farmer['region_id'] = self.regions[i % len(self.regions)].id
+        self.repository.batch_create_farmers(self.simulation.id, farmers)
         return farmers
     
     def _generate_policies(self) -> List[Dict]:
@@ -61,6 +127,47 @@ class SimulationEngine:
             self.repository.create_policy(self.simulation.id, policy)
         return policies
     
+    def _scenario_for(self, date: datetime) -> str:
+        """Scenario in effect on a date"""
+        for fork_date, scenario_type in self._lineage:
+            if fork_date is None or date >= fork_date:
+                return scenario_type
+        return self.scenario_type
+    
+    def _production_for_day(self, day: int, scenario_type: str):
+        """Return the production block covering a day index and the offset into it"""
+        block_index, offset = divmod(day, PRODUCTION_BLOCK_DAYS)
+        if (block_index, scenario_type) != self._production_block_key:
+            # Each block has its own seeded stream so any block can be recomputed
+            rng = np.random.default_rng([self.seed, block_index])
+            self._production_block = self.data_generator.calculate_production_batch(
+                self._farmer_arrays,
+                self._crop_arrays,
+                num_regions=len(self.regions),
+                num_days=PRODUCTION_BLOCK_DAYS,
+                scenario_type=scenario_type,
+                rng=rng,
+                profiler=self.profiler
+            )
+            self._production_block_key = (block_index, scenario_type)
+        return self._production_block, offset
+    
+    def _region_step_data(self, region, temperature: float, rainfall: float, crop_yield: float) -> Dict:
+        """Per-region step result with the region's attributes"""
+        return {
+            'id': region.id,
+            'district': region.district,
+            'upazila': region.upazila,
+            'union': region.union,
+            'latitude': region.latitude,
+            'longitude': region.longitude,
+            'elevation': region.elevation,
+            'agro_ecological_zone': region.agro_ecological_zone,
+            'temperature': temperature,
+            'rainfall': rainfall,
+            'crop_yield': crop_yield
+        }
+    
     def step(self) -> Dict:
         """Advance simulation by one time step"""
         if self.current_date >= self.end_date:
@@ -69,12 +176,23 @@ class SimulationEngine:
         climate_data_batch = []
         production_data_batch = []
         region_step_data = []
+        profiler = self.profiler
+        production, offset = self._production_for_day((self.current_date - self.start_date).days,
+                                                      self._scenario_for(self.current_date))
+        month = month_start(self.current_date)
+        if month != self._summary_month:
+            self._flush_summary(commit=False)
+            self._summary_month = month
+            self._summary_days = 0
+            self._summary_sums[:] = 0.0
+        step_sums = np.empty_like(self._summary_sums)
         
-        for region in self.regions:
+        for i, region in enumerate(self.regions):
             # Generate climate data
-            climate_data_records = self.data_generator.generate_climate_data(
-                self.current_date, self.end_date
-            )
+            with profiler.phase("climate_draw"):
+                climate_data_records = self.data_generator.generate_climate_data(
+                    self.current_date, self.end_date
+                )
             # Assume temperature and rainfall are always present in the two records
             temperature = None
             rainfall = None
@@ -85,33 +203,37 @@ class SimulationEngine:
                     temperature = record['value']
                 elif record['data_type'] == 'rainfall':
                     rainfall = record['value']
-            # Generate production data
-            production_data = self.data_generator.calculate_production(
-                region, self.current_date, self.scenario_type
-            )
-            production_data['region_id'] = region.id
+            # Production data from the precomputed batch
+            production_data = {
+                'region_id': region.id,
+                'timestamp': self.current_date,
+                'crop_type': production['crop_type'][i],
+                'area_hectares': float(production['area_hectares'][i, offset]),
+                'yield_per_hectare': float(production['yield_per_hectare'][i, offset]),
+                'total_production': float(production['total_production'][i, offset]),
+                'production_cost': float(production['production_cost'][i, offset]),
+                'market_price': float(production['market_price'][i, offset])
+            }
             production_data_batch.append(production_data)
             crop_yield = production_data['yield_per_hectare']
+            step_sums[i] = (production_data['total_production'], crop_yield,
+                            production_data['market_price'], temperature, rainfall)
             # Attach all info for serialization
-            region_step_data.append({
-                'id': region.id,
-                'district': region.district,
-                'upazila': region.upazila,
-                'union': region.union,
-                'latitude': region.latitude,
-                'longitude': region.longitude,
-                'elevation': region.elevation,
-                'agro_ecological_zone': region.agro_ecological_zone,
-                'temperature': temperature,
-                'rainfall': rainfall,
-                'crop_yield': crop_yield
-            })
-        # Batch insert climate data
-        if climate_data_batch:
-            self.repository.batch_create_climate_data(climate_data_batch)
-        # Batch insert production data
-        if production_data_batch:
-            self.repository.batch_create_production_data(production_data_batch)
+            region_step_data.append(self._region_step_data(region, temperature, rainfall, crop_yield))
+        self._summary_sums += step_sums
+        self._summary_days += 1
+        # Batch insert climate and production data in one transaction
+        with profiler.phase("db_insert"):
+            if climate_data_batch:
+                self.repository.batch_create_climate_data(climate_data_batch, commit=False)
+            if production_data_batch:
+                self.repository.batch_create_production_data(production_data_batch, commit=False)
+        with profiler.phase("commit"):
+            self.session.commit()
+        rows = len(climate_data_batch) + len(production_data_batch)
+        profiler.count("rows_written", rows)
+        # Row dicts, ORM objects and per-region result dicts
+        profiler.count("objects_allocated", 2 * rows + len(region_step_data))
         # Update current date
         self.current_date += timedelta(days=1)
         return {
@@ -119,21 +241,215 @@ class SimulationEngine:
             'regions': region_step_data
         }
     
-    def run(self) -> Dict:
-        """Run the complete simulation"""
-        results = []
+    def _flush_summary(self, commit: bool = True) -> None:
+        """Write the summary rows of the month being simulated"""
+        if self._summary_month is None or not self._summary_days:
+            return
+        self.repository.replace_month_summary(
+            self.simulation.id, self._summary_month, self._summary_days,
+            [region.id for region in self.regions], self._summary_sums, commit=commit
+        )
+    
+    def enable_checkpoints(self, directory: Union[str, Path] = CHECKPOINT_DIRECTORY,
+                           every: int = CHECKPOINT_INTERVAL_DAYS) -> Path:
+        """Checkpoint every ``every`` steps under ``directory/<simulation id>``"""
+        self.checkpoint_dir = checkpoint_directory(directory, self.simulation.id)
+        self.checkpoint_every = every
+        return self.checkpoint_dir
+    
+    def save_checkpoint(self, segment: List[Dict]) -> Path:
+        """Checkpoint the engine state and the results of the steps since the last checkpoint.
+        
+        Climate and production rows are already committed by each step, so
+        only the generator state and the in-memory step results are saved.
+        """
+        self._checkpoint_step += len(segment)
+        rng_state, rng_arrays = python_random_state(self.data_generator.random)
+        state = {
+            'engine': 'database',
+            'simulation_id': self.simulation.id,
+            'step': self._checkpoint_step,
+            'current_date': self.current_date,
+            'checkpoint_every': self.checkpoint_every,
+            'seed': self.seed,
+            'crop_data': self.crop_data,
+            'rng': rng_state,
+            'generator_rng': self.data_generator.rng.bit_generator.state
+        }
+        arrays = {RESULTS_PREFIX + 'dates': np.array([step['date'] for step in segment], dtype='datetime64[us]')}
+        for field in STEP_RESULT_FIELDS:
+            arrays[RESULTS_PREFIX + field] = np.array(
+                [[region[field] for region in step['regions']] for step in segment], dtype=np.float64
+            ).reshape(len(segment), len(self.regions))
+        with self.profiler.phase("checkpoint"):
+            return save_checkpoint(self.checkpoint_dir, self._checkpoint_step, state, {**rng_arrays, **arrays})
+    
+    def _restore(self, simulation, state: Dict, arrays: Dict, directory: Union[str, Path]) -> None:
+        """Load a stored simulation's inputs and the engine state of a checkpoint"""
+        self.simulation = simulation
+        self.start_date = simulation.start_date
+        self.end_date = simulation.end_date
+        self.scenario_type = simulation.scenario_type
+        self.parameters = simulation.parameters or {}
+        self.current_date = datetime.fromisoformat(state['current_date'])
+        self.seed = state['seed']
+        self.data_generator = DataGenerator(seed=self.seed)
+        restore_python_random_state(self.data_generator.random, state['rng'], arrays)
+        self.data_generator.rng.bit_generator.state = state['generator_rng']
+        self.regions = self.repository.get_simulation_regions(simulation.id)
+        self.farmers = [_row_to_dict(farmer) for farmer in self.repository.get_simulation_farmers(simulation.id)]
+        self.policies = [_row_to_dict(policy) for policy in self.repository.get_simulation_policies(simulation.id)]
+        self.crop_data = state['crop_data']
+        self._prepare()
+        self._lineage = []
+        ancestor = simulation
+        while ancestor.parent is not None:
+            self._lineage.append((ancestor.fork_date, ancestor.scenario_type))
+            ancestor = ancestor.parent
+        self._lineage.append((None, ancestor.scenario_type))
+        self.enable_checkpoints(directory, state['checkpoint_every'])
+        self._checkpoint_step = state['step']
+        
+        # Rebuild the partial month's summary from the rows stored before the checkpoint
+        self._summary_month = month_start(self.current_date)
+        self._summary_days, self._summary_sums = self.repository.aggregate_region_data(
+            [region.id for region in self.regions], self._summary_month, self.current_date
+        )
+        
+        dates = arrays[RESULTS_PREFIX + 'dates'].astype('datetime64[us]').tolist()
+        fields = {field: arrays[RESULTS_PREFIX + field].tolist() for field in STEP_RESULT_FIELDS}
+        self._restored_results = [
+            {
+                'date': date,
+                'regions': [
+                    self._region_step_data(region, *(fields[field][i][j] for field in STEP_RESULT_FIELDS))
+                    for j, region in enumerate(self.regions)
+                ]
+            }
+            for i, date in enumerate(dates)
+        ]
+    
+    @classmethod
+    def resume(cls, simulation_id: int, directory: Union[str, Path] = CHECKPOINT_DIRECTORY,
+               profiler: Optional[Profiler] = None, session: Optional[Session] = None) -> "SimulationEngine":
+        """Reattach to a stored simulation and continue from its latest checkpoint.
+        
+        Rows written by the interrupted run after the checkpoint are deleted,
+        so only the steps since the checkpoint are simulated again.
+        """
+        engine = cls.__new__(cls)
+        engine._attach(profiler, session)
+        simulation = engine.repository.get_simulation(simulation_id)
+        if simulation is None:
+            raise ValueError(f"Simulation {simulation_id} not found")
+        state, arrays = load_history(checkpoint_directory(directory, simulation_id))
+        engine._restore(simulation, state, arrays, directory)
+        
+        # Discard rows of steps the interrupted run completed after the checkpoint
+        engine.repository.delete_region_data_since(simulation_id, engine.current_date)
+        logger.info(f"Resumed simulation {simulation_id} at {engine.current_date.date()}")
+        return engine
+    
+    @classmethod
+    def fork(cls, parent_id: int, fork_date: datetime, scenario_type: Optional[str] = None,
+             parameters: Optional[Dict] = None, directory: Union[str, Path] = CHECKPOINT_DIRECTORY,
+             profiler: Optional[Profiler] = None, session: Optional[Session] = None) -> "SimulationEngine":
+        """Fork a stored simulation at a date into a child simulation.
+        
+        The child reuses the parent's results and rows up to the parent's
+        latest checkpoint on or before ``fork_date`` and simulates only the
+        remaining steps, following the new scenario from ``fork_date`` on.
+        """
+        if scenario_type is not None:
+            get_scenario(scenario_type)
+        engine = cls.__new__(cls)
+        engine._attach(profiler, session)
+        repository = engine.repository
+        parent = repository.get_simulation(parent_id)
+        if parent is None:
+            raise ValueError(f"Simulation {parent_id} not found")
+        if not parent.start_date <= fork_date < parent.end_date:
+            raise ValueError(f"Fork date {fork_date.date()} is outside simulation {parent_id}")
+        parent_parameters = parent.parameters or {}
+        parameters = {**parent_parameters, **(parameters or {})}
+        for key in STRUCTURAL_PARAMETERS:
+            if parameters.get(key) != parent_parameters.get(key):
+                raise ValueError(f"Parameter '{key}' cannot change in a fork")
+        # Before its own fork date a simulation matches its parent, so history can come from an ancestor
+        source = parent
+        while source.parent is not None and fork_date < source.fork_date:
+            source = source.parent
+        state, arrays = load_history(checkpoint_directory(directory, source.id), until=fork_date)
+        
+        # The child gets its own copy of the parent's inputs and of the reused rows
+        simulation = repository.create_simulation(
+            scenario_type=scenario_type or parent.scenario_type,
+            start_date=parent.start_date,
+            end_date=parent.end_date,
+            parameters=parameters,
+            parent_id=parent_id,
+            fork_date=fork_date
+        )
+        parent_regions = repository.get_simulation_regions(parent_id)
+        regions = [repository.create_region(simulation.id, _row_to_dict(region)) for region in parent_regions]
+        parent_region_ids = {parent_region.id: region.id for parent_region, region in zip(parent_regions, regions)}
+        farmers = [_row_to_dict(farmer) for farmer in repository.get_simulation_farmers(parent_id)]
+        for farmer in farmers:
+            farmer['region_id'] = parent_region_ids.get(farmer['region_id'])
+        repository.batch_create_farmers(simulation.id, farmers)
+        for policy in repository.get_simulation_policies(parent_id):
+            repository.create_policy(simulation.id, _row_to_dict(policy))
+        checkpoint_date = datetime.fromisoformat(state['current_date'])
+        with engine.profiler.phase("db_insert"):
+            source_regions = repository.get_simulation_regions(source.id)
+            source_region_ids = {source_region.id: region.id for source_region, region in zip(source_regions, regions)}
+            repository.copy_region_data(source_region_ids, until=checkpoint_date)
+            repository.copy_summaries(source.id, simulation.id, source_region_ids,
+                                      before=month_start(checkpoint_date))
+        
+        engine._restore(simulation, state, arrays, directory)
+        # The child's first checkpoint carries the reused prefix so it can be resumed or forked
+        engine._checkpoint_step = 0
+        engine.save_checkpoint(engine._restored_results)
+        logger.info(f"Forked simulation {parent_id} at {fork_date.date()} into {simulation.id}, "
+                    f"reusing {len(engine._restored_results)} steps")
+        return engine
+    
+    def run(self, results_path: Optional[str] = None) -> Dict:
+        """Run the complete simulation (or its remainder when resumed), optionally also saving columnar results"""
+        results = list(self._restored_results)
+        segment = []
+        if self.checkpoint_dir is not None and not list_checkpoints(self.checkpoint_dir):
+            # Initial state, so the run can be forked from its start date
+            self.save_checkpoint(segment)
         while self.current_date < self.end_date:
             step_result = self.step()
             if step_result:
                 results.append(step_result)
+                if self.checkpoint_dir is not None:
+                    segment.append(step_result)
+                    if len(segment) >= self.checkpoint_every:
+                        self.save_checkpoint(segment)
+                        segment = []
+        if self.checkpoint_dir is not None and segment:
+            self.save_checkpoint(segment)
+        with self.profiler.phase("commit"):
+            self._flush_summary()
         
         # Serialize results before storing
-        serialized_results = serialize_results(results)
+        with self.profiler.phase("serialization"):
+            serialized_results = serialize_results(results)
         
         # Store final results
-        self.repository.update_simulation_results(self.simulation.id, serialized_results)
+        with self.profiler.phase("commit"):
+            self.repository.update_simulation_results(self.simulation.id, serialized_results)
+        if results_path is not None:
+            ResultsStore.from_step_results(serialized_results).save(results_path)
         
         logger.info(f"Completed {self.scenario_type} simulation")
+        if self.profiler.enabled:
+            self.profiler.log(logger, engine="database", simulation_id=self.simulation.id,
+                              scenario_type=self.scenario_type, steps=len(results))
         return {
             'simulation_id': self.simulation.id,
             'results': serialized_results
@@ -145,4 +461,5 @@ class SimulationEngine:
     
     def cleanup(self):
         """Clean up resources"""
-        self.session.close() 
\ No newline at end of file
+        if self._owns_session:
+            self.session.close() 
\ No newline at end of file
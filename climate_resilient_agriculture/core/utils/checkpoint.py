@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import json
+import os
+import random
+import shutil
+import time
+import numpy as np
+
+CHECKPOINT_PREFIX = "checkpoint_"
+
+# Arrays holding the results of the steps since the previous checkpoint
+RESULTS_PREFIX = "results/"
+
+def checkpoint_directory(root: Union[str, Path], simulation_id: Any) -> Path:
+    """Directory holding the checkpoints of one simulation"""
+    return Path(root) / str(simulation_id)
+
+def prune_checkpoints(root: Union[str, Path], simulation_ids: Iterable[Any] = (),
+                      max_age: Optional[timedelta] = None) -> List[Path]:
+    """Remove the checkpoints of some simulations, and of database runs idle for longer than max_age.
+
+    Only directories named by an integer id, i.e. database simulations,
+    expire by age. Returns the removed directories.
+    """
+    root = Path(root)
+    stale = {checkpoint_directory(root, simulation_id) for simulation_id in simulation_ids}
+    if max_age is not None and root.is_dir():
+        cutoff = time.time() - max_age.total_seconds()
+        for directory in root.iterdir():
+            if not directory.name.isdigit():
+                continue
+            checkpoints = list_checkpoints(directory)
+            if max((path.stat().st_mtime for path in checkpoints), default=directory.stat().st_mtime) < cutoff:
+                stale.add(directory)
+    removed = []
+    for directory in sorted(stale):
+        if directory.exists():
+            shutil.rmtree(directory, ignore_errors=True)
+            removed.append(directory)
+    return removed
+
+def _json_default(obj: Any) -> Any:
+    """Encode numpy scalars and dates found in engine state"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+def dump_json(path: Path, data: Any) -> None:
+    """Atomically write a JSON file next to the checkpoints"""
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, default=_json_default)
+    os.replace(tmp_path, path)
+
+def save_checkpoint(directory: Path, step: int, state: Dict, arrays: Dict[str, np.ndarray]) -> Path:
+    """Atomically write one checkpoint as a compressed .npz archive.
+
+    ``state`` holds small JSON-serializable engine state (dates, counters,
+    RNG state); ``arrays`` holds binary state and the results segment.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{CHECKPOINT_PREFIX}{step:08d}.npz"
+    encoded_state = np.frombuffer(json.dumps(state, default=_json_default).encode(), dtype=np.uint8)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, __state__=encoded_state, **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+def load_checkpoint(path: Path) -> Tuple[Dict, Dict[str, np.ndarray]]:
+    """Read a checkpoint's state and arrays"""
+    with np.load(path) as data:
+        state = json.loads(data["__state__"].tobytes())
+        arrays = {name: data[name] for name in data.files if name != "__state__"}
+    return state, arrays
+
+def list_checkpoints(directory: Path) -> List[Path]:
+    """Checkpoint files of a simulation in step order"""
+    return sorted(Path(directory).glob(f"{CHECKPOINT_PREFIX}*.npz"))
+
+def load_history(directory: Path, until: Optional[datetime] = None) -> Tuple[Dict, Dict[str, np.ndarray]]:
+    """Load the latest checkpoint plus the results of all steps up to it.
+
+    With ``until``, the latest checkpoint whose current date is not after
+    ``until`` is used instead. Result segments of the checkpoints up to the
+    chosen one are concatenated in step order; the other arrays come from the
+    chosen checkpoint.
+    """
+    state = None
+    arrays: Dict[str, np.ndarray] = {}
+    segments: Dict[str, List[np.ndarray]] = {}
+    for path in list_checkpoints(directory):
+        checkpoint_state, checkpoint_arrays = load_checkpoint(path)
+        if until is not None and datetime.fromisoformat(checkpoint_state["current_date"]) > until:
+            break
+        state = checkpoint_state
+        arrays = {}
+        for name, values in checkpoint_arrays.items():
+            if name.startswith(RESULTS_PREFIX):
+                segments.setdefault(name, []).append(values)
+            else:
+                arrays[name] = values
+    if state is None:
+        raise FileNotFoundError(f"No checkpoint found in {directory}")
+    for name, parts in segments.items():
+        arrays[name] = np.concatenate(parts)
+    return state, arrays
+
+def numpy_random_state(random_state: np.random.RandomState) -> Tuple[Dict, Dict[str, np.ndarray]]:
+    """Capture the state of a numpy RandomState"""
+    name, keys, pos, has_gauss, cached_gaussian = random_state.get_state()
+    return ({"name": name, "pos": int(pos), "has_gauss": int(has_gauss),
+             "cached_gaussian": float(cached_gaussian)},
+            {"rng/keys": keys})
+
+def restore_numpy_random_state(state: Dict, arrays: Dict[str, np.ndarray],
+                               random_state: np.random.RandomState) -> None:
+    """Restore a RandomState captured by numpy_random_state"""
+    random_state.set_state((state["name"], arrays["rng/keys"], state["pos"],
+                            state["has_gauss"], state["cached_gaussian"]))
+
+def python_random_state(generator: random.Random) -> Tuple[Dict, Dict[str, np.ndarray]]:
+    """Capture the state of a random.Random instance"""
+    version, internal, gauss_next = generator.getstate()
+    return ({"version": version, "gauss_next": gauss_next},
+            {"rng/python": np.array(internal, dtype=np.uint32)})
+
+def restore_python_random_state(generator: random.Random, state: Dict,
+                                arrays: Dict[str, np.ndarray]) -> None:
+    """Restore the state of a random.Random instance"""
+    internal = tuple(int(value) for value in arrays["rng/python"])
+    generator.setstate((state["version"], internal, state["gauss_next"]))
@@ -0,0 +1,77 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Tuple
+import calendar
+import numpy as np
+from ..settings import (
+    AGRO_ECOLOGICAL_ZONES,
+    BASE_TEMPERATURE
+)
+
+# Day-of-year tables are indexed by tm_yday (1-366); index 0 is unused
+DAYS_IN_TABLE = 367
+
+# Monsoon season months (inclusive)
+MONSOON_MONTHS = (5, 9)
+
+# Mean daily rainfall (mm) for the exponential rainfall model
+MONSOON_RAINFALL_MEAN = 50.0
+DRY_SEASON_RAINFALL_MEAN = 10.0
+
+# Per-zone (temperature offset in Celsius, rainfall multiplier). All zones
+# share one climate for now; distinct zone climates only need entries here.
+ZONE_CLIMATE_OFFSETS: Dict[str, Tuple[float, float]] = {
+    zone: (0.0, 1.0) for zone in AGRO_ECOLOGICAL_ZONES
+}
+
+class Climatology:
+    """Read-only lookup tables of seasonal climate per zone and day of year"""
+
+    def __init__(self, base_temperature: float = BASE_TEMPERATURE):
+        self.zones = list(ZONE_CLIMATE_OFFSETS)
+        self.zone_index = {zone: i for i, zone in enumerate(self.zones)}
+
+        yday = np.arange(DAYS_IN_TABLE)
+        self.seasonal_factor = np.sin(2 * np.pi * yday / 365)
+        self.market_seasonal_factor = 1 + 0.2 * self.seasonal_factor
+
+        # Monsoon flag per (is_leap_year, day of year), since months shift by a day in leap years
+        self.monsoon = np.zeros((2, DAYS_IN_TABLE), dtype=bool)
+        for leap, year in enumerate((2023, 2024)):
+            months = np.array([0] + [
+                datetime.fromordinal(datetime(year, 1, 1).toordinal() + day - 1).month
+                for day in range(1, DAYS_IN_TABLE)
+            ])
+            self.monsoon[leap] = (months >= MONSOON_MONTHS[0]) & (months <= MONSOON_MONTHS[1])
+
+        offsets = np.array([ZONE_CLIMATE_OFFSETS[zone] for zone in self.zones])
+        self.temperature = (base_temperature + offsets[:, :1]) + 10 * self.seasonal_factor
+        self.rainfall_mean = offsets[:, 1:, None] * np.where(
+            self.monsoon, MONSOON_RAINFALL_MEAN, DRY_SEASON_RAINFALL_MEAN
+        )
+
+        # Tables are shared between engines (and forked workers), so freeze them
+        for table in (self.seasonal_factor, self.market_seasonal_factor, self.monsoon,
+                      self.temperature, self.rainfall_mean):
+            table.flags.writeable = False
+
+    def lookup(self, date: datetime, zone: str = None) -> Dict[str, float]:
+        """Return the climatology entry for a date and agro-ecological zone"""
+        yday = date.timetuple().tm_yday
+        leap = int(calendar.isleap(date.year))
+        z = self.zone_index.get(zone, 0)
+        return {
+            "seasonal_factor": float(self.seasonal_factor[yday]),
+            "temperature": float(self.temperature[z, yday]),
+            "rainfall_mean": float(self.rainfall_mean[z, leap, yday]),
+            "monsoon": bool(self.monsoon[leap, yday])
+        }
+
+@lru_cache(maxsize=None)
+def get_climatology() -> Climatology:
+    """Return the process-wide climatology, building it on first use.
+
+    Build it before starting worker pools so forked workers inherit the
+    tables instead of recomputing them.
+    """
+    return Climatology()
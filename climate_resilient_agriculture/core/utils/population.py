@@ -0,0 +1,106 @@
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+import json
+import numpy as np
+
+# Column name -> dtype of the columnar farmer population
+POPULATION_COLUMNS = {
+    "land_holding_size": np.float64,
+    "farming_experience": np.int32,
+    "technology_adoption_level": np.float64,
+    "risk_tolerance": np.float64,
+    "access_to_credit": np.bool_,
+    "access_to_insurance": np.bool_,
+    "district_code": np.int32,
+    "zone_code": np.int32
+}
+
+METADATA_FILE = "population.json"
+
+class FarmerPopulation:
+    """Columnar farmer population that can be shared between processes.
+
+    The population is written once with ``save`` and attached by workers with
+    ``attach``, which memory-maps every column read-only so all processes share
+    the same pages. Scenarios that change a column use ``with_overrides``,
+    which returns a new population holding private copies of only the
+    overridden columns (copy-on-write at column granularity).
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], districts: List[str], zones: List[str]):
+        missing = set(POPULATION_COLUMNS) - set(columns)
+        if missing:
+            raise ValueError(f"Missing population columns: {sorted(missing)}")
+        self.columns = columns
+        self.districts = list(districts)
+        self.zones = list(zones)
+
+    @classmethod
+    def from_profiles(cls, farmers: Iterable, districts: Optional[List[str]] = None,
+                      zones: Optional[List[str]] = None) -> "FarmerPopulation":
+        """Build a population from FarmerProfile models or FarmerRecord objects"""
+        farmers = list(farmers)
+        district_index = {name: i for i, name in enumerate(districts or [])}
+        zone_index = {name: i for i, name in enumerate(zones or [])}
+
+        def code(index: Dict[str, int], name: str) -> int:
+            if name not in index:
+                index[name] = len(index)
+            return index[name]
+
+        count = len(farmers)
+        columns = {
+            name: np.fromiter((getattr(f, name) for f in farmers), dtype=dtype, count=count)
+            for name, dtype in POPULATION_COLUMNS.items()
+            if name not in ("district_code", "zone_code")
+        }
+        columns["district_code"] = np.fromiter(
+            (code(district_index, f.location.district) for f in farmers), dtype=np.int32, count=count
+        )
+        columns["zone_code"] = np.fromiter(
+            (code(zone_index, f.location.agro_ecological_zone) for f in farmers), dtype=np.int32, count=count
+        )
+        return cls(columns, list(district_index), list(zone_index))
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Write the population as one .npy file per column plus metadata"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in POPULATION_COLUMNS:
+            np.save(path / f"{name}.npy", np.ascontiguousarray(self.columns[name]))
+        with open(path / METADATA_FILE, "w") as f:
+            json.dump({"count": len(self), "districts": self.districts, "zones": self.zones}, f)
+        return path
+
+    @classmethod
+    def attach(cls, path: Union[str, Path]) -> "FarmerPopulation":
+        """Attach to a saved population read-only without copying it"""
+        path = Path(path)
+        with open(path / METADATA_FILE) as f:
+            metadata = json.load(f)
+        columns = {
+            name: np.load(path / f"{name}.npy", mmap_mode="r")
+            for name in POPULATION_COLUMNS
+        }
+        return cls(columns, metadata["districts"], metadata["zones"])
+
+    def with_overrides(self, **overrides: np.ndarray) -> "FarmerPopulation":
+        """Return a population with some columns replaced, sharing the rest"""
+        columns = dict(self.columns)
+        for name, values in overrides.items():
+            if name not in POPULATION_COLUMNS:
+                raise KeyError(f"Unknown population column: {name}")
+            values = np.asarray(values, dtype=POPULATION_COLUMNS[name])
+            if values.shape != (len(self),):
+                raise ValueError(f"Override for {name} must have shape ({len(self)},)")
+            columns[name] = values
+        return FarmerPopulation(columns, self.districts, self.zones)
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        columns = self.__dict__.get("columns", {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    def __len__(self) -> int:
+        return len(self.columns["land_holding_size"])
@@ -0,0 +1,151 @@
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from threading import Lock
+from time import perf_counter
+from pathlib import Path
+from typing import Dict, Iterator
+import json
+import logging
+import os
+
+# Reusable no-op context for disabled profiling
+_NULL_PHASE = nullcontext()
+
+# Phases instrumented in the simulation engines' step functions
+PHASES = ("climate_draw", "yield", "market_price", "db_insert", "commit", "serialization", "checkpoint")
+
+class Profiler:
+    """Collects per-phase wall-clock timings and event counters.
+
+    Engines wrap each phase of a step in ``with profiler.phase(name)`` and
+    record counters such as rows written with ``profiler.count``. Profilers
+    from several runs can be merged into a process-wide one for export.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.timings: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.counters: Dict[str, int] = defaultdict(int)
+        self._lock = Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a block of code under one of PHASES"""
+        if name not in PHASES:
+            raise ValueError(f"Unknown phase: {name}. Choose from {', '.join(PHASES)}")
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += perf_counter() - start
+            self.calls[name] += 1
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Increment a counter"""
+        self.counters[name] += value
+
+    def merge(self, other: "Profiler") -> None:
+        """Add another profiler's timings and counters to this one"""
+        with self._lock:
+            for name, seconds in other.timings.items():
+                self.timings[name] += seconds
+            for name, calls in other.calls.items():
+                self.calls[name] += calls
+            for name, value in other.counters.items():
+                self.counters[name] += value
+
+    def reset(self) -> None:
+        """Discard all recorded timings and counters"""
+        with self._lock:
+            self.timings.clear()
+            self.calls.clear()
+            self.counters.clear()
+
+    def summary(self) -> Dict:
+        """Return timings and counters as a plain dict"""
+        return {
+            "phases": {
+                name: {"seconds": self.timings[name], "calls": self.calls[name]}
+                for name in self.timings
+            },
+            "counters": dict(self.counters)
+        }
+
+    @classmethod
+    def from_summary(cls, summary: Dict) -> "Profiler":
+        """Rebuild a profiler from the output of ``summary``"""
+        profiler = cls()
+        for name, phase in summary.get("phases", {}).items():
+            profiler.timings[name] = phase["seconds"]
+            profiler.calls[name] = phase["calls"]
+        profiler.counters.update(summary.get("counters", {}))
+        return profiler
+
+    def save(self, path: Path) -> None:
+        """Atomically write the summary to a JSON file, e.g. to share it between processes"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with self._lock:
+            summary = self.summary()
+        with open(tmp_path, "w") as f:
+            json.dump(summary, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "Profiler":
+        """Read a profiler written by ``save``"""
+        with open(path) as f:
+            return cls.from_summary(json.load(f))
+
+    def log(self, logger: logging.Logger, **context) -> None:
+        """Emit the summary as one structured JSON log record"""
+        logger.info(json.dumps({"event": "simulation_profile", **context, **self.summary()}, default=str))
+
+    def format_table(self) -> str:
+        """Format the summary as a plain-text table"""
+        total = sum(self.timings.values()) or 1.0
+        lines = [f"{'phase':<16}{'calls':>10}{'total (s)':>12}{'mean (ms)':>12}{'share':>8}"]
+        for name, seconds in sorted(self.timings.items(), key=lambda item: -item[1]):
+            calls = self.calls[name]
+            lines.append(
+                f"{name:<16}{calls:>10}{seconds:>12.3f}{1000 * seconds / max(calls, 1):>12.3f}"
+                f"{seconds / total:>8.1%}"
+            )
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:<16}{value:>10}")
+        return "\n".join(lines)
+
+    def to_prometheus(self, prefix: str = "simulation") -> str:
+        """Render timings and counters in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {prefix}_phase_seconds_total Wall-clock time spent in each simulation phase",
+            f"# TYPE {prefix}_phase_seconds_total counter"
+        ]
+        lines += [f'{prefix}_phase_seconds_total{{phase="{name}"}} {seconds}'
+                  for name, seconds in sorted(self.timings.items())]
+        lines += [
+            f"# HELP {prefix}_phase_calls_total Number of times each simulation phase ran",
+            f"# TYPE {prefix}_phase_calls_total counter"
+        ]
+        lines += [f'{prefix}_phase_calls_total{{phase="{name}"}} {calls}'
+                  for name, calls in sorted(self.calls.items())]
+        for name, value in sorted(self.counters.items()):
+            lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total {value}"]
+        return "\n".join(lines) + "\n"
+
+class NullProfiler(Profiler):
+    """Profiler that records nothing, used when instrumentation is off"""
+
+    enabled = False
+
+    def phase(self, name: str):
+        return _NULL_PHASE
+
+    def count(self, name: str, value: int = 1) -> None:
+        pass
+
+# Shared no-op profiler used by engines by default
+NULL_PROFILER = NullProfiler()
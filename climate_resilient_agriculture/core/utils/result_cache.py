@@ -0,0 +1,81 @@
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+import hashlib
+import json
+import shutil
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[2]
+
+# Packages whose sources can change simulation results or the cached run's charts
+SIMULATION_PACKAGES = ("analysis", "config", "core")
+# Further modules that turn inputs into cached results
+SIMULATION_MODULES = ("scripts/run_scenarios.py",)
+
+def simulation_sources() -> List[str]:
+    """Every source file hashed into the code version, in a stable order"""
+    paths = [path for package in SIMULATION_PACKAGES for path in (PACKAGE_ROOT / package).rglob("*.py")]
+    paths += [PACKAGE_ROOT / name for name in SIMULATION_MODULES]
+    return sorted(path.relative_to(PACKAGE_ROOT).as_posix() for path in paths)
+
+@lru_cache(maxsize=None)
+def code_version() -> str:
+    """Hash of the simulation sources, so cached runs are not reused across model changes"""
+    digest = hashlib.sha256()
+    for name in simulation_sources():
+        digest.update(name.encode())
+        path = PACKAGE_ROOT / name
+        if path.exists():
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+def request_key(scenario_type: str, start_date: datetime, end_date: datetime,
+                parameters: Optional[Dict] = None, engine: str = "database") -> Optional[str]:
+    """Canonical hash of a simulation request, or None when the run is not seeded.
+
+    Unseeded runs draw a fresh seed and are not reproducible, so they are
+    never served from the cache.
+    """
+    parameters = parameters or {}
+    if parameters.get("seed") is None:
+        return None
+    canonical = json.dumps({
+        "code_version": code_version(),
+        "engine": engine,
+        "scenario_type": scenario_type,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "parameters": parameters
+    }, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def store_artifacts(root: Union[str, Path], key: str, source: Path, names: Iterable[str]) -> Path:
+    """Keep copies of a run's output files under ``root/<key>``, replacing earlier copies"""
+    target = Path(root) / key
+    shutil.rmtree(target, ignore_errors=True)
+    target.mkdir(parents=True)
+    for name in names:
+        if (source / name).exists():
+            shutil.copy2(source / name, target / name)
+    return target
+
+def restore_artifacts(root: Union[str, Path], key: str, target: Path) -> bool:
+    """Copy the output files kept for a request key into ``target``; False when none are kept"""
+    source = Path(root) / key
+    if not source.is_dir() or not any(source.iterdir()):
+        return False
+    target.mkdir(parents=True, exist_ok=True)
+    for path in source.iterdir():
+        shutil.copy2(path, target / path.name)
+    return True
+
+def prune_artifacts(root: Union[str, Path], keys: Iterable[str]) -> None:
+    """Remove the output files of request keys no longer cached"""
+    root = Path(root)
+    if not root.is_dir():
+        return
+    keys = set(keys)
+    for path in root.iterdir():
+        if path.is_dir() and path.name not in keys:
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,123 @@
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import json
+import numpy as np
+
+# Per-region series recorded for every simulation step
+RESULT_METRICS = ("temperature", "rainfall", "crop_yield")
+
+METADATA_FILE = "results.json"
+
+# One per-region series: (region label, timestamps, values)
+RegionSeries = Tuple[str, np.ndarray, np.ndarray]
+
+# Temporal resampling of series, and how values within a period are combined
+RESAMPLE_FREQUENCIES = ("daily", "weekly", "monthly")
+RESAMPLE_AGGREGATIONS = ("mean", "sum")
+
+def resample_series(timestamps: np.ndarray, values: np.ndarray, frequency: str,
+                    aggregation: str = "mean") -> Tuple[np.ndarray, np.ndarray]:
+    """Combine a series into daily, weekly (Monday-start) or monthly periods.
+
+    Returns the start of each non-empty period and its mean or sum; NaN
+    values are ignored.
+    """
+    if frequency not in RESAMPLE_FREQUENCIES:
+        raise ValueError(f"Unknown resample frequency: {frequency}")
+    if aggregation not in RESAMPLE_AGGREGATIONS:
+        raise ValueError(f"Unknown resample aggregation: {aggregation}")
+    days = np.asarray(timestamps).astype("datetime64[D]")
+    if frequency == "monthly":
+        periods = days.astype("datetime64[M]").astype("datetime64[D]")
+    elif frequency == "weekly":
+        # 1970-01-01 was a Thursday, so day numbers are offset by 3 from Monday
+        day_numbers = days.astype(np.int64)
+        periods = (day_numbers - (day_numbers + 3) % 7).astype("datetime64[D]")
+    else:
+        periods = days
+    starts, inverse = np.unique(periods, return_inverse=True)
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    sums = np.bincount(inverse[valid], weights=values[valid], minlength=len(starts))
+    if aggregation == "sum":
+        return starts, sums
+    counts = np.bincount(inverse[valid], minlength=len(starts))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return starts, sums / counts
+
+class ResultsStore:
+    """Columnar simulation results with one (regions x days) array per metric.
+
+    A saved store is a directory holding ``dates.npy``, one ``<metric>.npy``
+    per metric and a small metadata file. ``attach`` memory-maps the arrays
+    read-only, so reading one region's series only touches that row.
+    """
+
+    def __init__(self, dates: np.ndarray, regions: List[str], columns: Dict[str, np.ndarray]):
+        self.dates = np.asarray(dates, dtype="datetime64[s]")
+        self.regions = list(regions)
+        self.columns = columns
+        for name, values in columns.items():
+            if values.shape != (len(self.regions), len(self.dates)):
+                raise ValueError(f"Column {name} must have shape ({len(self.regions)}, {len(self.dates)})")
+
+    @classmethod
+    def from_step_results(cls, results: List[Dict],
+                          metrics: Sequence[str] = RESULT_METRICS) -> "ResultsStore":
+        """Build a store from the step results returned by the database engine"""
+        num_days = len(results)
+        regions = [region["district"] for region in results[0]["regions"]] if results else []
+        num_regions = len(regions)
+        dates = np.array([result["date"] for result in results], dtype="datetime64[s]")
+        columns = {}
+        for metric in metrics:
+            values = np.fromiter(
+                (np.nan if region[metric] is None else region[metric]
+                 for result in results for region in result["regions"]),
+                dtype=np.float64,
+                count=num_days * num_regions
+            )
+            columns[metric] = np.ascontiguousarray(values.reshape(num_days, num_regions).T)
+        return cls(dates, regions, columns)
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Write the store as one .npy file per column plus metadata"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / "dates.npy", self.dates)
+        for name, values in self.columns.items():
+            np.save(path / f"{name}.npy", values)
+        with open(path / METADATA_FILE, "w") as f:
+            json.dump({"regions": self.regions, "metrics": list(self.columns)}, f)
+        return path
+
+    @classmethod
+    def attach(cls, path: Union[str, Path]) -> "ResultsStore":
+        """Attach to a saved store read-only without loading it"""
+        path = Path(path)
+        with open(path / METADATA_FILE) as f:
+            metadata = json.load(f)
+        columns = {
+            name: np.load(path / f"{name}.npy", mmap_mode="r")
+            for name in metadata["metrics"]
+        }
+        return cls(np.load(path / "dates.npy"), metadata["regions"], columns)
+
+    def iter_series(self, metric: str, regions: Optional[Sequence[str]] = None) -> Iterator[RegionSeries]:
+        """Yield one region's series of a metric at a time"""
+        values = self.columns[metric]
+        for i, region in enumerate(self.regions):
+            if regions is None or region in regions:
+                yield region, self.dates, values[i]
+
+class DatabaseSeries:
+    """Reads per-region series of a stored simulation from the database"""
+
+    def __init__(self, repository, simulation_id: int):
+        self.repository = repository
+        self.simulation_id = simulation_id
+
+    def iter_series(self, metric: str, regions: Optional[Sequence[str]] = None) -> Iterator[RegionSeries]:
+        """Yield one region's series of a metric at a time"""
+        for region, timestamps, values in self.repository.iter_region_series(self.simulation_id, metric, regions):
+            yield region.district, timestamps, values
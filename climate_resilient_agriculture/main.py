@@ -11,7 +11,7 @@ def main():
     output_dir.mkdir(exist_ok=True)
     
     # Initialize components
-    data_generator = DataGenerator(seed=42)
+    data_generator = DataGenerator(seed=42, validate=False)
     visualizer = SimulationVisualizer()
     
     # Set simulation parameters
@@ -20,7 +20,7 @@ def main():
     time_step = timedelta(days=1)
     
     # Initialize simulation engine
-    engine = SimulationEngine(start_date, end_date, time_step)
+    engine = SimulationEngine(start_date, end_date, time_step, seed=42, registry=data_generator.registry)
     
     # Generate and add regions
     print("Generating regions...")
@@ -56,7 +56,7 @@ def main():
     print("Saving results...")
     results_file = output_dir / "simulation_results.json"
     with open(results_file, "w") as f:
-        json.dump(results, f, default=str)
+        json.dump({date.isoformat(): data for date, data in results.items()}, f, default=str)
     
     # Generate visualizations
     print("Generating visualizations...")
@@ -0,0 +1,176 @@
+import csv
+import dataclasses
+import itertools
+import multiprocessing
+import sys
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Default sweep: farmers 1k -> 1M, regions 10 -> 500, horizon 1 -> 30 years
+SCALE_ENGINES = ("memory", "database")
+SCALE_FARMERS = (1_000, 10_000, 100_000, 1_000_000)
+SCALE_REGIONS = (10, 50, 500)
+SCALE_YEARS = (1, 5, 30)
+
+# Seconds a single configuration may run before it is stopped
+SCALE_TIMEOUT = 600
+
+SCALE_START_DATE = datetime(2024, 1, 1)
+
+CSV_FIELDS = [
+    "engine", "farmers", "regions", "years", "steps", "status", "setup_seconds", "seconds",
+    "farmer_steps_per_second", "peak_rss_mb", "db_bytes"
+]
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of the current process in MiB"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _run_memory_engine(farmers: int, regions: int, end_date: datetime) -> Tuple[int, float]:
+    """Run the in-memory engine on a synthetic population; return steps and run seconds"""
+    from climate_resilient_agriculture.core.simulation.engine import SimulationEngine
+    from climate_resilient_agriculture.core.utils.data_generator import DataGenerator
+    from climate_resilient_agriculture.config.simulation_config import SIMULATION_TIME_STEP
+
+    generator = DataGenerator(seed=42, validate=False)
+    engine = SimulationEngine(SCALE_START_DATE, end_date, SIMULATION_TIME_STEP, seed=42)
+    districts = []
+    for i in range(regions):
+        location = generator.generate_location(generator.DISTRICTS[i % len(generator.DISTRICTS)])
+        # The generator returns the registry's shared entry; rename a copy, not the entry itself
+        location = dataclasses.replace(location, district=f"{location.district}-{i}", district_code=-1)
+        engine.add_region(location)
+        districts.append(location.district)
+    engine.set_population(generator.generate_population(farmers, districts))
+    start = time.perf_counter()
+    steps = len(engine.run_full_simulation())
+    return steps, time.perf_counter() - start
+
+def _run_database_engine(farmers: int, regions: int, end_date: datetime,
+                         db_path: Path) -> Tuple[int, float]:
+    """Run the database engine against a fresh SQLite file; return steps and run seconds"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from climate_resilient_agriculture.core.database.models import Base
+    from climate_resilient_agriculture.core.simulation_engine import SimulationEngine
+
+    db_engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(db_engine)
+    session = sessionmaker(bind=db_engine)()
+    try:
+        engine = SimulationEngine(
+            SCALE_START_DATE, end_date,
+            parameters={'seed': 42, 'farmer_count': farmers, 'region_count': regions},
+            session=session
+        )
+        start = time.perf_counter()
+        steps = len(engine.run()['results'])
+        return steps, time.perf_counter() - start
+    finally:
+        session.close()
+        db_engine.dispose()
+
+def _measure(engine: str, farmers: int, regions: int, years: int, db_path: str, queue) -> None:
+    """Run one configuration and report its measurements (runs in a child process)"""
+    end_date = SCALE_START_DATE + timedelta(days=round(365.25 * years))
+    start = time.perf_counter()
+    if engine == "memory":
+        steps, seconds = _run_memory_engine(farmers, regions, end_date)
+    else:
+        steps, seconds = _run_database_engine(farmers, regions, end_date, Path(db_path))
+    queue.put({
+        "steps": steps,
+        "seconds": seconds,
+        "setup_seconds": time.perf_counter() - start - seconds,
+        "peak_rss_mb": _peak_rss_mb()
+    })
+
+def run_configuration(engine: str, farmers: int, regions: int, years: int,
+                      timeout: float = SCALE_TIMEOUT) -> Dict:
+    """Measure one configuration in a fresh process so peak RSS is its own"""
+    row = {"engine": engine, "farmers": farmers, "regions": regions, "years": years}
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / "scale.db"
+        process = context.Process(target=_measure,
+                                  args=(engine, farmers, regions, years, str(db_path), queue))
+        process.start()
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+            return {**row, "status": "timeout"}
+        if process.exitcode != 0 or queue.empty():
+            return {**row, "status": "failed"}
+        result = queue.get()
+        db_bytes = sum(path.stat().st_size for path in Path(tmp_dir).glob("scale.db*"))
+    return {
+        **row,
+        **result,
+        "status": "ok",
+        "farmer_steps_per_second": farmers * result["steps"] / result["seconds"],
+        "db_bytes": db_bytes if engine == "database" else 0
+    }
+
+def run_scaling(engines: Sequence[str] = SCALE_ENGINES, farmers: Sequence[int] = SCALE_FARMERS,
+                regions: Sequence[int] = SCALE_REGIONS, years: Sequence[int] = SCALE_YEARS,
+                timeout: float = SCALE_TIMEOUT, output_path: Optional[Path] = None,
+                progress=print) -> List[Dict]:
+    """Sweep all configurations, writing each row to CSV as it completes.
+
+    Larger configurations of an engine are skipped once a smaller one with
+    the same regions and horizon timed out.
+    """
+    rows = []
+    timed_out = set()
+    writer = None
+    csv_file = open(output_path, "w", newline="") if output_path else None
+    try:
+        if csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+        for engine, region_count, year_count, farmer_count in itertools.product(
+                engines, regions, years, sorted(farmers)):
+            key = (engine, region_count, year_count)
+            if key in timed_out:
+                row = {"engine": engine, "farmers": farmer_count, "regions": region_count,
+                       "years": year_count, "status": "skipped"}
+            else:
+                row = run_configuration(engine, farmer_count, region_count, year_count, timeout)
+                if row["status"] == "timeout":
+                    timed_out.add(key)
+            rows.append(row)
+            if writer:
+                writer.writerow(row)
+                csv_file.flush()
+            progress(_format_row(row))
+    finally:
+        if csv_file:
+            csv_file.close()
+    return rows
+
+def _format_row(row: Dict) -> str:
+    """One-line progress summary of a measured configuration"""
+    label = f"{row['engine']:<9}{row['farmers']:>9} farmers{row['regions']:>5} regions{row['years']:>4} years"
+    if row["status"] != "ok":
+        return f"{label}  {row['status']}"
+    return (f"{label}  {row['farmer_steps_per_second']:>14,.0f} farmer-steps/s"
+            f"  {row['peak_rss_mb']:>8.1f} MiB  {row['db_bytes']:>14,} bytes")
+
+if __name__ == "__main__":
+    from climate_resilient_agriculture.analysis.visualization import SimulationVisualizer
+    output_dir = Path("output") / "scaling"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rows = run_scaling(output_path=output_dir / "scaling.csv")
+    SimulationVisualizer(headless=True).plot_scaling(rows, save_path=output_dir / "scaling.png")
@@ -1,15 +1,56 @@
 import uvicorn
+import argparse
 import os
+import shutil
 import sys
+import tempfile
 
 # Add the project root to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.database.init_db import init_db
+
+def parse_args():
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Run the simulation API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int,
+                        default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+                        help="Worker processes (default: WEB_CONCURRENCY or the number of cores)")
+    parser.add_argument("--reload", action="store_true",
+                        help="Development mode: a single worker restarted on code changes")
+    return parser.parse_args()
+
+def main():
+    """Create the schema once, then start the API workers"""
+    args = parse_args()
+    workers = 1 if args.reload else max(1, args.workers)
+
+    # One-shot pre-start step: workers never create tables themselves
+    if not init_db():
+        sys.exit(1)
+
+    # Workers size their connection pools from the worker count and share metrics through a directory
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    metrics_directory = None
+    if workers > 1 and "METRICS_DIRECTORY" not in os.environ:
+        metrics_directory = tempfile.mkdtemp(prefix="simulation-metrics-")
+        os.environ["METRICS_DIRECTORY"] = metrics_directory
+
+    try:
+        uvicorn.run(
+            "api.main:app",
+            host=args.host,
+            port=args.port,
+            reload=args.reload,
+            workers=workers,
+            app_dir=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+    finally:
+        if metrics_directory is not None:
+            shutil.rmtree(metrics_directory, ignore_errors=True)
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "api.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        workers=1
-    ) 
\ No newline at end of file
+    main()
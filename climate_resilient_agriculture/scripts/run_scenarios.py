@@ -3,256 +3,156 @@ import json
 from pathlib import Path
 import sys
 import os
+from typing import TYPE_CHECKING, Dict, Optional, Sequence, Union
 
 # Add the project root to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from core.simulation.engine import SimulationEngine
+from core.simulation.scenarios import SCENARIOS, ScenarioInputs, ScenarioSpec, get_scenario
 from core.utils.data_generator import DataGenerator
-from analysis.visualization import SimulationVisualizer
+from analysis.render_cache import KEY_SUFFIX, RenderCache
+from core.utils.profiling import Profiler
 from config.simulation_config import *
 
-def run_baseline_scenario():
-    """Run the baseline scenario with current conditions"""
-    print("Running baseline scenario...")
-    
-    # Initialize components
-    data_generator = DataGenerator(seed=42)
-    visualizer = SimulationVisualizer()
-    
-    # Initialize simulation engine
-    engine = SimulationEngine(
-        SIMULATION_START_DATE,
-        SIMULATION_END_DATE,
-        SIMULATION_TIME_STEP
-    )
-    
-    # Generate and add regions
-    for district in DISTRICTS:
-        location = data_generator.generate_location(district)
-        engine.add_region(location)
-    
-    # Generate and add farmers
-    for _ in range(FARMER_COUNT):
-        farmer = data_generator.generate_farmer_profile()
-        engine.add_farmer(farmer)
-    
-    # Generate and add infrastructure
-    for district in DISTRICTS:
-        location = data_generator.generate_location(district)
-        for _ in range(INFRASTRUCTURE_PER_DISTRICT):
-            infrastructure = data_generator.generate_infrastructure(location)
-            engine.add_infrastructure(infrastructure)
-    
-    # Generate and add policies
-    for _ in range(POLICY_COUNT):
-        policy = data_generator.generate_policy()
-        engine.add_policy(policy)
-    
-    # Run simulation
-    results = engine.run_full_simulation()
-    
-    # Save results
-    output_dir = Path(OUTPUT_DIRECTORY) / "baseline"
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    with open(output_dir / "simulation_results.json", "w") as f:
-        json.dump(results, f, default=str)
-    
-    # Generate visualizations
-    generate_visualizations(results, output_dir, visualizer)
-    
-    return results
+if TYPE_CHECKING:
+    from analysis.visualization import SimulationVisualizer
 
-def run_climate_change_scenario():
-    """Run scenario with increased climate change impacts"""
-    print("Running climate change scenario...")
-    
-    # Initialize components
-    data_generator = DataGenerator(seed=42)
-    visualizer = SimulationVisualizer()
-    
-    # Initialize simulation engine with modified climate parameters
-    engine = SimulationEngine(
-        SIMULATION_START_DATE,
-        SIMULATION_END_DATE,
-        SIMULATION_TIME_STEP
+SCENARIO_CHARTS = ("climate_impact.png", "production_trends.png", "risk_map.html", "dashboard.png")
+
+# Files a scenario run writes into its output directory, including the charts' render keys
+SCENARIO_ARTIFACTS = ("simulation_results.json", *SCENARIO_CHARTS, *(chart + KEY_SUFFIX for chart in SCENARIO_CHARTS))
+
+def summarize_results(results: Dict) -> Dict[str, float]:
+    """Total production, average price and average risk over all regions on the final date"""
+    final = results[max(results)]
+    regions = list(final.values())
+    return {
+        'total_production': sum(region['production'] for region in regions),
+        'average_price': sum(region['market_price'] for region in regions) / len(regions),
+        'average_risk': sum((region['climate_impact']['drought_risk'] +
+                             region['climate_impact']['flood_risk']) / 2
+                            for region in regions) / len(regions)
+    }
+
+def _headless_visualizer() -> "SimulationVisualizer":
+    """Create a headless visualizer, importing the plotting libraries only when a scenario renders"""
+    from analysis.visualization import SimulationVisualizer
+    return SimulationVisualizer(headless=True)
+
+def generate_scenario_inputs(config: Optional[SimulationConfig] = None) -> ScenarioInputs:
+    """Generate the regions, farmers, infrastructure and policies every scenario starts from"""
+    config = config or SimulationConfig()
+    data_generator = DataGenerator(seed=config.seed, validate=False)
+    regions = [data_generator.generate_location(district) for district in config.districts]
+    return ScenarioInputs(
+        regions=regions,
+        population=data_generator.generate_population(config.farmer_count, list(config.districts)),
+        infrastructure=[data_generator.generate_infrastructure(location)
+                        for location in regions for _ in range(config.infrastructure_per_district)],
+        policies=[data_generator.generate_policy() for _ in range(config.policy_count)]
     )
-    
-    # Modify climate parameters for more severe impacts
-    engine.TEMPERATURE_CHANGE_MEAN = TEMPERATURE_CHANGE_MEAN * 2
-    engine.RAINFALL_CHANGE_MEAN = RAINFALL_CHANGE_MEAN * 2
-    
-    # Generate and add regions
-    for district in DISTRICTS:
-        location = data_generator.generate_location(district)
-        engine.add_region(location)
-    
-    # Generate and add farmers
-    for _ in range(FARMER_COUNT):
-        farmer = data_generator.generate_farmer_profile()
-        engine.add_farmer(farmer)
-    
-    # Generate and add infrastructure
-    for district in DISTRICTS:
-        location = data_generator.generate_location(district)
-        for _ in range(INFRASTRUCTURE_PER_DISTRICT):
-            infrastructure = data_generator.generate_infrastructure(location)
-            engine.add_infrastructure(infrastructure)
-    
-    # Generate and add policies
-    for _ in range(POLICY_COUNT):
-        policy = data_generator.generate_policy()
-        engine.add_policy(policy)
+
+def run_scenario(scenario: Union[str, ScenarioSpec], config: Optional[SimulationConfig] = None,
+                 inputs: Optional[ScenarioInputs] = None, profiler: Optional[Profiler] = None,
+                 checkpoint_every: Optional[int] = None, visualize: bool = True):
+    """Run a scenario on shared inputs, save its results and render its charts.
+    
+    Inputs are generated from ``config`` when not given. Every engine draws
+    its weather from a stream seeded by ``config.seed``, so scenarios run on
+    the same inputs differ only by their spec and a scenario gives the same
+    results alone, in a batch or alongside other runs in the process.
+    """
+    config = config or SimulationConfig()
+    spec = get_scenario(scenario) if isinstance(scenario, str) else scenario
+    print(f"Running {spec.name} scenario...")
+    if inputs is None:
+        inputs = generate_scenario_inputs(config)
+    
+    engine = SimulationEngine.for_scenario(spec, inputs, config, profiler=profiler)
+    if checkpoint_every:
+        engine.enable_checkpoints(config.checkpoint_directory, checkpoint_every)
+        print(f"Checkpointing as simulation {engine.simulation_id}")
     
     # Run simulation
     results = engine.run_full_simulation()
     
     # Save results
-    output_dir = Path(OUTPUT_DIRECTORY) / "climate_change"
+    output_dir = Path(config.output_directory) / spec.name
     output_dir.mkdir(parents=True, exist_ok=True)
     
     with open(output_dir / "simulation_results.json", "w") as f:
-        json.dump(results, f, default=str)
+        json.dump({date.isoformat(): data for date, data in results.items()}, f, default=str)
     
     # Generate visualizations
-    generate_visualizations(results, output_dir, visualizer)
+    if visualize:
+        generate_visualizations(results, output_dir, _headless_visualizer(), engine.regions)
     
     return results
 
-def run_technology_adoption_scenario():
-    """Run scenario with increased technology adoption"""
-    print("Running technology adoption scenario...")
-    
-    # Initialize components
-    data_generator = DataGenerator(seed=42)
-    visualizer = SimulationVisualizer()
-    
-    # Initialize simulation engine
-    engine = SimulationEngine(
-        SIMULATION_START_DATE,
-        SIMULATION_END_DATE,
-        SIMULATION_TIME_STEP
-    )
-    
-    # Generate and add regions
-    for district in DISTRICTS:
-        location = data_generator.generate_location(district)
-        engine.add_region(location)
-    
-    # Generate and add farmers with higher technology adoption
-    for _ in range(FARMER_COUNT):
-        farmer = data_generator.generate_farmer_profile()
-        farmer.technology_adoption_level = min(1.0, farmer.technology_adoption_level * 1.5)
-        engine.add_farmer(farmer)
-    
-    # Generate and add infrastructure
-    for district in DISTRICTS:
-        location = data_generator.generate_location(district)
-        for _ in range(INFRASTRUCTURE_PER_DISTRICT):
-            infrastructure = data_generator.generate_infrastructure(location)
-            engine.add_infrastructure(infrastructure)
-    
-    # Generate and add policies with focus on technology
-    for _ in range(POLICY_COUNT):
-        policy = data_generator.generate_policy()
-        policy.target_sector = "technology_adoption"
-        engine.add_policy(policy)
-    
-    # Run simulation
-    results = engine.run_full_simulation()
-    
-    # Save results
-    output_dir = Path(OUTPUT_DIRECTORY) / "technology_adoption"
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    with open(output_dir / "simulation_results.json", "w") as f:
-        json.dump(results, f, default=str)
-    
-    # Generate visualizations
-    generate_visualizations(results, output_dir, visualizer)
-    
+def run_scenarios(scenarios: Sequence[Union[str, ScenarioSpec]] = tuple(SCENARIOS),
+                  config: Optional[SimulationConfig] = None, profiler: Optional[Profiler] = None,
+                  checkpoint_every: Optional[int] = None, visualize: bool = True) -> Dict[str, Dict]:
+    """Run several scenarios on one shared generation pass and return their results by name"""
+    config = config or SimulationConfig()
+    inputs = generate_scenario_inputs(config)
+    results = {}
+    for scenario in scenarios:
+        spec = get_scenario(scenario) if isinstance(scenario, str) else scenario
+        results[spec.name] = run_scenario(spec, config, inputs, profiler, checkpoint_every, visualize)
     return results
 
-def generate_visualizations(results: dict, output_dir: Path, visualizer: SimulationVisualizer):
+def generate_visualizations(results: dict, output_dir: Path, visualizer: "SimulationVisualizer",
+                            regions: Dict):
     """Generate all visualizations for the simulation results"""
     # Climate impact visualization
-    climate_data = {region: {date: data['climate_impact'] 
+    climate_data = {region: {date: data[region]
                            for date, data in results.items()}
-                   for region in DISTRICTS}
-    visualizer.plot_climate_impact(climate_data, 
-                                 save_path=output_dir / "climate_impact.png")
+                   for region in regions}
     
     # Production trends visualization
-    production_data = {region: {date: {'production': data['production'],
-                                     'market_price': data['market_price']}
+    production_data = {region: {date: {'production': data[region]['production'],
+                                     'market_price': data[region]['market_price']}
                               for date, data in results.items()}
-                      for region in DISTRICTS}
-    visualizer.plot_production_trends(production_data,
-                                    save_path=output_dir / "production_trends.png")
+                      for region in regions}
     
     # Risk map
-    locations = {region: {'latitude': results[SIMULATION_START_DATE][region]['latitude'],
-                         'longitude': results[SIMULATION_START_DATE][region]['longitude'],
-                         'drought_risk': results[SIMULATION_END_DATE][region]['climate_impact']['drought_risk'],
-                         'flood_risk': results[SIMULATION_END_DATE][region]['climate_impact']['flood_risk']}
-                for region in DISTRICTS}
-    visualizer.create_risk_map(locations,
-                              save_path=output_dir / "risk_map.html")
+    final_results = results[max(results)]
+    locations = {region: {'latitude': regions[region].latitude,
+                         'longitude': regions[region].longitude,
+                         'drought_risk': final_results[region]['climate_impact']['drought_risk'],
+                         'flood_risk': final_results[region]['climate_impact']['flood_risk']}
+                for region in regions}
     
     # Create comprehensive dashboard
     dashboard_data = {
         'climate_data': climate_data,
         'production_data': production_data,
-        'market_data': {region: {date: data['market_price']
+        'market_data': {region: {date: data[region]['market_price']
                                for date, data in results.items()}
-                       for region in DISTRICTS},
+                       for region in regions},
         'risk_data': locations
     }
-    visualizer.create_dashboard(dashboard_data,
-                              save_path=output_dir / "dashboard.png")
+    
+    # Render stale charts concurrently with headless workers; unchanged ones are skipped
+    RenderCache().render(visualizer, [
+        ('plot_climate_impact', (climate_data,), {'save_path': output_dir / "climate_impact.png"}),
+        ('plot_production_trends', (production_data,), {'save_path': output_dir / "production_trends.png"}),
+        ('create_risk_map', (locations,), {'save_path': output_dir / "risk_map.html"}),
+        ('create_dashboard', (dashboard_data,), {'save_path': output_dir / "dashboard.png"})
+    ])
+
 
 def main():
     """Run all scenarios and compare results"""
+    config = SimulationConfig()
+    
     # Create output directory
-    output_dir = Path(OUTPUT_DIRECTORY)
+    output_dir = Path(config.output_directory)
     output_dir.mkdir(exist_ok=True)
     
-    # Run scenarios
-    baseline_results = run_baseline_scenario()
-    climate_change_results = run_climate_change_scenario()
-    technology_adoption_results = run_technology_adoption_scenario()
-    
-    # Compare results
-    comparison = {
-        'baseline': {
-            'total_production': sum(baseline_results[SIMULATION_END_DATE][region]['production']
-                                  for region in DISTRICTS),
-            'average_price': sum(baseline_results[SIMULATION_END_DATE][region]['market_price']
-                               for region in DISTRICTS) / len(DISTRICTS),
-            'average_risk': sum((baseline_results[SIMULATION_END_DATE][region]['climate_impact']['drought_risk'] +
-                               baseline_results[SIMULATION_END_DATE][region]['climate_impact']['flood_risk']) / 2
-                              for region in DISTRICTS) / len(DISTRICTS)
-        },
-        'climate_change': {
-            'total_production': sum(climate_change_results[SIMULATION_END_DATE][region]['production']
-                                  for region in DISTRICTS),
-            'average_price': sum(climate_change_results[SIMULATION_END_DATE][region]['market_price']
-                               for region in DISTRICTS) / len(DISTRICTS),
-            'average_risk': sum((climate_change_results[SIMULATION_END_DATE][region]['climate_impact']['drought_risk'] +
-                               climate_change_results[SIMULATION_END_DATE][region]['climate_impact']['flood_risk']) / 2
-                              for region in DISTRICTS) / len(DISTRICTS)
-        },
-        'technology_adoption': {
-            'total_production': sum(technology_adoption_results[SIMULATION_END_DATE][region]['production']
-                                  for region in DISTRICTS),
-            'average_price': sum(technology_adoption_results[SIMULATION_END_DATE][region]['market_price']
-                               for region in DISTRICTS) / len(DISTRICTS),
-            'average_risk': sum((technology_adoption_results[SIMULATION_END_DATE][region]['climate_impact']['drought_risk'] +
-                               technology_adoption_results[SIMULATION_END_DATE][region]['climate_impact']['flood_risk']) / 2
-                              for region in DISTRICTS) / len(DISTRICTS)
-        }
-    }
+    # Run scenarios on one shared set of inputs
+    comparison = {name: summarize_results(results) for name, results in run_scenarios(config=config).items()}
     
     # Save comparison results
     with open(output_dir / "scenario_comparison.json", "w") as f:
@@ -0,0 +1,193 @@
+import csv
+import itertools
+import multiprocessing
+import sys
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import fields, replace
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from tqdm import tqdm
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.simulation.engine import SimulationEngine
+from core.simulation.scenarios import ScenarioInputs, ScenarioSpec, get_scenario
+from core.utils.population import FarmerPopulation
+from config.simulation_config import SimulationConfig
+from scripts.run_scenarios import generate_scenario_inputs, summarize_results
+
+# Scenario fields a sweep can vary: the numeric fields the in-memory engine reads
+SWEEP_PARAMETERS = (
+    "temperature_change_mean", "temperature_change_std",
+    "rainfall_change_mean", "rainfall_change_std",
+    "adoption_multiplier"
+)
+
+# Per-run outputs collected into the sweep table
+SWEEP_METRICS = ("total_production", "average_price", "average_risk", "temperature_change", "rainfall_change")
+
+# Runs a single sweep request may ask for
+MAX_SWEEP_RUNS = 10000
+
+def _check_parameters(names: Sequence[str]) -> None:
+    """Reject parameter names that are not numeric scenario fields the sweep engine reads"""
+    # Varying a field the engine ignores would give flat columns and spurious correlations
+    inert = sorted(set(names) & {field.name for field in fields(ScenarioSpec)} - set(SWEEP_PARAMETERS))
+    if inert:
+        raise ValueError(f"The sweep engine does not use {', '.join(inert)}. Choose from {', '.join(SWEEP_PARAMETERS)}")
+    unknown = sorted(set(names) - set(SWEEP_PARAMETERS))
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {', '.join(unknown)}. Choose from {', '.join(SWEEP_PARAMETERS)}")
+    if not names:
+        raise ValueError("A sweep needs at least one parameter")
+
+def grid_samples(grid: Dict[str, Sequence[float]]) -> List[Dict[str, float]]:
+    """Every combination of the given parameter values"""
+    _check_parameters(list(grid))
+    names = list(grid)
+    return [dict(zip(names, map(float, values))) for values in itertools.product(*grid.values())]
+
+def latin_hypercube_samples(bounds: Dict[str, Tuple[float, float]], samples: int,
+                            seed: Optional[int] = None) -> List[Dict[str, float]]:
+    """Latin-hypercube samples of parameters within (low, high) bounds"""
+    from scipy.stats import qmc
+
+    _check_parameters(list(bounds))
+    names = list(bounds)
+    lows = [float(bounds[name][0]) for name in names]
+    highs = [float(bounds[name][1]) for name in names]
+    if any(low >= high for low, high in zip(lows, highs)):
+        raise ValueError("Each parameter's lower bound must be below its upper bound")
+    points = qmc.scale(qmc.LatinHypercube(d=len(names), seed=seed).random(samples), lows, highs)
+    return [dict(zip(names, map(float, point))) for point in points]
+
+def parse_grid(options: Sequence[str]) -> Dict[str, List[float]]:
+    """Parse NAME=V1,V2,... options into a parameter grid"""
+    grid = {}
+    for option in options:
+        name, _, values = option.partition("=")
+        try:
+            grid[name.strip()] = [float(value) for value in values.split(",")]
+        except ValueError:
+            raise ValueError(f"Expected NAME=V1,V2,... but got {option!r}") from None
+    return grid
+
+def parse_bounds(options: Sequence[str]) -> Dict[str, Tuple[float, float]]:
+    """Parse NAME=LOW:HIGH options into parameter bounds"""
+    bounds = {}
+    for option in options:
+        name, _, values = option.partition("=")
+        try:
+            low, high = (float(value) for value in values.split(":"))
+        except ValueError:
+            raise ValueError(f"Expected NAME=LOW:HIGH but got {option!r}") from None
+        bounds[name.strip()] = (low, high)
+    return bounds
+
+def run_metrics(results: Dict) -> Dict[str, float]:
+    """Sweep metrics of one run's results"""
+    impacts = [region["climate_impact"] for step in results.values() for region in step.values()]
+    return {
+        **summarize_results(results),
+        "temperature_change": float(np.mean([impact["temperature_change"] for impact in impacts])),
+        "rainfall_change": float(np.mean([impact["rainfall_change"] for impact in impacts]))
+    }
+
+# Per-process sweep state, set once by _init_worker
+_WORKER: Dict = {}
+
+def _init_worker(base: ScenarioSpec, inputs: ScenarioInputs, population_path: Optional[str],
+                 config: SimulationConfig) -> None:
+    """Attach a worker to the shared inputs; the population is memory-mapped, not copied"""
+    if population_path is not None:
+        inputs.population = FarmerPopulation.attach(population_path)
+    _WORKER.update(base=base, inputs=inputs, config=config)
+
+def _run_sample(index: int, overrides: Dict[str, float]) -> Tuple[int, Dict[str, float]]:
+    """Run the base scenario with one sample's overrides"""
+    # Every run draws the same weather stream, so differences come from the parameters
+    engine = SimulationEngine.for_scenario(
+        _WORKER["base"].with_overrides(**overrides), _WORKER["inputs"], _WORKER["config"]
+    )
+    return index, run_metrics(engine.run_full_simulation())
+
+def run_sweep(samples: Sequence[Dict[str, float]], scenario: Union[str, ScenarioSpec] = "baseline",
+              config: Optional[SimulationConfig] = None, workers: Optional[int] = None,
+              progress: bool = True) -> Dict[str, List[float]]:
+    """Run a scenario once per sample and collect the results into a columnar table.
+
+    Inputs are generated once from ``config`` and shared by every run. Runs are spread over
+    a pool of ``workers`` processes (at most one per core), which attach to
+    the saved population instead of receiving a copy. The table has a
+    ``sample`` column, one column per swept parameter and one per metric.
+    """
+    if not samples:
+        raise ValueError("A sweep needs at least one sample")
+    if len(samples) > MAX_SWEEP_RUNS:
+        raise ValueError(f"A sweep may run at most {MAX_SWEEP_RUNS} samples")
+    parameters = list(samples[0])
+    _check_parameters(parameters)
+    base = get_scenario(scenario) if isinstance(scenario, str) else scenario
+    config = config or SimulationConfig()
+    inputs = generate_scenario_inputs(config)
+    cores = os.cpu_count() or 1
+    workers = min(workers or cores, cores, len(samples))
+
+    rows: List[Optional[Dict[str, float]]] = [None] * len(samples)
+    bar = tqdm(total=len(samples), desc=f"Sweeping {base.name}", unit="run", disable=not progress)
+    if workers == 1:
+        _init_worker(base, inputs, None, config)
+        for index, sample in enumerate(samples):
+            rows[index] = _run_sample(index, sample)[1]
+            bar.update()
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            population_path = inputs.population.save(Path(tmp_dir) / "population")
+            # Workers receive everything but the population, which they attach from disk
+            shared = replace(inputs, population=None)
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(base, shared, str(population_path), config)
+            ) as executor:
+                futures = [executor.submit(_run_sample, index, sample) for index, sample in enumerate(samples)]
+                for future in as_completed(futures):
+                    index, metrics = future.result()
+                    rows[index] = metrics
+                    bar.update()
+    bar.close()
+
+    table = {"sample": list(range(len(samples)))}
+    table.update({name: [sample[name] for sample in samples] for name in parameters})
+    table.update({name: [row[name] for row in rows] for name in SWEEP_METRICS})
+    return table
+
+def parameter_correlations(table: Dict[str, List[float]], metric: str = "total_production") -> Dict[str, float]:
+    """Pearson correlation of each swept parameter with a metric (0 when either is constant)"""
+    values = np.asarray(table[metric], dtype=np.float64)
+    correlations = {}
+    for name in table:
+        if name not in SWEEP_PARAMETERS:
+            continue
+        column = np.asarray(table[name], dtype=np.float64)
+        if column.std() == 0 or values.std() == 0:
+            correlations[name] = 0.0
+        else:
+            correlations[name] = float(np.corrcoef(column, values)[0, 1])
+    return correlations
+
+def write_table(table: Dict[str, List[float]], path: Union[str, Path]) -> Path:
+    """Write a sweep table as CSV, one row per run"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(list(table))
+        writer.writerows(zip(*table.values()))
+    return path
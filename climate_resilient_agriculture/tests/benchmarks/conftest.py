@@ -0,0 +1,106 @@
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Benchmarks only run when BENCHMARK=1 is set
+BENCHMARKS_ENABLED = os.getenv("BENCHMARK", "").lower() in ("1", "true", "yes")
+
+# Baseline timings to compare against, and whether to overwrite them with this run
+BASELINE_PATH = Path(os.getenv("BENCHMARK_BASELINE", Path(__file__).parent / "baseline.json"))
+SAVE_BASELINE = os.getenv("BENCHMARK_SAVE", "").lower() in ("1", "true", "yes")
+
+# Allowed slowdown of the median over the baseline median before a benchmark fails
+REGRESSION_THRESHOLD = float(os.getenv("BENCHMARK_THRESHOLD", "0.25"))
+
+# Where the timings of the current run are written
+RESULTS_PATH = Path(os.getenv("BENCHMARK_OUTPUT", Path(__file__).parent / "results.json"))
+
+_results = {}
+
+def pytest_collection_modifyitems(config, items):
+    """Skip benchmarks unless they were requested"""
+    if BENCHMARKS_ENABLED:
+        return
+    skip = pytest.mark.skip(reason="set BENCHMARK=1 to run benchmarks")
+    benchmark_dir = Path(__file__).parent
+    for item in items:
+        if benchmark_dir in Path(item.fspath).parents:
+            item.add_marker(skip)
+
+def pytest_sessionfinish(session, exitstatus):
+    """Write this run's timings, and the baseline when asked to"""
+    if not _results:
+        return
+    RESULTS_PATH.write_text(json.dumps(_results, indent=2, sort_keys=True))
+    if SAVE_BASELINE:
+        baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        baseline.update(_results)
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True))
+
+class Benchmark:
+    """Times a callable over several rounds and checks it against the baseline"""
+
+    def __init__(self, name: str, baseline: dict):
+        self.name = name
+        self.baseline = baseline
+
+    def __call__(self, func, *args, rounds: int = 3, warmup: int = 1, setup=None, **kwargs):
+        for _ in range(warmup):
+            func(*(setup() if setup else args), **kwargs)
+        timings = []
+        result = None
+        for _ in range(rounds):
+            call_args = setup() if setup else args
+            start = time.perf_counter()
+            result = func(*call_args, **kwargs)
+            timings.append(time.perf_counter() - start)
+        stats = {
+            "min": min(timings),
+            "median": statistics.median(timings),
+            "max": max(timings),
+            "rounds": rounds
+        }
+        _results[self.name] = stats
+        reference = self.baseline.get(self.name)
+        if reference and not SAVE_BASELINE:
+            limit = reference["median"] * (1 + REGRESSION_THRESHOLD)
+            if stats["median"] > limit:
+                pytest.fail(
+                    f"{self.name}: median {stats['median']:.4f}s exceeds baseline "
+                    f"{reference['median']:.4f}s by more than {REGRESSION_THRESHOLD:.0%}"
+                )
+        return result
+
+@pytest.fixture(scope="session")
+def baseline():
+    """Baseline timings keyed by benchmark id"""
+    if BASELINE_PATH.exists():
+        return json.loads(BASELINE_PATH.read_text())
+    return {}
+
+@pytest.fixture
+def bench(request, baseline):
+    """Time a callable and fail on regressions against the recorded baseline"""
+    return Benchmark(request.node.name, baseline)
+
+@pytest.fixture(params=["memory", "file"])
+def db_session(request, tmp_path):
+    """Session on a fresh in-memory or file-backed SQLite database"""
+    from core.database.models import Base
+    if request.param == "memory":
+        engine = create_engine("sqlite://", poolclass=StaticPool,
+                               connect_args={"check_same_thread": False})
+    else:
+        engine = create_engine(f"sqlite:///{tmp_path / 'benchmark.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
@@ -0,0 +1,91 @@
+import pytest
+from datetime import datetime, timedelta
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from core.simulation.engine import SimulationEngine
+from core.simulation_engine import SimulationEngine as DatabaseSimulationEngine
+from core.utils.data_generator import DataGenerator
+import core.data_generator
+from core.database.repository import SimulationRepository
+from config.simulation_config import DISTRICTS, SIMULATION_TIME_STEP
+
+START_DATE = datetime(2024, 1, 1)
+
+def _engine(farmer_count: int, region_count: int, days: int) -> SimulationEngine:
+    """Build an in-memory engine with generated regions and farmers"""
+    generator = DataGenerator(seed=42, validate=False)
+    engine = SimulationEngine(START_DATE, START_DATE + timedelta(days=days - 1), SIMULATION_TIME_STEP, seed=42,
+                              registry=generator.registry)
+    districts = DISTRICTS[:region_count]
+    for district in districts:
+        engine.add_region(generator.generate_location(district))
+    for i in range(farmer_count):
+        farmer = generator.generate_farmer_profile()
+        farmer.location = engine.regions[districts[i % region_count]]
+        engine.add_farmer(farmer)
+    return engine
+
+@pytest.mark.parametrize("days", [30, 365])
+@pytest.mark.parametrize("region_count", [3, 10])
+@pytest.mark.parametrize("farmer_count", [100, 1000])
+def test_run_full_simulation(bench, farmer_count, region_count, days):
+    """Benchmark the in-memory engine over a full horizon"""
+    results = bench(
+        lambda engine: engine.run_full_simulation(),
+        setup=lambda: (_engine(farmer_count, region_count, days),)
+    )
+    assert len(results) == days
+
+@pytest.mark.parametrize("days", [30, 365])
+@pytest.mark.parametrize("region_count", [3, 10])
+def test_generate_climate_data(bench, region_count, days):
+    """Benchmark drawing daily climate records for every region"""
+    generator = core.data_generator.DataGenerator(seed=42)
+    
+    def generate():
+        return [
+            generator.generate_climate_data(START_DATE + timedelta(days=day), START_DATE)
+            for day in range(days)
+            for _ in range(region_count)
+        ]
+    
+    assert len(bench(generate)) == days * region_count
+
+@pytest.mark.parametrize("rows", [1000, 10000])
+def test_batch_create(bench, db_session, rows):
+    """Benchmark batch inserts of climate and production rows"""
+    repository = SimulationRepository(db_session)
+    climate_rows = [
+        {'region_id': 1, 'timestamp': START_DATE + timedelta(days=i), 'data_type': 'temperature',
+         'value': 25.0, 'unit': 'C', 'source': 'simulated', 'quality_score': 1.0,
+         'confidence_interval': [-0.5, 0.5]}
+        for i in range(rows)
+    ]
+    production_rows = [
+        {'region_id': 1, 'timestamp': START_DATE + timedelta(days=i), 'crop_type': 'Rice',
+         'area_hectares': 100.0, 'yield_per_hectare': 4.0, 'total_production': 400.0,
+         'production_cost': 3000.0, 'market_price': 25000.0}
+        for i in range(rows)
+    ]
+    
+    def insert():
+        repository.batch_create_climate_data(climate_rows)
+        repository.batch_create_production_data(production_rows)
+    
+    bench(insert)
+
+@pytest.mark.parametrize("days", [30, 90])
+@pytest.mark.parametrize("farmer_count", [100, 1000])
+def test_database_engine_run(bench, db_session, farmer_count, days):
+    """Benchmark the database-backed engine end to end"""
+    def build():
+        return (DatabaseSimulationEngine(START_DATE, START_DATE + timedelta(days=days),
+                                         parameters={'seed': 42, 'farmer_count': farmer_count},
+                                         session=db_session),)
+    
+    result = bench(lambda engine: engine.run(), setup=build, rounds=2)
+    assert len(result['results']) == days
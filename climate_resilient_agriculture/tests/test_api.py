@@ -1,4 +1,6 @@
 import pytest
+import json
+import time
 from fastapi.testclient import TestClient
 from datetime import datetime
 import sys
@@ -7,11 +9,65 @@ import os
 # Add the project root to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+from click.testing import CliRunner
+from sqlalchemy import create_engine
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+import api.main
+import cli as cli_module
+import core.database.session as database_session
 from api.main import app
+from cli import cli
 from config.simulation_config import *
+from core.simulation_engine import SimulationEngine as DatabaseSimulationEngine
 
 client = TestClient(app)
 
+# A small seeded database run
+SIMULATION_REQUEST = {
+    "start_date": "2024-01-01T00:00:00",
+    "end_date": "2024-01-11T00:00:00",
+    "scenario_type": "baseline",
+    "parameters": {"farmer_count": 50, "region_count": 3},
+    "seed": 7,
+    "use_cache": False
+}
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """Point the API, the CLI and the engines at a fresh database and checkpoint directory"""
+    db_engine = create_engine(f"sqlite:///{tmp_path / 'simulations.db'}")
+    monkeypatch.setattr(database_session, "engine", db_engine)
+    monkeypatch.setattr(database_session, "Session", scoped_session(sessionmaker(bind=db_engine)))
+    monkeypatch.setattr(api.main, "CHECKPOINT_DIRECTORY", str(tmp_path / "checkpoints"))
+    database_session.init_db()
+    yield tmp_path
+    db_engine.dispose()
+
+def _interrupt_after(monkeypatch, steps):
+    """Make database runs fail after a number of steps, as if the process had been killed"""
+    step = DatabaseSimulationEngine.step
+    completed = []
+    
+    def interrupted_step(self):
+        if len(completed) == steps:
+            raise RuntimeError("interrupted")
+        completed.append(self.current_date)
+        return step(self)
+    monkeypatch.setattr(DatabaseSimulationEngine, "step", interrupted_step)
+
+def _step_values(results):
+    """Dates and per-region values of stored results, without region ids"""
+    return [
+        (step["date"], [(region["district"], region["temperature"], region["rainfall"], region["crop_yield"])
+                        for region in step["regions"]])
+        for step in results
+    ]
+
+def _latest_simulation_id():
+    """Id of the most recently created simulation"""
+    return max(simulation["id"] for simulation in client.get("/simulations").json()["simulations"])
+
 def test_read_main():
     """Test the main API endpoint"""
     response = client.get("/")
@@ -161,4 +217,263 @@ def test_simulate_endpoint_different_scenarios():
                             for region in ["Dhaka"])
     climate_change_production = sum(climate_change_results["2024-12-31"][region]["production"]
                                   for region in ["Dhaka"])
-    assert baseline_production != climate_change_production 
\ No newline at end of file
+    assert baseline_production != climate_change_production 
+def test_simulate_checkpoint_resume(database, monkeypatch):
+    """Test resuming an interrupted, checkpointed POST /simulate run from the CLI"""
+    expected = client.post("/simulate", json=SIMULATION_REQUEST).json()["results"]
+    assert client.post("/simulate", json={**SIMULATION_REQUEST, "checkpoint_every": 0}).status_code == 422
+    
+    with monkeypatch.context() as patched:
+        _interrupt_after(patched, 6)
+        response = client.post("/simulate", json={**SIMULATION_REQUEST, "checkpoint_every": 4})
+    assert response.status_code == 500
+    simulation_id = _latest_simulation_id()
+    assert f"simulation {simulation_id} can be resumed" in response.json()["detail"]
+    
+    result = CliRunner().invoke(cli, ["resume", str(simulation_id), "--engine", "database",
+                                      "--checkpoint-dir", str(database / "checkpoints")])
+    assert result.exit_code == 0, result.output
+    resumed = client.get(f"/simulations/{simulation_id}").json()["results"]
+    assert _step_values(resumed) == _step_values(expected)
+
+def test_cli_database_checkpoint_resume(database, monkeypatch):
+    """Test resuming an interrupted, checkpointed database run started from the CLI"""
+    runner = CliRunner()
+    arguments = ["run-simulation", "--engine", "database", "--start-date", "2024-01-01",
+                 "--end-date", "2024-01-11", "--farmer-count", "50",
+                 "--checkpoint-dir", str(database / "checkpoints")]
+    assert runner.invoke(cli, arguments).exit_code == 0
+    expected = client.get(f"/simulations/{_latest_simulation_id()}").json()["results"]
+    
+    with monkeypatch.context() as patched:
+        _interrupt_after(patched, 6)
+        result = runner.invoke(cli, arguments + ["--checkpoint-every", "4"])
+    assert isinstance(result.exception, RuntimeError)
+    simulation_id = _latest_simulation_id()
+    assert f"Checkpointing as simulation {simulation_id}" in result.output
+    
+    result = runner.invoke(cli, ["resume", str(simulation_id), "--engine", "database",
+                                 "--checkpoint-dir", str(database / "checkpoints")])
+    assert result.exit_code == 0, result.output
+    resumed = client.get(f"/simulations/{simulation_id}").json()["results"]
+    assert _step_values(resumed) == _step_values(expected)
+
+def test_fork_simulated_run(database):
+    """Test forking a run created by POST /simulate, which is checkpointed by default"""
+    parent = client.post("/simulate", json=SIMULATION_REQUEST).json()
+    expected = _step_values(parent["results"])
+    
+    response = client.post(f"/simulations/{parent['simulation_id']}/fork",
+                           json={"fork_date": "2024-01-07T00:00:00", "scenario_type": "climate_change"})
+    assert response.status_code == 200, response.text
+    child = response.json()
+    assert child["parent_id"] == parent["simulation_id"]
+    forked = _step_values(child["results"])
+    assert forked[:6] == expected[:6]
+    assert forked[6:] != expected[6:]
+    
+    # Deleting a run removes its checkpoints, so forking it fails cleanly
+    assert client.delete(f"/simulations/{parent['simulation_id']}").status_code == 200
+    assert not (database / "checkpoints" / str(parent["simulation_id"])).exists()
+    response = client.post(f"/simulations/{parent['simulation_id']}/fork", json={"fork_date": "2024-01-07T00:00:00"})
+    assert response.status_code == 400
+
+def test_checkpoint_pruning(database, monkeypatch):
+    """Test runs evicted from the result cache or idle too long lose their checkpoints"""
+    monkeypatch.setattr(api.main, "RESULT_CACHE_MAX_ENTRIES", 1)
+    checkpoints = database / "checkpoints"
+    first = client.post("/simulate", json={**SIMULATION_REQUEST, "use_cache": True}).json()["simulation_id"]
+    assert (checkpoints / str(first)).is_dir()
+    second = client.post("/simulate", json={**SIMULATION_REQUEST, "seed": 8, "use_cache": True}).json()["simulation_id"]
+    assert not (checkpoints / str(first)).exists()
+    assert (checkpoints / str(second)).is_dir()
+    
+    # Backdate the second run's checkpoints past CHECKPOINT_MAX_AGE_DAYS
+    old = time.time() - (CHECKPOINT_MAX_AGE_DAYS + 1) * 24 * 3600
+    for path in (checkpoints / str(second)).iterdir():
+        os.utime(path, (old, old))
+    third = client.post("/simulate", json=SIMULATION_REQUEST).json()["simulation_id"]
+    assert not (checkpoints / str(second)).exists()
+    assert (checkpoints / str(third)).is_dir()
+
+def test_cli_result_cache(database, monkeypatch):
+    """Test cached CLI runs restore their output files and are not listed as simulations"""
+    monkeypatch.setattr(cli_module, "RESULT_CACHE_DIRECTORY", str(database / "result_cache"))
+    runner = CliRunner()
+    arguments = ["run-simulation", "--end-date", "2024-01-10", "--farmer-count", "50"]
+    result = runner.invoke(cli, arguments + ["--output-dir", str(database / "first")])
+    assert result.exit_code == 0, result.output
+    assert "Using cached" not in result.output
+    
+    # The cache hit fills a new output directory with the first run's files
+    result = runner.invoke(cli, arguments + ["--output-dir", str(database / "second")])
+    assert result.exit_code == 0, result.output
+    assert "Using cached baseline run" in result.output
+    first, second = database / "first" / "baseline", database / "second" / "baseline"
+    assert sorted(path.name for path in second.iterdir()) == sorted(path.name for path in first.iterdir())
+    assert (second / "simulation_results.json").read_bytes() == (first / "simulation_results.json").read_bytes()
+    assert client.get("/simulations").json()["simulations"] == []
+
+def test_simulation_summary(database):
+    """Test per-region and monthly summaries of a run spanning two months"""
+    simulation_id = client.post("/simulate", json={**SIMULATION_REQUEST, "end_date": "2024-02-05T00:00:00"}).json()["simulation_id"]
+    
+    summary = client.get(f"/simulations/{simulation_id}/summary").json()
+    assert summary["simulation_id"] == simulation_id
+    assert [region["district"] for region in summary["regions"]] == ["Dhaka", "Chittagong", "Khulna"]
+    assert "months" not in summary
+    total = sum(region["total_production"] for region in summary["regions"])
+    assert summary["totals"]["total_production"] == pytest.approx(total)
+    
+    summary = client.get(f"/simulations/{simulation_id}/summary", params={"monthly": True}).json()
+    months = summary["months"]
+    assert sorted({row["month"][:7] for row in months}) == ["2024-01", "2024-02"]
+    assert len(months) == 2 * len(summary["regions"])
+    for region in summary["regions"]:
+        rows = [row for row in months if row["region_id"] == region["region_id"]]
+        assert sum(row["days"] for row in rows) == region["days"]
+        assert sum(row["total_production"] for row in rows) == pytest.approx(region["total_production"])
+    
+    assert client.get("/simulations/999/summary").status_code == 404
+
+def test_compare_simulations(database):
+    """Test comparing two runs side by side"""
+    baseline = client.post("/simulate", json=SIMULATION_REQUEST).json()["simulation_id"]
+    climate_change = client.post("/simulate", json={**SIMULATION_REQUEST, "scenario_type": "climate_change"}).json()["simulation_id"]
+    
+    response = client.get("/compare", params={"ids": f"{baseline},{climate_change}"})
+    assert response.status_code == 200
+    simulations = response.json()["simulations"]
+    assert [(simulation["simulation_id"], simulation["scenario_type"]) for simulation in simulations] == [
+        (baseline, "baseline"), (climate_change, "climate_change")
+    ]
+    for simulation in simulations:
+        totals = client.get(f"/simulations/{simulation['simulation_id']}/summary").json()["totals"]
+        assert {key: value for key, value in simulation.items() if key in totals} == totals
+    
+    response = client.get("/compare", params={"ids": f"{baseline},999"})
+    assert response.status_code == 404
+    assert "999" in response.json()["detail"]
+    assert client.get("/compare", params={"ids": "1,a"}).status_code == 422
+
+def test_get_simulation_slicing(database):
+    """Test slicing stored results by dates, regions and metrics, and resampling them"""
+    simulation_id = client.post("/simulate", json=SIMULATION_REQUEST).json()["simulation_id"]
+    full = client.get(f"/simulations/{simulation_id}").json()["results"]
+    
+    params = {"start_date": "2024-01-03T00:00:00", "end_date": "2024-01-06T00:00:00"}
+    results = client.get(f"/simulations/{simulation_id}", params=params).json()["results"]
+    # Slices are dated by simulated day; stored results by the date each step advanced to
+    expected = full[2:6]
+    assert [step["date"][:10] for step in results] == ["2024-01-03", "2024-01-04", "2024-01-05", "2024-01-06"]
+    assert [region["temperature"] for step in results for region in step["regions"]] == pytest.approx(
+        [region["temperature"] for step in expected for region in step["regions"]])
+    
+    params = {"regions": "Dhaka", "metrics": "temperature,rainfall"}
+    results = client.get(f"/simulations/{simulation_id}", params=params).json()["results"]
+    assert len(results) == len(full)
+    for step in results:
+        assert [sorted(region) for region in step["regions"]] == [["district", "id", "rainfall", "temperature"]]
+        assert step["regions"][0]["district"] == "Dhaka"
+    
+    # Every day falls in January, so monthly resampling leaves one row per region
+    daily = [region["temperature"] for step in full for region in step["regions"] if region["district"] == "Dhaka"]
+    for aggregation, value in (("mean", sum(daily) / len(daily)), ("sum", sum(daily))):
+        params = {"regions": "Dhaka", "metrics": "temperature", "resample": "monthly", "aggregation": aggregation}
+        response = client.get(f"/simulations/{simulation_id}", params=params).json()
+        assert response["resample"] == "monthly"
+        assert len(response["results"]) == 1
+        assert response["results"][0]["regions"][0]["temperature"] == pytest.approx(value)
+    
+    for params in ({"metrics": "humidity"}, {"resample": "hourly"}, {"resample": "daily", "aggregation": "median"},
+                   {"start_date": "January"}):
+        assert client.get(f"/simulations/{simulation_id}", params=params).status_code == 422
+    assert client.get("/simulations/999", params={"regions": "Dhaka"}).status_code == 404
+
+def test_list_farmers(database, monkeypatch):
+    """Test paging, projecting, filtering and streaming a run's farmers"""
+    simulation_id = client.post("/simulate", json=SIMULATION_REQUEST).json()["simulation_id"]
+    url = f"/simulations/{simulation_id}/farmers"
+    
+    # Pages of 7 continue after next_after until the last, short page
+    farmer_ids, after = [], None
+    while True:
+        page = client.get(url, params={"limit": 7, **({"after": after} if after is not None else {})}).json()
+        farmer_ids.extend(farmer["id"] for farmer in page["farmers"])
+        after = page["next_after"]
+        if after is None:
+            break
+        assert after == farmer_ids[-1]
+    assert len(farmer_ids) == 50
+    assert farmer_ids == sorted(set(farmer_ids))
+    
+    # ndjson streams every farmer in the same order
+    response = client.get(url, params={"format": "ndjson"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    streamed = [json.loads(line) for line in response.text.splitlines()]
+    assert [farmer["id"] for farmer in streamed] == farmer_ids
+    
+    page = client.get(url, params={"fields": "farmer_id,district", "irrigation_type": "canal"}).json()
+    assert page["farmers"]
+    assert all(sorted(farmer) == ["district", "farmer_id"] for farmer in page["farmers"])
+    canal = [farmer["farmer_id"] for farmer in streamed if farmer["irrigation_type"] == "canal"]
+    assert [farmer["farmer_id"] for farmer in page["farmers"]] == canal
+    
+    assert client.get(url, params={"fields": "farmer_id,income"}).status_code == 422
+    assert client.get(url, params={"format": "csv"}).status_code == 422
+    assert client.get("/simulations/999/farmers").status_code == 404
+    monkeypatch.setattr(api.main, "arrow_available", lambda: False)
+    assert client.get(url, params={"format": "arrow"}).status_code == 406
+
+def test_sweep_limits():
+    """Test API sweeps reject oversized requests before running anything"""
+    bounds = {"adoption_multiplier": [1, 2]}
+    assert client.post("/sweeps", json={"bounds": bounds, "samples": 10000}).status_code == 422
+    assert client.post("/sweeps", json={"bounds": bounds, "farmer_count": 10 ** 9}).status_code == 422
+    assert client.post("/sweeps", json={"bounds": bounds, "workers": 0}).status_code == 422
+    grid = {"adoption_multiplier": list(range(15)), "rainfall_change_mean": list(range(15))}
+    response = client.post("/sweeps", json={"grid": grid})
+    assert response.status_code == 422
+    assert "at most" in response.json()["detail"]
+    response = client.post("/sweeps", json={"bounds": {"temperature_stress_shift": [0, 1]}})
+    assert response.status_code == 422
+
+def test_generate_visualizations_uses_run_regions(tmp_path):
+    """Test charts are built from the run's own regions, not every configured district"""
+    from types import SimpleNamespace
+    
+    class RecordingVisualizer:
+        def render_charts(self, jobs, max_workers=None):
+            self.jobs = jobs
+            for job in jobs:
+                job[2]['save_path'].write_bytes(b"")
+            return [str(job[2]['save_path']) for job in jobs]
+    
+    impact = {'drought_risk': 0.1, 'flood_risk': 0.2}
+    results = {datetime(2024, 1, day): {district: {'production': 1.0, 'market_price': 2.0, 'climate_impact': impact}
+                                        for district in ("Dhaka", "Khulna")}
+               for day in (1, 2)}
+    regions = {district: SimpleNamespace(latitude=23.0, longitude=90.0) for district in ("Dhaka", "Khulna")}
+    visualizer = RecordingVisualizer()
+    api.main.generate_visualizations(results, tmp_path, visualizer, regions)
+    climate_data, production_data = visualizer.jobs[0][1][0], visualizer.jobs[1][1][0]
+    assert sorted(climate_data) == sorted(production_data) == ["Dhaka", "Khulna"]
+    assert sorted(visualizer.jobs[2][1][0]) == ["Dhaka", "Khulna"]
+
+def test_farmer_stream_connections(database):
+    """Test farmer streams only hold a database connection while their body is being read"""
+    import asyncio
+    
+    simulation_id = client.post("/simulate", json=SIMULATION_REQUEST).json()["simulation_id"]
+    pool = database_session.engine.pool
+    
+    # A response whose body is never read, as when the client disconnects first
+    response = asyncio.run(api.main.get_simulation_farmers(
+        simulation_id, fields=None, district=None, irrigation_type=None, min_adoption=None,
+        max_adoption=None, after=None, limit=None, format="ndjson"
+    ))
+    assert pool.checkedout() == 0
+    
+    assert len(client.get(f"/simulations/{simulation_id}/farmers", params={"format": "ndjson"}).text.splitlines()) == 50
+    assert pool.checkedout() == 0
+    del response
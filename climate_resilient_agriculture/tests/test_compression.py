@@ -0,0 +1,85 @@
+import pytest
+import gzip
+import json
+import zlib
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from api.compression import CompressionMiddleware, negotiate_encoding
+from api.streaming import stream_json, stream_ndjson
+
+PAYLOAD = {"results": [{"district": "Dhaka", "temperature": 25.0}] * 500}
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+@app.get("/large")
+async def large():
+    return PAYLOAD
+
+@app.get("/small")
+async def small():
+    return {"status": "ok"}
+
+@app.get("/stream")
+async def stream():
+    def chunks():
+        for i in range(100):
+            yield (json.dumps({"step": i, "padding": "x" * 50}) + "\n").encode()
+    return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+client = TestClient(app)
+
+def test_negotiate_encoding():
+    """Test choosing an encoding from Accept-Encoding"""
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0, deflate") is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("*") in ("br", "gzip")
+    assert negotiate_encoding("") is None
+
+def test_gzip_response():
+    """Test large responses are gzipped and small ones are left alone"""
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.json() == PAYLOAD
+
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json() == PAYLOAD
+
+def test_streaming_compression():
+    """Test streamed responses are compressed chunk by chunk"""
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        raw = b"".join(response.iter_raw())
+    lines = gzip.decompress(raw).decode().splitlines()
+    assert [json.loads(line)["step"] for line in lines] == list(range(100))
+    # Each chunk is flushed, so the stream decodes incrementally
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    assert decoder.decompress(raw[:len(raw) // 2])
+
+def test_streaming_encoders():
+    """Test incremental JSON and NDJSON serialization"""
+    items = [{"step": i} for i in range(3)]
+    assert json.loads(b"".join(stream_json({"id": 1}, "results", items))) == {"id": 1, "results": items}
+    assert json.loads(b"".join(stream_json({"id": 1}, "results", None))) == {"id": 1, "results": None}
+
+    closed = []
+    chunks = list(stream_ndjson([(2, items[:2]), (3, items[2:])], on_close=lambda: closed.append(True)))
+    assert len(chunks) == 2
+    assert [json.loads(line) for line in b"".join(chunks).decode().splitlines()] == items
+    assert closed == [True]
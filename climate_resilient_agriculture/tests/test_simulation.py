@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 from datetime import datetime, timedelta
 import sys
 import os
@@ -7,9 +8,25 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from core.simulation.engine import SimulationEngine
+from core.simulation.scenarios import SCENARIOS, ScenarioInputs, get_scenario
 from core.utils.data_generator import DataGenerator
+import core.data_generator
 from config.simulation_config import *
 from core.models.base import Location, FarmerProfile, Infrastructure, Policy
+from core.models.records import LocationRecord, FarmerRecord
+from core.models.registry import LocationRegistry
+from core.utils.climatology import get_climatology
+from core.utils.population import FarmerPopulation
+from core.utils.profiling import Profiler
+from core.utils.checkpoint import list_checkpoints
+from core.utils.result_cache import request_key, simulation_sources
+from core.database.repository import SimulationRepository
+from core.database.session import pool_settings
+from core.simulation_engine import SimulationEngine as DatabaseSimulationEngine
+from core.database.models import Base, ClimateData as ClimateDataRow
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 def test_simulation_engine_initialization():
     """Test simulation engine initialization"""
@@ -66,6 +83,38 @@ def test_farmer_profile_generation():
     assert 0 <= farmer.technology_adoption_level <= 1
     assert 0 <= farmer.risk_tolerance <= 1
 
+def test_record_generation():
+    """Test unvalidated record generation for hot loops"""
+    generator = DataGenerator(seed=42, validate=False)
+    location = generator.generate_location("Dhaka")
+    farmer = generator.generate_farmer_profile(location)
+    
+    assert isinstance(location, LocationRecord)
+    assert isinstance(farmer, FarmerRecord)
+    assert not hasattr(farmer, "__dict__")
+    
+    # Records validate into the equivalent pydantic models at I/O boundaries
+    model = farmer.to_model()
+    assert isinstance(model, FarmerProfile)
+    assert isinstance(model.location, Location)
+    assert model.farmer_id == farmer.farmer_id
+    assert model.location.district == "Dhaka"
+    assert FarmerRecord.from_model(model).dict() == farmer.dict()
+
+def test_location_interning():
+    """Test that unvalidated farmers share interned location entries"""
+    registry = LocationRegistry()
+    generator = DataGenerator(seed=42, validate=False, registry=registry)
+    farmers = [generator.generate_farmer_profile() for _ in range(2000)]
+    
+    assert len(registry) < len(farmers)
+    shared = {id(farmer.location) for farmer in farmers}
+    assert len(shared) == len(registry)
+    for farmer in farmers:
+        location = farmer.location
+        assert registry.districts[location.district_code] == location.district
+        assert registry.zones[location.zone_code] == location.agro_ecological_zone
+
 def test_infrastructure_generation():
     """Test infrastructure generation"""
     generator = DataGenerator(seed=42)
@@ -121,6 +170,22 @@ def test_climate_impact_simulation():
     assert "flood_risk" in climate_impact
     assert 0 <= climate_impact["drought_risk"] <= 1
     assert 0 <= climate_impact["flood_risk"] <= 1
+    assert climate_impact["seasonal_temperature"] == engine.climatology.lookup(
+        engine.current_date, location.agro_ecological_zone
+    )["temperature"]
+
+def test_climatology_lookup():
+    """Test precomputed climatology tables"""
+    climatology = get_climatology()
+    
+    assert climatology is get_climatology()
+    assert not climatology.temperature.flags.writeable
+    assert climatology.lookup(datetime(2024, 7, 1))["monsoon"]
+    assert not climatology.lookup(datetime(2024, 1, 15))["monsoon"]
+    # Leap years shift day-of-year but not the monsoon months
+    assert climatology.lookup(datetime(2023, 5, 1))["monsoon"]
+    assert climatology.lookup(datetime(2024, 5, 1))["monsoon"]
+    assert not climatology.lookup(datetime(2024, 4, 30))["monsoon"]
 
 def test_crop_yield_simulation():
     """Test crop yield simulation"""
@@ -189,4 +254,421 @@ def test_full_simulation():
         assert "Dhaka" in region_data
         assert "production" in region_data["Dhaka"]
         assert "market_price" in region_data["Dhaka"]
-        assert "climate_impact" in region_data["Dhaka"] 
\ No newline at end of file
+        assert "climate_impact" in region_data["Dhaka"] 
+
+def test_batch_production():
+    """Test vectorized production over regions x days"""
+    generator = core.data_generator.DataGenerator(seed=42)
+    farmers = generator.generate_farmer_data(300)
+    farmer_arrays = generator.farmers_to_arrays(farmers, num_regions=3)
+    crop_arrays = generator.crops_to_arrays(generator.generate_crop_data())
+    
+    production = generator.calculate_production_batch(
+        farmer_arrays, crop_arrays, num_regions=4, num_days=30
+    )
+    
+    assert production['total_production'].shape == (4, 30)
+    assert len(production['crop_type']) == 4
+    # Region 3 has no farmers assigned, so it produces nothing
+    assert production['total_production'][3].sum() == 0
+    assert (production['total_production'][:3] > 0).all()
+    land = farmer_arrays['land_holding_size']
+    assert production['area_hectares'][0, 0] == round(land[farmer_arrays['region'] == 0].sum(), 2)
+    
+    # Scenarios act on the same population
+    baseline = generator.calculate_production_batch(
+        farmer_arrays, crop_arrays, 3, 30, "baseline", rng=np.random.default_rng(0)
+    )
+    climate_change = generator.calculate_production_batch(
+        farmer_arrays, crop_arrays, 3, 30, "climate_change", rng=np.random.default_rng(0)
+    )
+    assert (climate_change['yield_per_hectare'] < baseline['yield_per_hectare']).all()
+
+def test_shared_population(tmp_path):
+    """Test memory-mapped population attach and copy-on-write overrides"""
+    generator = DataGenerator(seed=42, validate=False)
+    farmers = [generator.generate_farmer_profile() for _ in range(500)]
+    population = FarmerPopulation.from_profiles(farmers, districts=generator.DISTRICTS)
+    population.save(tmp_path / "population")
+    
+    shared = FarmerPopulation.attach(tmp_path / "population")
+    assert len(shared) == len(farmers)
+    assert isinstance(shared.land_holding_size, np.memmap)
+    assert not shared.technology_adoption_level.flags.writeable
+    assert np.array_equal(shared.land_holding_size, population.land_holding_size)
+    
+    boosted = shared.with_overrides(
+        technology_adoption_level=np.minimum(1.0, shared.technology_adoption_level * 1.5)
+    )
+    assert boosted.land_holding_size is shared.land_holding_size
+    assert np.array_equal(shared.technology_adoption_level, population.technology_adoption_level)
+    assert (boosted.technology_adoption_level >= shared.technology_adoption_level).all()
+
+def test_population_simulation_matches_farmers():
+    """Test that the population code path matches per-farmer simulation"""
+    generator = DataGenerator(seed=42, validate=False)
+    farmers = [generator.generate_farmer_profile() for _ in range(300)]
+    
+    def build_engine():
+        engine = SimulationEngine(datetime(2024, 1, 1), datetime(2024, 1, 5), timedelta(days=1), seed=7,
+                                  registry=generator.registry)
+        for district in generator.DISTRICTS:
+            engine.add_region(generator.generate_location(district))
+        return engine
+    
+    engine = build_engine()
+    for farmer in farmers:
+        engine.add_farmer(farmer)
+    # Farmers are grouped by interned district code, named through the registry
+    groups = engine.group_farmers_by_region()
+    assert all(isinstance(code, int) for code in groups)
+    assert {generator.registry.districts[code] for code in groups} <= set(engine.regions)
+    assert sum(map(len, groups.values())) == len(farmers)
+    expected = engine.run_full_simulation()
+    
+    engine = build_engine()
+    engine.set_population(FarmerPopulation.from_profiles(farmers))
+    actual = engine.run_full_simulation()
+    
+    for date, regions in expected.items():
+        for region, metrics in regions.items():
+            assert actual[date][region]["production"] == pytest.approx(metrics["production"])
+            assert actual[date][region]["market_price"] == pytest.approx(metrics["market_price"])
+
+def test_profiling_instrumentation():
+    """Test per-phase timers and counters of an instrumented simulation step"""
+    profiler = Profiler()
+    engine = SimulationEngine(datetime(2024, 1, 1), datetime(2024, 1, 5), timedelta(days=1), profiler=profiler)
+    generator = DataGenerator(seed=42, validate=False)
+    for district in DISTRICTS[:3]:
+        engine.add_region(generator.generate_location(district))
+    for _ in range(30):
+        engine.add_farmer(generator.generate_farmer_profile())
+    
+    engine.run_full_simulation()
+    
+    assert {"climate_draw", "yield", "market_price"} <= set(profiler.timings)
+    assert profiler.calls["climate_draw"] == 3 * 5
+    assert profiler.counters["objects_allocated"] == 2 * 3 * 5
+    assert 'simulation_phase_seconds_total{phase="yield"}' in profiler.to_prometheus()
+    assert "climate_draw" in profiler.format_table()
+    
+    total = Profiler()
+    total.merge(profiler)
+    assert total.calls == profiler.calls
+    with pytest.raises(ValueError):
+        with profiler.phase("climate"):
+            pass
+    assert SimulationEngine(datetime(2024, 1, 1), datetime(2024, 1, 5), timedelta(days=1)).profiler.enabled is False
+
+def test_profiler_sharing(tmp_path):
+    """Test profiles exported by several worker processes add up"""
+    profiler = Profiler()
+    with profiler.phase("yield"):
+        pass
+    profiler.count("rows_written", 10)
+    profiler.save(tmp_path / "1.json")
+    profiler.save(tmp_path / "2.json")
+    
+    combined = Profiler()
+    for path in sorted(tmp_path.glob("*.json")):
+        combined.merge(Profiler.load(path))
+    assert combined.calls["yield"] == 2
+    assert combined.counters["rows_written"] == 20
+    assert combined.timings["yield"] == pytest.approx(2 * profiler.timings["yield"])
+
+def test_pool_settings():
+    """Test connection pools of all API workers stay within the database's connection budget"""
+    assert pool_settings(1, max_connections=100, reserved=5) == {'pool_size': 5, 'max_overflow': 10}
+    for workers in (4, 16, 64, 200):
+        settings = pool_settings(workers, max_connections=100, reserved=5)
+        assert settings['pool_size'] >= 1
+        assert workers * (settings['pool_size'] + settings['max_overflow']) <= max(95, workers)
+
+def test_synthetic_population():
+    """Test bulk generation of a synthetic columnar population"""
+    generator = DataGenerator(seed=42, validate=False)
+    population = generator.generate_population(10000, ["A", "B", "C"])
+    
+    assert len(population) == 10000
+    assert population.districts == ["A", "B", "C"]
+    assert np.bincount(population.district_code).tolist() == [3334, 3333, 3333]
+    assert 0 <= population.technology_adoption_level.min() <= population.technology_adoption_level.max() <= 1
+    assert population.farming_experience.dtype == np.int32
+    
+    regions = core.data_generator.DataGenerator(seed=1).generate_regions(25)
+    assert len({region['district'] for region in regions}) == 25
+
+def _checkpoint_engine():
+    """Build a small in-memory engine for checkpoint tests"""
+    generator = DataGenerator(seed=42, validate=False)
+    engine = SimulationEngine(datetime(2024, 1, 1), datetime(2024, 1, 10), timedelta(days=1), seed=42)
+    for district in DISTRICTS[:2]:
+        engine.add_region(generator.generate_location(district))
+    for _ in range(20):
+        engine.add_farmer(generator.generate_farmer_profile())
+    engine.add_policy(generator.generate_policy())
+    return engine
+
+def test_checkpoint_resume(tmp_path):
+    """Test resuming an interrupted in-memory simulation from its last checkpoint"""
+    expected = _checkpoint_engine().run_full_simulation()
+    
+    engine = _checkpoint_engine()
+    checkpoint_dir = engine.enable_checkpoints(tmp_path, every=4)
+    assert engine.run_full_simulation() == expected
+    checkpoints = list_checkpoints(checkpoint_dir)
+    assert [path.name for path in checkpoints] == [
+        "checkpoint_00000004.npz", "checkpoint_00000008.npz", "checkpoint_00000010.npz"
+    ]
+    
+    # Simulate a crash before the final checkpoint
+    checkpoints[-1].unlink()
+    resumed = SimulationEngine.resume(engine.simulation_id, tmp_path)
+    
+    assert resumed.current_date == datetime(2024, 1, 9)
+    assert resumed.run_full_simulation() == expected
+
+def _database_session():
+    """Session on a fresh in-memory database"""
+    db_engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(db_engine)
+    return sessionmaker(bind=db_engine)()
+
+def test_database_checkpoint_resume(tmp_path):
+    """Test resuming the database engine discards rows written after the checkpoint"""
+    session = _database_session()
+    parameters = {'seed': 7, 'farmer_count': 50, 'region_count': 3}
+    
+    engine = DatabaseSimulationEngine(datetime(2024, 1, 1), datetime(2024, 1, 11),
+                                      parameters=parameters, session=session)
+    checkpoint_dir = engine.enable_checkpoints(tmp_path, every=4)
+    expected = engine.run()
+    list_checkpoints(checkpoint_dir)[-1].unlink()
+    
+    resumed = DatabaseSimulationEngine.resume(engine.simulation.id, tmp_path, session=session)
+    assert session.query(ClimateDataRow).count() == 8 * 3 * 2
+    result = resumed.run()
+    
+    assert result['results'] == expected['results']
+    assert session.query(ClimateDataRow).count() == 10 * 3 * 2
+
+def _step_values(result):
+    """Dates and per-region values of database engine results, without region ids"""
+    return [
+        (step['date'], [(region['district'], region['temperature'], region['rainfall'], region['crop_yield'])
+                        for region in step['regions']])
+        for step in result['results']
+    ]
+
+def test_database_fork(tmp_path):
+    """Test forking a stored simulation reuses its prefix and diverges after the fork date"""
+    session = _database_session()
+    parent = DatabaseSimulationEngine(datetime(2024, 1, 1), datetime(2024, 1, 11),
+                                      parameters={'seed': 7, 'farmer_count': 50, 'region_count': 3},
+                                      session=session)
+    parent.enable_checkpoints(tmp_path, every=4)
+    expected = _step_values(parent.run())
+    
+    # Same scenario: the fork reproduces its parent
+    same = DatabaseSimulationEngine.fork(parent.simulation.id, datetime(2024, 1, 7),
+                                         directory=tmp_path, session=session)
+    assert same.current_date == datetime(2024, 1, 5)
+    assert _step_values(same.run()) == expected
+    
+    child = DatabaseSimulationEngine.fork(parent.simulation.id, datetime(2024, 1, 7),
+                                          scenario_type='climate_change', directory=tmp_path, session=session)
+    forked = _step_values(child.run())
+    assert forked[:6] == expected[:6]
+    assert forked[6:] != expected[6:]
+    assert child.simulation.parent_id == parent.simulation.id
+    assert child.simulation.fork_date == datetime(2024, 1, 7)
+    assert session.query(ClimateDataRow).filter(
+        ClimateDataRow.region_id.in_([region.id for region in child.regions])
+    ).count() == 10 * 3 * 2
+    
+    # Forks of forks keep the child's scenario switch
+    grandchild = DatabaseSimulationEngine.fork(child.simulation.id, datetime(2024, 1, 9),
+                                               directory=tmp_path, session=session)
+    assert _step_values(grandchild.run()) == forked
+    
+    # Forking a fork before its own fork date starts from the parent's history
+    early = DatabaseSimulationEngine.fork(child.simulation.id, datetime(2024, 1, 3), scenario_type='baseline',
+                                          directory=tmp_path, session=session)
+    assert _step_values(early.run()) == expected
+    
+    with pytest.raises(ValueError):
+        DatabaseSimulationEngine.fork(parent.simulation.id, datetime(2024, 1, 7),
+                                      parameters={'farmer_count': 10}, directory=tmp_path, session=session)
+
+def test_result_cache():
+    """Test request keys and caching stored runs with size and age eviction"""
+    start, end = datetime(2024, 1, 1), datetime(2024, 12, 31)
+    assert request_key("baseline", start, end, {"farmer_count": 10}) is None
+    key = request_key("baseline", start, end, {"seed": 1, "farmer_count": 10})
+    assert key == request_key("baseline", start, end, {"farmer_count": 10, "seed": 1})
+    assert key != request_key("baseline", start, end, {"seed": 2, "farmer_count": 10})
+    assert key != request_key("climate_change", start, end, {"seed": 1, "farmer_count": 10})
+    # Every model module is part of the code version, not a hand-picked list
+    sources = simulation_sources()
+    assert sources == sorted(sources)
+    assert {"core/utils/climatology.py", "core/utils/population.py", "core/models/base.py"} <= set(sources)
+    
+    session = _database_session()
+    repository = SimulationRepository(session)
+    keys = []
+    for seed in range(3):
+        simulation = repository.create_simulation("baseline", start, end, {"seed": seed})
+        repository.update_simulation_results(simulation.id, [{"seed": seed}])
+        keys.append(request_key("baseline", start, end, {"seed": seed}))
+        repository.cache_simulation(keys[-1], simulation.id)
+    
+    assert repository.get_cached_simulation(keys[0]).results == [{"seed": 0}]
+    assert repository.get_cached_simulation("missing") is None
+    
+    # The least recently used entry is evicted first
+    assert repository.evict_result_cache(max_entries=2) == 1
+    assert repository.get_cached_simulation(keys[1]) is None
+    assert repository.get_cached_simulation(keys[0]) is not None
+    
+    # Entries past their age are dropped, while the simulations stay stored
+    assert repository.get_cached_simulation(keys[2], max_age=timedelta(seconds=-1)) is None
+    assert repository.get_cached_simulation(keys[0], max_age=timedelta(days=1)) is not None
+    assert repository.evict_result_cache(max_entries=10, max_age=timedelta(seconds=-1)) == 1
+    assert len(repository.get_all_simulations()) == 3
+
+def test_simulation_summary():
+    """Test monthly summary rows match the stored rows they aggregate"""
+    session = _database_session()
+    engine = DatabaseSimulationEngine(datetime(2024, 1, 1), datetime(2024, 2, 15),
+                                      parameters={'seed': 7, 'farmer_count': 50, 'region_count': 3},
+                                      session=session)
+    engine.run()
+    repository = SimulationRepository(session)
+    summary = repository.get_simulation_summary(engine.simulation.id, monthly=True)
+    
+    assert [row['days'] for row in summary['months']] == [31] * 3 + [14] * 3
+    assert [region['days'] for region in summary['regions']] == [45] * 3
+    days, sums = repository.aggregate_region_data([region.id for region in engine.regions],
+                                                  datetime(2024, 1, 1), datetime(2024, 2, 15))
+    assert days == 45
+    assert [region['total_production'] for region in summary['regions']] == pytest.approx(sums[:, 0])
+    assert summary['totals']['days'] == 45
+    assert summary['totals']['average_price'] == pytest.approx(sums[:, 2].sum() / (45 * 3))
+    assert repository.compare_simulations([engine.simulation.id]) == {engine.simulation.id: summary['totals']}
+
+def test_farmer_listing():
+    """Test listing farmers with projection, filters and keyset pagination"""
+    session = _database_session()
+    engine = DatabaseSimulationEngine(datetime(2024, 1, 1), datetime(2024, 1, 2),
+                                      parameters={'seed': 7, 'farmer_count': 250, 'region_count': 3},
+                                      session=session)
+    repository = SimulationRepository(session)
+    simulation_id = engine.simulation.id
+    
+    pages = list(repository.iter_farmer_batches(simulation_id, fields=['farmer_id'], batch_size=100))
+    assert [len(rows) for _, rows in pages] == [100, 100, 50]
+    assert [row['farmer_id'] for _, rows in pages for row in rows] == [farmer['farmer_id'] for farmer in engine.farmers]
+    
+    # Continuing after a page's last id returns the next page
+    last_id, _ = pages[0]
+    _, rows = next(repository.iter_farmer_batches(simulation_id, fields=['farmer_id'], after_id=last_id, limit=5))
+    assert rows == pages[1][1][:5]
+    
+    rows = [row for _, batch in repository.iter_farmer_batches(
+        simulation_id, fields=['district', 'irrigation_type', 'technology_adoption_level'],
+        district=engine.regions[0].district, irrigation_type='canal', min_adoption=0.3, max_adoption=0.8
+    ) for row in batch]
+    assert rows
+    assert all(row['district'] == engine.regions[0].district and row['irrigation_type'] == 'canal'
+               and 0.3 <= row['technology_adoption_level'] <= 0.8 for row in rows)
+    with pytest.raises(ValueError):
+        next(repository.iter_farmer_batches(simulation_id, fields=['name']))
+
+def test_scenario_specs(tmp_path):
+    """Test scenarios are applied to shared inputs without modifying them"""
+    generator = DataGenerator(seed=42, validate=False)
+    regions = [generator.generate_location(district) for district in DISTRICTS[:3]]
+    inputs = ScenarioInputs(regions=regions, population=generator.generate_population(300, DISTRICTS[:3]),
+                            policies=[generator.generate_policy() for _ in range(2)])
+    adoption = inputs.population.technology_adoption_level.copy()
+    sectors = [policy.target_sector for policy in inputs.policies]
+    
+    config = SimulationConfig(start_date=datetime(2024, 1, 1), end_date=datetime(2024, 3, 31))
+    engines = {name: SimulationEngine.for_scenario(get_scenario(name), inputs, config) for name in SCENARIOS}
+    assert engines["baseline"].population.technology_adoption_level is inputs.population.technology_adoption_level
+    boosted = engines["technology_adoption"].population.technology_adoption_level
+    assert np.allclose(boosted, np.minimum(1.0, adoption * 1.5))
+    assert all(policy.target_sector == "technology_adoption" for policy in engines["technology_adoption"].policies.values())
+    np.testing.assert_array_equal(inputs.population.technology_adoption_level, adoption)
+    assert [policy.target_sector for policy in inputs.policies] == sectors
+    
+    # The climate draws follow the scenario's trend
+    def mean_temperature_change(engine):
+        results = engine.run_full_simulation()
+        return np.mean([region["climate_impact"]["temperature_change"]
+                        for step in results.values() for region in step.values()])
+    assert mean_temperature_change(engines["baseline"]) == pytest.approx(0.5, abs=0.05)
+    assert mean_temperature_change(engines["climate_change"]) == pytest.approx(1.0, abs=0.05)
+    
+    # Checkpoints keep the scenario
+    engine = SimulationEngine.for_scenario(SCENARIOS["climate_change"], inputs,
+                                           config.with_overrides(end_date=datetime(2024, 1, 10)))
+    engine.enable_checkpoints(tmp_path, every=4)
+    engine.run_full_simulation()
+    assert SimulationEngine.resume(engine.simulation_id, tmp_path).scenario == SCENARIOS["climate_change"]
+    with pytest.raises(ValueError):
+        get_scenario("drought")
+
+def test_parameter_sweep():
+    """Test grid and Latin-hypercube sweeps collected into one table"""
+    from scripts.run_sweep import grid_samples, latin_hypercube_samples, run_sweep
+    
+    samples = grid_samples({'adoption_multiplier': [1.0, 1.5], 'rainfall_change_mean': [-200, 0, 200]})
+    assert len(samples) == 6
+    assert samples[1] == {'adoption_multiplier': 1.0, 'rainfall_change_mean': 0.0}
+    
+    lhs = latin_hypercube_samples({'temperature_change_mean': (0.0, 1.0)}, 10, seed=1)
+    strata = sorted(int(sample['temperature_change_mean'] * 10) for sample in lhs)
+    assert strata == list(range(10))
+    with pytest.raises(ValueError):
+        grid_samples({'farmer_count': [10, 20]})
+    # The in-memory engine never reads the batch model's heat-stress shift
+    with pytest.raises(ValueError, match="does not use temperature_stress_shift"):
+        grid_samples({'temperature_stress_shift': [0.0, 1.0]})
+    
+    config = SimulationConfig(end_date=datetime(2024, 1, 31), farmer_count=200)
+    options = dict(config=config, progress=False)
+    table = run_sweep(samples, **options, workers=1)
+    assert list(table)[:3] == ['sample', 'adoption_multiplier', 'rainfall_change_mean']
+    assert all(len(column) == 6 for column in table.values())
+    assert table['total_production'][3] > table['total_production'][0]
+    assert table['rainfall_change'][2] > table['rainfall_change'][0]
+    # Pooled runs attach the shared population and give the same table
+    assert run_sweep(samples, **options, workers=2) == table
+
+def test_simulation_config():
+    """Test per-run configs are immutable and concurrent runs in one process stay independent"""
+    import dataclasses
+    from concurrent.futures import ThreadPoolExecutor
+    from scripts.run_scenarios import generate_scenario_inputs
+    
+    config = SimulationConfig(end_date=datetime(2024, 1, 31), districts=DISTRICTS[:3], farmer_count=200)
+    assert config.districts == tuple(DISTRICTS[:3])
+    assert config.with_overrides(farmer_count=None) == config
+    assert config.with_overrides(seed=7).seed == 7 and config.seed == SIMULATION_SEED
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        config.seed = 7
+    with pytest.raises(ValueError):
+        config.with_overrides(end_date=datetime(2023, 12, 31))
+    
+    def run(config):
+        inputs = generate_scenario_inputs(config)
+        return SimulationEngine.for_scenario(SCENARIOS["baseline"], inputs, config).run_full_simulation()
+    
+    configs = [config, config.with_overrides(seed=7)] * 2
+    expected = [run(config) for config in configs]
+    with ThreadPoolExecutor(max_workers=len(configs)) as executor:
+        assert list(executor.map(run, configs)) == expected
+    assert expected[0] != expected[1]
+    assert set(expected[0][max(expected[0])]) == set(DISTRICTS[:3])
@@ -0,0 +1,53 @@
+import pytest
+import subprocess
+import sys
+import os
+
+PROJECT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries only plotting and export code paths may import
+HEAVY_MODULES = ("matplotlib", "pandas", "folium", "pyarrow")
+
+# Generous cumulative import time, in seconds, of an entry point
+IMPORT_TIME_BUDGET = 2.0
+
+# Wall-clock budgets vary on loaded runners, so like the benchmarks they are checked only with BENCHMARK=1
+BENCHMARKS_ENABLED = os.getenv("BENCHMARK", "").lower() in ("1", "true", "yes")
+
+def _import_times(module):
+    """Cumulative import time in seconds of each module loaded by importing ``module``"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_DIRECTORY, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+def test_api_startup():
+    """Test the API imports without the plotting libraries"""
+    times = _import_times("api.main")
+    assert not [name for name in times if name.split(".")[0] in HEAVY_MODULES]
+
+def test_cli_startup():
+    """Test the CLI imports without the plotting libraries"""
+    times = _import_times("cli")
+    assert not [name for name in times if name.split(".")[0] in HEAVY_MODULES]
+
+@pytest.mark.skipif(not BENCHMARKS_ENABLED, reason="set BENCHMARK=1 to check import times")
+@pytest.mark.parametrize("module", ["api.main", "cli"])
+def test_startup_time(module):
+    """Test an entry point imports within the time budget"""
+    assert _import_times(module)[module] < IMPORT_TIME_BUDGET
+
+def test_main_imports():
+    """Test main.py's imports resolve with only this directory on the path, as when it is run directly"""
+    env = {name: value for name, value in os.environ.items() if name != "PYTHONPATH"}
+    result = subprocess.run([sys.executable, "-c", "import main"], cwd=PROJECT_DIRECTORY,
+                            capture_output=True, text=True, env=env)
+    assert result.returncode == 0, result.stderr
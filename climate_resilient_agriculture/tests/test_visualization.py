@@ -0,0 +1,226 @@
+import pytest
+from datetime import datetime, timedelta
+import sys
+import os
+import json
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import numpy as np
+import matplotlib.pyplot as plt
+from analysis.visualization import SimulationVisualizer, lttb_downsample, minmax_downsample
+from analysis.render_cache import RenderCache
+from core.utils.results_store import ResultsStore, DatabaseSeries, resample_series
+from core.database.models import Base, Region, ClimateData, ProductionData
+from core.database.repository import SimulationRepository
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+def _production_data(days: int = 30):
+    """Build production trend input for two regions"""
+    start = datetime(2024, 1, 1)
+    return {
+        region: {
+            start + timedelta(days=i): {'production': 100.0 + i, 'market_price': 1000.0 - i}
+            for i in range(days)
+        }
+        for region in ["Dhaka", "Khulna"]
+    }
+
+def test_headless_rendering(tmp_path):
+    """Test that headless rendering saves charts without leaking figures"""
+    visualizer = SimulationVisualizer(headless=True)
+    open_figures = len(plt.get_fignums())
+    
+    save_path = tmp_path / "production_trends.png"
+    visualizer.plot_production_trends(_production_data(), save_path=save_path)
+    
+    assert save_path.exists()
+    assert len(plt.get_fignums()) == open_figures
+
+def test_concurrent_rendering(tmp_path):
+    """Test rendering several charts in a process pool"""
+    visualizer = SimulationVisualizer(headless=True)
+    farmers = [
+        {'land_holding_size': 1.0 + i / 10, 'technology_adoption_level': i / 20,
+         'farming_experience': i, 'risk_tolerance': 0.5}
+        for i in range(20)
+    ]
+    jobs = [
+        ('plot_production_trends', (_production_data(),), {'save_path': tmp_path / "production.png"}),
+        ('plot_farmer_distribution', (farmers,), {'save_path': tmp_path / "farmers.png"})
+    ]
+    
+    paths = visualizer.render_charts(jobs, max_workers=2)
+    
+    assert paths == [str(tmp_path / "production.png"), str(tmp_path / "farmers.png")]
+    assert all(os.path.exists(path) for path in paths)
+
+def test_downsampling():
+    """Test LTTB and min/max downsampling of long series"""
+    x = np.arange('2000-01-01', '2030-01-01', dtype='datetime64[D]')
+    y = np.sin(np.arange(len(x)) / 50.0)
+    y[5000] = 10.0
+    
+    lttb_x, lttb_y = lttb_downsample(x, y, 500)
+    assert len(lttb_x) == 500
+    assert lttb_x[0] == x[0] and lttb_x[-1] == x[-1]
+    assert 10.0 in lttb_y
+    
+    minmax_x, minmax_y = minmax_downsample(x, y, 250)
+    assert len(minmax_x) <= 500
+    assert minmax_y.max() == y.max()
+    assert minmax_y.min() == y.min()
+
+def test_aggregated_trends(tmp_path):
+    """Test monthly aggregation of production trends"""
+    visualizer = SimulationVisualizer(headless=True)
+    save_path = tmp_path / "monthly.png"
+    visualizer.plot_production_trends(_production_data(365), save_path=save_path,
+                                      aggregate='monthly')
+    assert save_path.exists()
+
+def test_render_cache(tmp_path):
+    """Test that unchanged charts are not re-rendered"""
+    visualizer = SimulationVisualizer(headless=True)
+    data = _production_data()
+    jobs = [
+        ('plot_production_trends', (data,), {'save_path': tmp_path / "a.png"}),
+        ('plot_production_trends', (data,), {'save_path': tmp_path / "b.png", 'aggregate': 'weekly'})
+    ]
+    
+    assert len(RenderCache().render(visualizer, jobs, max_workers=1)) == 2
+    assert RenderCache().render(visualizer, jobs, max_workers=1) == []
+    
+    # Changing one chart's input only re-renders that chart
+    changed = _production_data()
+    changed["Dhaka"][datetime(2024, 1, 1)]['production'] = 0.0
+    jobs[1] = ('plot_production_trends', (changed,), jobs[1][2])
+    assert RenderCache().render(visualizer, jobs, max_workers=1) == [str(tmp_path / "b.png")]
+    
+    # Keys live beside each artifact, so a cache that rendered other charts keeps them
+    other = [('plot_production_trends', (data,), {'save_path': tmp_path / "c.png"})]
+    first, second = RenderCache(), RenderCache()
+    assert len(second.render(visualizer, other, max_workers=1)) == 1
+    assert first.render(visualizer, jobs, max_workers=1) == []
+    assert RenderCache().render(visualizer, other, max_workers=1) == []
+    
+    # An artifact rewritten outside the cache is rendered again
+    (tmp_path / "a.png").write_bytes(b"")
+    assert RenderCache().render(visualizer, jobs, max_workers=1) == [str(tmp_path / "a.png")]
+
+def test_grid_risk_map(tmp_path):
+    """Test pre-binned risk map with lazily loaded detail tiles"""
+    rng = np.random.default_rng(0)
+    count = 20000
+    locations = {
+        'latitude': rng.uniform(21.0, 26.0, count),
+        'longitude': rng.uniform(88.5, 92.5, count),
+        'drought_risk': rng.uniform(0, 1, count),
+        'flood_risk': rng.uniform(0, 1, count)
+    }
+    visualizer = SimulationVisualizer(headless=True)
+    
+    visualizer.create_risk_map(locations, save_path=tmp_path / "points.html")
+    visualizer.create_risk_map(locations, save_path=tmp_path / "grid.html", mode='grid', cell_size=0.25)
+    
+    assert os.path.getsize(tmp_path / "grid.html") < os.path.getsize(tmp_path / "points.html") / 10
+    tiles = list((tmp_path / "grid_tiles").glob("*.json"))
+    assert tiles
+    assert sum(len(json.loads(tile.read_text())) for tile in tiles) == count
+
+def _step_results(days: int = 60, offset: float = 0.0):
+    """Build database engine step results for three regions"""
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            'date': (start + timedelta(days=i)).isoformat(),
+            'regions': [
+                {'district': district, 'temperature': 25.0 + offset + r, 'rainfall': float(i % 7),
+                 'crop_yield': 3.0 + r}
+                for r, district in enumerate(["Dhaka", "Khulna", "Sylhet"])
+            ]
+        }
+        for i in range(days)
+    ]
+
+def test_streaming_comparison_plots(tmp_path):
+    """Test comparison plots streamed from columnar result stores"""
+    ResultsStore.from_step_results(_step_results()).save(tmp_path / "baseline")
+    store = ResultsStore.attach(tmp_path / "baseline")
+    
+    assert isinstance(store.columns['temperature'], np.memmap)
+    region, dates, values = next(store.iter_series('temperature', ["Khulna"]))
+    assert region == "Khulna" and len(dates) == 60 and values[0] == 26.0
+    
+    visualizer = SimulationVisualizer(headless=True)
+    sources = {'baseline': store, 'climate_change': {'results': _step_results(offset=2.0)}}
+    for regions in ('aggregate', 'all', ["Dhaka"]):
+        output_dir = tmp_path / str(regions)
+        visualizer.generate_comparison_plots(sources, output_dir, regions=regions)
+        assert (output_dir / 'temperature_trends.png').exists()
+        assert (output_dir / 'crop_yields.png').exists()
+
+def test_database_series():
+    """Test reading per-region series column-wise from the database"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    region = Region(simulation_id=1, district="Dhaka", latitude=23.8, longitude=90.4)
+    session.add(region)
+    session.commit()
+    start = datetime(2024, 1, 1)
+    for i in reversed(range(5)):
+        session.add(ClimateData(region_id=region.id, timestamp=start + timedelta(days=i),
+                                data_type='temperature', value=20.0 + i, unit='C'))
+        session.add(ClimateData(region_id=region.id, timestamp=start + timedelta(days=i),
+                                data_type='rainfall', value=1.0, unit='mm'))
+        session.add(ProductionData(region_id=region.id, timestamp=start + timedelta(days=i),
+                                   crop_type='rice', yield_per_hectare=4.0))
+    session.commit()
+    
+    source = DatabaseSeries(SimulationRepository(session), 1)
+    name, timestamps, values = next(source.iter_series('temperature'))
+    
+    assert name == "Dhaka"
+    assert values.tolist() == [20.0, 21.0, 22.0, 23.0, 24.0]
+    assert timestamps[0] == np.datetime64('2024-01-01T00:00:00')
+    assert next(source.iter_series('crop_yield'))[2].tolist() == [4.0] * 5
+    assert list(source.iter_series('temperature', ["Khulna"])) == []
+    
+    # Date bounds are inclusive and applied in the query
+    repository = SimulationRepository(session)
+    _, timestamps, values = next(repository.iter_region_series(
+        1, 'temperature', ["Dhaka"], start + timedelta(days=1), start + timedelta(days=3)
+    ))
+    assert values.tolist() == [21.0, 22.0, 23.0]
+
+def test_resample_series():
+    """Test resampling series into weekly and monthly periods"""
+    timestamps = np.arange('2024-01-29', '2024-02-12', dtype='datetime64[D]').astype('datetime64[s]')
+    values = np.arange(len(timestamps), dtype=np.float64)
+    
+    starts, sums = resample_series(timestamps, values, "weekly", "sum")
+    assert starts.tolist() == [datetime(2024, 1, 29).date(), datetime(2024, 2, 5).date()]
+    assert sums.tolist() == [21.0, 70.0]
+    
+    values[0] = np.nan
+    starts, means = resample_series(timestamps, values, "monthly")
+    assert starts.astype('datetime64[M]').tolist() == [datetime(2024, 1, 1).date(), datetime(2024, 2, 1).date()]
+    assert means.tolist() == [1.5, 8.0]
+    with pytest.raises(ValueError):
+        resample_series(timestamps, values, "yearly")
+
+def test_scaling_plot(tmp_path):
+    """Test the log-log scaling plot skips configurations that did not finish"""
+    rows = [
+        {'engine': 'memory', 'farmers': farmers, 'regions': 10, 'years': 1, 'steps': 366,
+         'status': 'ok', 'seconds': farmers / 1e6, 'farmer_steps_per_second': 366e6}
+        for farmers in (1000, 10000)
+    ] + [{'engine': 'database', 'farmers': 1000, 'regions': 10, 'years': 1, 'status': 'timeout'}]
+    
+    save_path = tmp_path / "scaling.png"
+    SimulationVisualizer(headless=True).plot_scaling(rows, save_path=save_path)
+    
+    assert save_path.exists()